@@ -0,0 +1,155 @@
+"""Simulation: book makespan with index-order vs longest-first chapter starts.
+
+Models the two stages of a run. Downloads: open chapters share the book's
+bandwidth equally. Conversions: each finished chapter takes one of the
+transcode workers for its duration divided by the encoder speed. Chapter
+lengths are drawn from a few realistic distributions, and each policy in
+``plan.CHAPTER_ORDERS`` orders the same book. No network or ffmpeg is
+involved; the numbers are simulated seconds.
+
+Usage:
+    python benchmarks/bench_chapter_order.py [--books 200] [--bandwidth-mb 4]
+"""
+
+import argparse
+import heapq
+import random
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tokysnatcher.plan import CHAPTER_ORDERS, BookPlan, ChapterPlan, order_chapters
+
+# HLS segment length and audio bitrate of a typical book
+SEGMENT_SECONDS = 10.0
+BYTES_PER_AUDIO_SECOND = 128_000 / 8
+
+
+def _book(durations: list[float]) -> BookPlan:
+    plan = BookPlan()
+    for index, duration in enumerate(durations):
+        count = max(1, round(duration / SEGMENT_SECONDS))
+        plan.chapters[index] = ChapterPlan(
+            index, [f"seg{i}.ts" for i in range(count)], [duration / count] * count
+        )
+    return plan
+
+
+def even_chapters(rng: random.Random) -> list[float]:
+    return [max(60.0, rng.gauss(20, 4) * 60) for _ in range(rng.randint(15, 40))]
+
+
+def long_finale(rng: random.Random) -> list[float]:
+    chapters = [max(60.0, rng.gauss(15, 3) * 60) for _ in range(rng.randint(10, 25))]
+    chapters[-1] = rng.uniform(90, 180) * 60
+    return chapters
+
+
+def lognormal(rng: random.Random) -> list[float]:
+    return [rng.lognormvariate(6.4, 0.8) for _ in range(rng.randint(20, 60))]
+
+
+def few_parts(rng: random.Random) -> list[float]:
+    return [rng.uniform(45, 200) * 60 for _ in range(rng.randint(3, 8))]
+
+
+DISTRIBUTIONS = {
+    "even chapters": even_chapters,
+    "long final chapter": long_finale,
+    "lognormal lengths": lognormal,
+    "a few long parts": few_parts,
+}
+
+
+def makespan(
+    plan: BookPlan,
+    order: list[int],
+    bandwidth: float,
+    open_chapters: int,
+    transcode_workers: int,
+    encode_speed: float,
+) -> float:
+    """Simulated wall time until the last chapter is converted."""
+    waiting = list(order)
+    # Bytes left per open chapter; open chapters share the bandwidth equally
+    downloading: dict[int, float] = {}
+    now = 0.0
+    finished: list[tuple[float, int]] = []  # (download done time, index)
+
+    while waiting or downloading:
+        while waiting and len(downloading) < open_chapters:
+            index = waiting.pop(0)
+            downloading[index] = plan.chapters[index].duration * BYTES_PER_AUDIO_SECOND
+        share = bandwidth / len(downloading)
+        index, remaining = min(downloading.items(), key=lambda item: item[1])
+        step = remaining / share
+        now += step
+        for other in downloading:
+            downloading[other] -= share * step
+        del downloading[index]
+        finished.append((now, index))
+
+    # Conversions start in download completion order on the first free worker
+    workers = [0.0] * transcode_workers
+    end = 0.0
+    for ready, index in finished:
+        start = max(ready, heapq.heappop(workers))
+        done = start + plan.chapters[index].duration / encode_speed
+        heapq.heappush(workers, done)
+        end = max(end, done)
+    return end
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=200)
+    parser.add_argument("--bandwidth-mb", type=float, default=4.0)
+    parser.add_argument("--open-chapters", type=int, default=2)
+    parser.add_argument("--transcode-workers", type=int, default=4)
+    parser.add_argument(
+        "--encode-speed",
+        type=float,
+        default=40.0,
+        help="Audio seconds converted per second on one core",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    bandwidth = args.bandwidth_mb * 1024 * 1024
+    print(
+        f"{args.books} books per distribution, {args.bandwidth_mb} MiB/s, "
+        f"{args.open_chapters} open chapters, {args.transcode_workers} transcode "
+        f"workers at {args.encode_speed:g}x\n"
+    )
+    policies = list(CHAPTER_ORDERS)
+    print(f"{'distribution':<22}" + "".join(f"{p:>12}" for p in policies) + "   saved")
+    for name, draw in DISTRIBUTIONS.items():
+        rng = random.Random(args.seed)
+        times: dict[str, list[float]] = {policy: [] for policy in policies}
+        for _ in range(args.books):
+            plan = _book(draw(rng))
+            for policy in policies:
+                order = order_chapters(list(plan.chapters), plan, policy)
+                times[policy].append(
+                    makespan(
+                        plan,
+                        order,
+                        bandwidth,
+                        args.open_chapters,
+                        args.transcode_workers,
+                        args.encode_speed,
+                    )
+                )
+        means = {policy: statistics.mean(values) for policy, values in times.items()}
+        saved = 1 - means["longest"] / means["index"]
+        print(
+            f"{name:<22}"
+            + "".join(f"{means[p]:>11.0f}s" for p in policies)
+            + f"   {saved:6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Benchmark: threaded vs asyncio segment engine at equal concurrency.
+
+Downloads the segments of several chapters from a local fake tokybook server
+(``fake_tokybook.py``, run as a subprocess so its threads are not counted)
+through each engine's SegmentScheduler, with the same number of segment slots
+and open chapters, and reports wall time, throughput and the peak number of
+live threads in this process. Playlist parsing and ffmpeg are left out so
+only the segment engines are compared.
+
+Usage:
+    python benchmarks/bench_engines.py [--concurrency 16 64 256] [--chapters 4]
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tokysnatcher.aio import AsyncSegmentScheduler, asyncio_engine_available
+from tokysnatcher.download import SegmentScheduler
+from tokysnatcher.session import configure_session
+from tokysnatcher.writer import DEFAULT_MAX_BUFFERED_BYTES
+
+
+class ThreadSampler:
+    """Samples threading.active_count() on a background thread."""
+
+    def __init__(self, interval: float = 0.01):
+        self.peak = threading.active_count()
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self) -> "ThreadSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def start_server(args) -> tuple[subprocess.Popen, str]:
+    """Run fake_tokybook.py on a free port and wait until it accepts connections."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            str(Path(__file__).resolve().parent / "fake_tokybook.py"),
+            f"--port={port}",
+            f"--segments={args.segments}",
+            f"--segment-kb={args.segment_kb}",
+            f"--latency-ms={args.latency_ms}",
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            if time.monotonic() > deadline:
+                process.kill()
+                raise
+            time.sleep(0.05)
+
+
+def run_engine(
+    engine: str, base_url: str, args, concurrency: int, folder: Path
+) -> None:
+    chapters = [
+        [f"{base_url}/ch{c}/seg{i}.ts" for i in range(args.segments)]
+        for c in range(args.chapters)
+    ]
+    total_bytes = args.chapters * args.segments * args.segment_kb * 1024
+    configure_session(concurrency + args.open_chapters)
+
+    with ThreadSampler() as sampler:
+        start = time.perf_counter()
+        if engine == "asyncio":
+            scheduler = AsyncSegmentScheduler(concurrency, args.open_chapters)
+        else:
+            scheduler = SegmentScheduler(concurrency, args.open_chapters)
+        with scheduler, ThreadPoolExecutor(args.open_chapters) as chapter_pool:
+            results = list(
+                chapter_pool.map(
+                    lambda c: scheduler.download_segments(
+                        chapters[c],
+                        folder / f"{engine}-{c}.ts",
+                        {},
+                        {"name": f"ch{c}"},
+                        c,
+                        lambda *_: None,
+                        DEFAULT_MAX_BUFFERED_BYTES,
+                    ),
+                    range(args.chapters),
+                )
+            )
+        elapsed = time.perf_counter() - start
+
+    assert all(results), f"{engine} engine failed a chapter"
+    print(
+        f"{engine:<8} {concurrency:>5} slots  {elapsed:7.2f}s  "
+        f"{total_bytes / elapsed / 1e6:8.1f} MB/s  peak threads {sampler.peak:>4}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--chapters", type=int, default=4)
+    parser.add_argument("--open-chapters", type=int, default=4)
+    parser.add_argument("--segments", type=int, default=200)
+    parser.add_argument("--segment-kb", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    if not asyncio_engine_available():
+        sys.exit("aiohttp is not installed: pip install 'tokysnatcher[async]'")
+
+    server, base_url = start_server(args)
+    print(
+        f"{args.chapters} chapters x {args.segments} segments x {args.segment_kb} KiB, "
+        f"{args.latency_ms:.0f} ms latency, {args.open_chapters} open chapters"
+    )
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for concurrency in args.concurrency:
+                for engine in ("threads", "asyncio"):
+                    run_engine(engine, base_url, args, concurrency, Path(tmp))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Local stand-in for tokybook's API and HLS endpoints, for benchmarks and offline runs.
+
+Serves ``/<chapter>/index.m3u8`` playlists of ``--segments`` entries and
+``/<chapter>/seg<N>.ts`` segments of ``--segment-kb`` KiB, each delayed by
+``--latency-ms`` to imitate a remote CDN. Segment ``N`` is filled with byte
+``N % 256`` so downloads can be checked for ordering, or with the contents of
+``--segment-file`` (e.g. a short MPEG-TS clip) so ffmpeg can convert the
+result. ``--fail-rate`` answers that fraction of segment requests with 503.
+
+The post-details and playlist APIs are answered too: every slug is a book of
+``--chapters`` chapters. Point TokySnatcher at the server with
+``TOKYSNATCHER_BASE_URL`` to run full downloads (or the daemon) offline.
+
+Usage:
+    python benchmarks/fake_tokybook.py [--port 8765] [--segments 20]
+    TOKYSNATCHER_BASE_URL=http://127.0.0.1:8765 tokysnatcher -u http://127.0.0.1:8765/post/any-book
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from typing import Optional
+
+
+class FakeTokybookHandler(BaseHTTPRequestHandler):
+    """Serves playlists and segments as configured on the server object."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:
+        pass  # Keep benchmark output clean
+
+    def _send(self, status: int, body: bytes = b"") -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path == "/api/v1/search/post-details":
+            slug = request.get("dynamicSlugId", "book")
+            body = {
+                "audioBookId": slug,
+                "postDetailToken": "fake-token",
+                "title": slug.replace("-", " ").title(),
+                "authors": [{"name": "Fake Author"}],
+            }
+        elif self.path == "/api/v1/playlist":
+            book = request.get("audioBookId", "book")
+            body = {
+                "streamToken": "fake-stream-token",
+                "tracks": [
+                    {
+                        "trackTitle": f"{i + 1:02d}. Chapter",
+                        "src": f"{book}/ch{i}/index.m3u8",
+                    }
+                    for i in range(server.chapters)
+                ],
+            }
+        else:
+            self._send(404)
+            return
+        self._send(200, json.dumps(body).encode())
+
+    def do_GET(self) -> None:
+        server = self.server
+        if self.path.endswith(".m3u8"):
+            lines = ["#EXTM3U", "#EXT-X-TARGETDURATION:10"]
+            for i in range(server.segments):
+                lines += ["#EXTINF:10.0,", f"seg{i}.ts"]
+            lines.append("#EXT-X-ENDLIST")
+            self._send(200, ("\n".join(lines) + "\n").encode())
+            return
+
+        match = re.search(r"/seg(\d+)\.ts$", self.path)
+        if match is None:
+            self._send(404)
+            return
+        time.sleep(server.latency)
+        if server.fail_rate and random.random() < server.fail_rate:
+            self._send(503)
+            return
+        index = int(match.group(1))
+        if server.segment_body is not None:
+            self._send(200, server.segment_body)
+        else:
+            self._send(200, bytes([index % 256]) * server.segment_size)
+
+
+class FakeTokybookServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer carrying the fake catalogue's parameters."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(
+        self,
+        port: int = 0,
+        segments: int = 20,
+        segment_size: int = 256 * 1024,
+        latency: float = 0.05,
+        fail_rate: float = 0.0,
+        chapters: int = 3,
+        segment_body: Optional[bytes] = None,
+    ):
+        super().__init__(("127.0.0.1", port), FakeTokybookHandler)
+        self.segments = segments
+        self.segment_size = segment_size
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.chapters = chapters
+        self.segment_body = segment_body
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def chapter_url(self, chapter: int) -> str:
+        return f"{self.base_url}/ch{chapter}/index.m3u8"
+
+
+def start_in_background(**kwargs) -> FakeTokybookServer:
+    """Start a server on a daemon thread and return it (port 0 = any free port)."""
+    server = FakeTokybookServer(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--segments", type=int, default=20)
+    parser.add_argument("--segment-kb", type=int, default=256)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--chapters", type=int, default=3)
+    parser.add_argument("--segment-file", type=str, default=None)
+    args = parser.parse_args(argv)
+
+    segment_body = None
+    if args.segment_file:
+        with open(args.segment_file, "rb") as f:
+            segment_body = f.read()
+    server = FakeTokybookServer(
+        args.port,
+        args.segments,
+        args.segment_kb * 1024,
+        args.latency_ms / 1000,
+        args.fail_rate,
+        args.chapters,
+        segment_body,
+    )
+    print(f"Serving fake tokybook on {server.base_url} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from typing import Optional
 import argparse
 import logging
@@ -10,8 +10,19 @@ import questionary
 from rich.console import Console
 from rich.table import Table
 
-from .chapters import get_chapters
-from .search import search_book
+from .batch import parse_batch_file, print_batch_summary, run_batch
+from .chapters import DEFAULT_CACHE_TTL, configure_api_cache, get_chapters
+from .daemon import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_STATE_PATH, DaemonServer, serve
+from .aio import ENGINES, asyncio_engine_available
+from .download import CHAPTER_WORKERS, DownloadOptions
+from .plan import CHAPTER_ORDERS
+from .ratelimit import parse_rate
+from .retry import RetryPolicy, RetryStats
+from .transcode import OUTPUT_FORMATS
+from .search import SEARCH_CACHE_TTL, configure_search_cache, search_book
+from .session import SITE_HOST
+from .stats import configure_run_stats, write_run_stats
+from .trace import configure_tracing, write_trace
 from .utils import setup_colored_logging
 
 
@@ -27,6 +38,7 @@ class DownloadConfig:
     directory: Optional[Path]
     verbose: bool
     show_all_chapter_bars: bool
+    download_options: DownloadOptions = field(default_factory=DownloadOptions)
 
 
 def check_ffmpeg() -> None:
@@ -53,7 +65,10 @@ class RichArgumentParser(argparse.ArgumentParser):
 
         console.print("\nAn extremely fast Tokybook downloader.\n")
         console.print(
-            "[bold green]Usage:[/bold green] [yellow]tokysnatcher[/yellow] [cyan][OPTIONS][cyan]\n"
+            "[bold green]Usage:[/bold green] [yellow]tokysnatcher[/yellow] [cyan][OPTIONS][cyan]"
+        )
+        console.print(
+            "       [yellow]tokysnatcher serve[/yellow] [cyan][OPTIONS][cyan]\n"
         )
         console.print("[bold green]Options:[/bold green]")
 
@@ -62,8 +77,29 @@ class RichArgumentParser(argparse.ArgumentParser):
             "[cyan]-d[/cyan], [cyan]--directory [blue]<DIRECTORY>[/blue][/cyan]",
             "[cyan]-s[/cyan], [cyan]--search [blue]<SEARCH>[/blue][/cyan]",
             "[cyan]-u[/cyan], [cyan]--url [blue]<URL>[/blue][/cyan]",
+            "[cyan]-b[/cyan], [cyan]--batch [blue]<FILE>[/blue][/cyan]",
             "[cyan]-v[/cyan], [cyan]--verbose[/cyan]",
             "[cyan]-a[/cyan], [cyan]--show-all-chapter-bars[/cyan]",
+            "[cyan]--stream[/cyan]",
+            "[cyan]-f[/cyan], [cyan]--format [blue]<FORMAT>[/blue][/cyan]",
+            "[cyan]--transcode-workers [blue]<N>[/blue][/cyan]",
+            "[cyan]--segment-workers [blue]<N>[/blue][/cyan]",
+            "[cyan]--open-chapters [blue]<N>[/blue][/cyan]",
+            "[cyan]--engine [blue]<ENGINE>[/blue][/cyan]",
+            "[cyan]--retries [blue]<N>[/blue][/cyan]",
+            "[cyan]--adaptive[/cyan]",
+            "[cyan]--chapter-order [blue]<ORDER>[/blue][/cyan]",
+            "[cyan]--listen-first[/cyan]",
+            "[cyan]--limit-rate [blue]<BYTES/S>[/blue][/cyan]",
+            "[cyan]--burst [blue]<BYTES>[/blue][/cyan]",
+            "[cyan]--cache-ttl [blue]<SECONDS>[/blue][/cyan]",
+            "[cyan]--no-cache[/cyan]",
+            "[cyan]--stats-json [blue]<FILE>[/blue][/cyan]",
+            "[cyan]--trace [blue]<FILE>[/blue][/cyan]",
+            "[cyan]--host [blue]<HOST>[/blue][/cyan]",
+            "[cyan]--port [blue]<PORT>[/blue][/cyan]",
+            "[cyan]--jobs [blue]<N>[/blue][/cyan]",
+            "[cyan]--state [blue]<FILE>[/blue][/cyan]",
         ]
 
         descriptions = [
@@ -71,8 +107,29 @@ class RichArgumentParser(argparse.ArgumentParser):
             "Custom download directory",
             "Search query to bypass interactive menu",
             "Direct URL to download, bypassing search",
+            "Download every book in FILE (URLs, slugs or JSON lines) in one run",
             "Show detailed logs during download",
             "Show all chapter progress bars permanently",
+            "Pipe segments straight into ffmpeg (no temporary .ts, no resume)",
+            "Output format: mp3 (re-encode, default), auto, m4a or m4b (copy when possible)",
+            "Concurrent ffmpeg conversions, separate from downloads (default: CPU cores)",
+            "Segment requests in flight across the whole book (default: 8)",
+            "Chapters downloading at the same time (default: 2)",
+            "Segment engine: threads (default) or asyncio (needs tokysnatcher\\[async])",
+            "Retries per failed segment or playlist request, with backoff (default: 4)",
+            "Tune in-flight segment requests to throughput and errors (up to --segment-workers, default 32)",
+            "Start chapters in index order (default) or longest first to finish sooner",
+            "Finish and convert the next chapter to listen to before the others start",
+            "Cap total download bandwidth, e.g. 500k or 2M (default: unlimited)",
+            "Bandwidth burst allowance (default: one second at --limit-rate)",
+            "Reuse cached book details and playlists (and their short-lived tokens) this long (default: 600)",
+            "Always fetch book details, playlists and search results from the API",
+            "Write per-chapter and per-segment timings as JSON to FILE after the run",
+            "Record a Chrome/Perfetto trace of playlist, segment, write and ffmpeg spans to FILE",
+            "serve: interface for the job API (default: 127.0.0.1)",
+            "serve: port for the job API (default: 8420)",
+            "serve: books downloading at the same time (default: 1)",
+            "serve: job queue file (default: ~/.tokysnatcher/jobs.json)",
         ]
 
         table = Table(box=None, show_header=False, show_lines=False)
@@ -94,8 +151,8 @@ def print_usage_hint():
 def validate_url(url: str) -> str:
     """Validate and return a validated url."""
     # More robust check (allows http, https, www, non-www)
-    if "tokybook.com" not in url:
-        raise ValueError(f"Invalid URL: {url}. Must be a tokybook.com URL")
+    if SITE_HOST not in url:
+        raise ValueError(f"Invalid URL: {url}. Must be a {SITE_HOST} URL")
 
     # Ensure protocol is present for requests library later
     if not url.startswith("http"):
@@ -110,6 +167,12 @@ def parse_arguments() -> argparse.Namespace:
         prog="tokysnatcher",
     )
 
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["serve"],
+        help="serve: run the local download daemon with a JSON job API",
+    )
     parser.add_argument(
         "-d", "--directory", type=str, default=None, help="Custom download directory"
     )
@@ -127,6 +190,13 @@ def parse_arguments() -> argparse.Namespace:
         default=None,
         help="Direct URL to download, bypassing search",
     )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        type=str,
+        default=None,
+        help="Download every book in FILE (URLs, slugs or JSON lines) in one run",
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -140,6 +210,127 @@ def parse_arguments() -> argparse.Namespace:
         default=False,
         help="Show all chapter progress bars permanently",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        default=False,
+        help="Pipe segments straight into ffmpeg (no temporary .ts, no resume)",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="mp3",
+        help="Output format: mp3 (re-encode, default), auto, m4a or m4b (copy when possible)",
+    )
+    parser.add_argument(
+        "--transcode-workers",
+        type=int,
+        default=None,
+        help="Concurrent ffmpeg conversions, separate from downloads (default: CPU cores)",
+    )
+    parser.add_argument(
+        "--segment-workers",
+        type=int,
+        default=None,
+        help="Segment requests in flight across the whole book (default: 8)",
+    )
+    parser.add_argument(
+        "--open-chapters",
+        type=int,
+        default=CHAPTER_WORKERS,
+        help="Chapters downloading at the same time (default: 2)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="threads",
+        help="Segment engine: threads (default) or asyncio (needs tokysnatcher[async])",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=RetryPolicy.max_retries,
+        help="Retries per failed segment or playlist request, with backoff (default: 4)",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        default=False,
+        help="Tune in-flight segment requests to throughput and errors (up to --segment-workers, default 32)",
+    )
+    parser.add_argument(
+        "--chapter-order",
+        choices=list(CHAPTER_ORDERS),
+        default="index",
+        help="Start chapters in index order (default) or longest first to finish sooner",
+    )
+    parser.add_argument(
+        "--listen-first",
+        action="store_true",
+        default=False,
+        help="Finish and convert the next chapter to listen to before the others start",
+    )
+    parser.add_argument(
+        "--limit-rate",
+        type=parse_rate,
+        default=None,
+        help="Cap total download bandwidth, e.g. 500k or 2M (default: unlimited)",
+    )
+    parser.add_argument(
+        "--burst",
+        type=parse_rate,
+        default=None,
+        help="Bandwidth burst allowance (default: one second at --limit-rate)",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=DEFAULT_CACHE_TTL,
+        help="Reuse cached book details and playlists (and their short-lived tokens) this long (default: 600)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        default=False,
+        help="Always fetch book details, playlists and search results from the API",
+    )
+    parser.add_argument(
+        "--stats-json",
+        type=str,
+        default=None,
+        help="Write per-chapter and per-segment timings as JSON to FILE after the run",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        help="Record a Chrome/Perfetto trace of playlist, segment, write and ffmpeg spans to FILE",
+    )
+    parser.add_argument(
+        "--host",
+        type=str,
+        default=DEFAULT_HOST,
+        help="serve: interface for the job API (default: 127.0.0.1)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help="serve: port for the job API (default: 8420)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="serve: books downloading at the same time (default: 1)",
+    )
+    parser.add_argument(
+        "--state",
+        type=str,
+        default=None,
+        help="serve: job queue file (default: ~/.tokysnatcher/jobs.json)",
+    )
 
     return parser.parse_args()
 
@@ -155,6 +346,8 @@ def execute_download(
         verbose=config.verbose,
         show_all_chapter_bars=config.show_all_chapter_bars,
         interactive=interactive,
+        # Each book of an interactive session reports its own retries
+        options=replace(config.download_options, retry_stats=RetryStats()),
     )
 
 
@@ -180,6 +373,50 @@ def handle_search_action(
         execute_download(result, config, interactive)
 
 
+def handle_batch_action(path: str, config: DownloadConfig) -> None:
+    """Download every book of a batch file and exit non-zero on any failure."""
+    try:
+        entries = parse_batch_file(Path(path))
+    except (OSError, ValueError) as e:
+        logger.error(f"Cannot read batch file {path}: {e}")
+        sys.exit(1)
+    if not entries:
+        logger.error(f"No books found in batch file {path}")
+        sys.exit(1)
+
+    results = run_batch(
+        entries,
+        config.directory,
+        config.download_options,
+        verbose=config.verbose,
+        show_all_chapter_bars=config.show_all_chapter_bars,
+    )
+    print_batch_summary(results)
+    if not all(result.success for result in results):
+        sys.exit(1)
+
+
+def handle_serve_action(args: argparse.Namespace, config: DownloadConfig) -> None:
+    """Run the download daemon until interrupted."""
+
+    def announce(server: DaemonServer) -> None:
+        console.print(
+            f"[bold green]TokySnatcher daemon listening on {server.url}[/bold green]"
+            " [dim](Ctrl+C to stop)[/dim]"
+        )
+
+    serve(
+        args.host,
+        args.port,
+        Path(args.state) if args.state else DEFAULT_STATE_PATH,
+        config.directory,
+        config.download_options,
+        max_jobs=args.jobs,
+        verbose=config.verbose,
+        on_ready=announce,
+    )
+
+
 def handle_interactive_action(config: DownloadConfig) -> None:
     """Handle interactive menu selection."""
 
@@ -234,14 +471,42 @@ def main() -> None:
 
     setup_colored_logging(args.verbose)
 
+    if args.engine == "asyncio" and not asyncio_engine_available():
+        logger.error("The asyncio engine needs aiohttp")
+        logger.info("Install it with: pip install 'tokysnatcher[async]'")
+        sys.exit(1)
+
+    configure_api_cache(None if args.no_cache else args.cache_ttl)
+    configure_search_cache(None if args.no_cache else SEARCH_CACHE_TTL)
+    configure_run_stats(args.stats_json is not None)
+    configure_tracing(args.trace is not None)
+
     config = DownloadConfig(
         directory=Path(args.directory) if args.directory else None,
         verbose=args.verbose,
         show_all_chapter_bars=args.show_all_chapter_bars,
+        download_options=DownloadOptions(
+            stream_to_ffmpeg=args.stream,
+            output_format=args.format,
+            transcode_workers=args.transcode_workers,
+            segment_workers=args.segment_workers,
+            open_chapters=args.open_chapters,
+            engine=args.engine,
+            retry=RetryPolicy(max_retries=max(0, args.retries)),
+            adaptive=args.adaptive,
+            rate_limit=args.limit_rate,
+            rate_burst=args.burst,
+            chapter_order=args.chapter_order,
+            listen_first=args.listen_first,
+        ),
     )
 
     try:
-        if args.url:
+        if args.command == "serve":
+            handle_serve_action(args, config)
+        elif args.batch:
+            handle_batch_action(args.batch, config)
+        elif args.url:
             handle_url_action(args.url, config, False)
         elif args.search:
             handle_search_action(args.search, config, False)
@@ -253,6 +518,11 @@ def main() -> None:
     except Exception:
         logger.exception("An unexpected error occurred")
         sys.exit(1)
+    finally:
+        if args.stats_json:
+            write_run_stats(Path(args.stats_json))
+        if args.trace:
+            write_trace(Path(args.trace))
 
 
 if __name__ == "__main__":
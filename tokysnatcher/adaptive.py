@@ -0,0 +1,184 @@
+"""AIMD controller for the number of segment requests in flight."""
+
+from typing import Callable, Optional
+import logging
+import threading
+import time
+
+
+# Evaluation window for throughput and latency (seconds)
+DEFAULT_INTERVAL = 2.0
+
+# Upper bound for in-flight segments when --adaptive is on and no explicit
+# --segment-workers is given
+ADAPTIVE_MAX_SEGMENTS = 32
+
+# Failures that signal congestion or server pushback, besides timeouts and
+# connection resets
+CONGESTION_STATUSES = frozenset({429, 503, 504})
+
+# A window must beat the previous one by this much to count as an improvement
+_GAIN_THRESHOLD = 0.05
+# ...and a probe that loses this much is undone
+_LOSS_THRESHOLD = 0.10
+# Window mean latency above baseline x this is a spike
+_LATENCY_SPIKE_FACTOR = 2.5
+# Probe upwards anyway after this many flat windows
+_PROBE_AFTER_WINDOWS = 5
+# How often a blocked acquire() re-checks for shutdown (seconds)
+_WAIT_INTERVAL = 0.1
+
+
+class AdaptiveConcurrency:
+    """Adjustable semaphore whose limit follows observed throughput and errors.
+
+    Requests hold a permit while they are on the wire. Every interval the
+    controller compares aggregate bytes/sec with the previous window: while
+    throughput keeps improving and the limit is actually in use, the limit
+    grows by one (additive increase); a probe that makes things worse is
+    undone, and after several flat windows it probes again. HTTP 429/503/504,
+    timeouts, connection resets and latency spikes halve the limit at once
+    (multiplicative decrease), at most once per interval. Decisions are logged
+    at INFO level, i.e. in verbose mode.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = ADAPTIVE_MAX_SEGMENTS,
+        interval: float = DEFAULT_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.interval = interval
+        self._clock = clock
+        self._limit = min(self.maximum, max(self.minimum, initial))
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+        now = clock()
+        self._window_start = now
+        self._last_decrease = now - interval
+        self._window_bytes = 0
+        self._window_latency = 0.0
+        self._window_requests = 0
+        self._window_peak = 0
+        self._previous_rate: Optional[float] = None
+        self._baseline_latency: Optional[float] = None
+        self._probing = False
+        self._flat_windows = 0
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight."""
+        return self._limit
+
+    def acquire(self, should_abort: Optional[Callable[[], bool]] = None) -> bool:
+        """Wait for a permit; returns False if should_abort returned True."""
+        with self._cond:
+            while self._in_flight >= self._limit:
+                if should_abort is not None and should_abort():
+                    return False
+                self._cond.wait(_WAIT_INTERVAL)
+            self._take()
+            return True
+
+    def try_acquire(self) -> bool:
+        """Take a permit if one is free right now."""
+        with self._cond:
+            if self._in_flight >= self._limit:
+                return False
+            self._take()
+            return True
+
+    def _take(self) -> None:
+        self._in_flight += 1
+        self._window_peak = max(self._window_peak, self._in_flight)
+
+    def release(self) -> None:
+        """Return a permit."""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def record_success(self, nbytes: int, latency: float) -> None:
+        """Account a finished request: body size and time to first byte."""
+        with self._cond:
+            self._window_bytes += nbytes
+            self._window_latency += latency
+            self._window_requests += 1
+            now = self._clock()
+            if now - self._window_start >= self.interval:
+                self._evaluate(now)
+
+    def record_failure(self, status: Optional[int]) -> None:
+        """Account a failed request; status is None for timeouts and resets."""
+        if status is not None and status not in CONGESTION_STATUSES:
+            return
+        reason = f"HTTP {status}" if status is not None else "timeout/connection error"
+        with self._cond:
+            self._decrease(self._clock(), reason)
+
+    def _set_limit(self, limit: int, reason: str) -> None:
+        limit = min(self.maximum, max(self.minimum, limit))
+        if limit != self._limit:
+            logging.info(f"Adaptive concurrency: {self._limit} -> {limit} ({reason})")
+            self._limit = limit
+            self._cond.notify_all()
+
+    def _reset_window(self, now: float) -> None:
+        self._window_start = now
+        self._window_bytes = 0
+        self._window_latency = 0.0
+        self._window_requests = 0
+        self._window_peak = self._in_flight
+
+    def _decrease(self, now: float, reason: str) -> None:
+        if now - self._last_decrease < self.interval:
+            return  # One cut per congestion event
+        self._last_decrease = now
+        self._set_limit(self._limit // 2, reason)
+        self._previous_rate = None
+        self._probing = False
+        self._flat_windows = 0
+        self._reset_window(now)
+
+    def _evaluate(self, now: float) -> None:
+        rate = self._window_bytes / (now - self._window_start)
+        latency = self._window_latency / max(1, self._window_requests)
+        saturated = self._window_peak >= self._limit
+        previous = self._previous_rate
+        mb_per_s = f"{rate / 1e6:.2f} MB/s"
+
+        if self._baseline_latency is None or latency < self._baseline_latency:
+            self._baseline_latency = latency
+        elif latency > self._baseline_latency * _LATENCY_SPIKE_FACTOR:
+            self._decrease(
+                now,
+                f"latency {latency * 1000:.0f} ms vs "
+                f"{self._baseline_latency * 1000:.0f} ms baseline",
+            )
+            # Even when throttled, never judge these samples a second time
+            self._reset_window(now)
+            return
+
+        if previous is None or rate >= previous * (1 + _GAIN_THRESHOLD):
+            self._flat_windows = 0
+            self._probing = saturated
+            if saturated:
+                self._set_limit(self._limit + 1, f"throughput up to {mb_per_s}")
+        elif self._probing and rate <= previous * (1 - _LOSS_THRESHOLD):
+            self._probing = False
+            self._set_limit(self._limit - 1, f"no gain, throughput {mb_per_s}")
+        else:
+            self._probing = False
+            self._flat_windows += 1
+            if saturated and self._flat_windows >= _PROBE_AFTER_WINDOWS:
+                self._flat_windows = 0
+                self._probing = True
+                self._set_limit(self._limit + 1, f"probing at {mb_per_s}")
+
+        self._previous_rate = rate
+        self._reset_window(now)
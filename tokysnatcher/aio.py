@@ -0,0 +1,424 @@
+"""asyncio segment engine: all segment fetches of a book on one event loop thread.
+
+Requires the optional aiohttp dependency (``pip install tokysnatcher[async]``).
+"""
+
+from collections import deque
+from concurrent.futures import CancelledError as FutureCancelledError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Optional
+import asyncio
+import logging
+import threading
+
+import requests
+
+from . import trace
+from .adaptive import AdaptiveConcurrency
+from .buffers import DEFAULT_READ_SIZE
+from .download import SegmentScheduler, _open_segment_output
+from .journal import SegmentJournal
+from .ratelimit import TokenBucket, get_bandwidth_limiter
+from .retry import RetryPolicy, RetryStats, retry_call_async
+from .session import BASE_URL
+from .stats import ChapterTiming
+from .throughput import ChapterMeter
+
+try:
+    import aiohttp
+except ImportError:  # Optional dependency
+    aiohttp = None
+
+
+# Selectable with --engine
+ENGINES = ("threads", "asyncio")
+
+# How often a waiting chapter thread checks for shutdown (seconds)
+_POLL_INTERVAL = 0.2
+
+# Matches the requests timeout used by the threaded engine
+_REQUEST_TIMEOUT = 30
+
+
+def asyncio_engine_available() -> bool:
+    """Whether aiohttp is installed so the asyncio engine can be used."""
+    return aiohttp is not None
+
+
+def _classify_aiohttp_error(
+    error: BaseException,
+) -> Optional[tuple[Optional[int], Optional[str]]]:
+    """aiohttp counterpart of retry.classify_requests_error."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        headers = error.headers or {}
+        return error.status, headers.get("Retry-After")
+    if isinstance(
+        error,
+        (
+            aiohttp.ClientConnectionError,  # Includes resets
+            aiohttp.ClientPayloadError,  # Connection lost mid-body
+            asyncio.TimeoutError,
+        ),
+    ):
+        return None, None
+    return None
+
+
+async def _read_chunked(
+    response,
+    limiter: Optional[TokenBucket],
+    key: int,
+    meter: Optional[ChapterMeter],
+) -> bytes:
+    """Read a response body chunk by chunk, paced by the bandwidth limiter
+    and counted by the meter (either may be None).
+
+    As in buffers.read_segment, a failed or cancelled read takes its bytes
+    back from the meter, and the segment size is recorded once read.
+    """
+    body = bytearray()
+    completed = False
+    try:
+        async for chunk in response.content.iter_chunked(DEFAULT_READ_SIZE):
+            if limiter is not None:
+                await limiter.acquire_async(len(chunk), key)
+            if meter is not None:
+                meter.add(len(chunk))
+            body += chunk
+        completed = True
+    finally:
+        if meter is not None:
+            if completed:
+                meter.segment_size(len(body))
+            else:
+                meter.discard(len(body))
+    return bytes(body)
+
+
+class _ReorderWindow:
+    """Async counterpart of writer.OrderedSegmentWriter's reorder buffer.
+
+    Fetchers put segments in any order and wait while more than
+    max_buffered_bytes are held; the next expected segment is always
+    accepted so the window drains. The chapter writer takes them in order.
+    """
+
+    def __init__(self, first_index: int, max_buffered_bytes: int):
+        self.next_index = first_index
+        self._max_buffered_bytes = max_buffered_bytes
+        self._ready: dict[int, bytes] = {}
+        self._buffered_bytes = 0
+        self._cond = asyncio.Condition()
+
+    def _accepts(self, index: int, size: int) -> bool:
+        return (
+            index == self.next_index
+            or self._buffered_bytes == 0
+            or self._buffered_bytes + size <= self._max_buffered_bytes
+        )
+
+    async def put(self, index: int, data: bytes) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._accepts(index, len(data)))
+            self._ready[index] = data
+            self._buffered_bytes += len(data)
+            self._cond.notify_all()
+
+    async def take(self) -> bytes:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.next_index in self._ready)
+            data = self._ready.pop(self.next_index)
+            self._buffered_bytes -= len(data)
+            self.next_index += 1
+            self._cond.notify_all()
+            return data
+
+
+class AsyncSegmentScheduler(SegmentScheduler):
+    """SegmentScheduler whose segment slots are coroutines instead of threads.
+
+    An event loop runs on one background thread with a single aiohttp session.
+    Chapter workers call download_segments() as with the threaded scheduler;
+    it blocks the calling chapter thread while the loop fetches up to
+    segment_workers segments concurrently across all chapters, so hundreds of
+    requests in flight cost no more than one thread. A chapter's fetches are
+    cancelled when it fails or when should_abort returns True, and all
+    remaining work is cancelled on shutdown. An adaptive controller gates
+    requests, and the bandwidth limiter paces body reads, exactly as in the
+    threaded engine.
+    """
+
+    def __init__(
+        self,
+        segment_workers: int,
+        open_chapters: int,
+        should_abort: Optional[Callable[[], bool]] = None,
+        adaptive: Optional[AdaptiveConcurrency] = None,
+    ):
+        if aiohttp is None:
+            raise RuntimeError(
+                "The asyncio engine needs aiohttp: pip install 'tokysnatcher[async]'"
+            )
+        super().__init__(segment_workers, open_chapters, adaptive)
+        self._should_abort = should_abort or (lambda: False)
+        self._permit_waiters: deque = deque()
+        self.requests = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="segment-loop", daemon=True
+        )
+        self._thread.start()
+        # Loop-bound objects must be created on the loop itself
+        self._run(self._start()).result()
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _acquire_permit(self) -> None:
+        if self.adaptive is None:
+            return
+        while not self.adaptive.try_acquire():
+            waiter = self._loop.create_future()
+            self._permit_waiters.append(waiter)
+            await waiter
+
+    def _release_permit(self) -> None:
+        if self.adaptive is None:
+            return
+        self.adaptive.release()
+        # Wake every waiter: the limit may have grown by more than one slot
+        while self._permit_waiters:
+            waiter = self._permit_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def _start(self) -> None:
+        self._slots = asyncio.Semaphore(self.segment_workers)
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.segment_workers, limit_per_host=self.segment_workers
+            ),
+            timeout=aiohttp.ClientTimeout(
+                sock_connect=_REQUEST_TIMEOUT, sock_read=_REQUEST_TIMEOUT
+            ),
+        )
+
+    def download_segments(
+        self,
+        segments: list[str],
+        ts_filename: Path,
+        download_headers: dict,
+        item: dict,
+        chapter_index: int,
+        progress_callback: Optional[Callable[..., Any]],
+        max_buffered_bytes: int,
+        journal: Optional[SegmentJournal] = None,
+        start_index: int = 0,
+        sink: Optional[BinaryIO] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        retry_stats: Optional[RetryStats] = None,
+        meter: Optional[ChapterMeter] = None,
+        timing: Optional[ChapterTiming] = None,
+        should_abort: Optional[Callable[[], bool]] = None,
+    ) -> bool:
+        """Download one chapter's segments on the event loop, in order.
+
+        Network failures are raised as requests exceptions so callers handle
+        both engines alike (keeping the partial download for resume). The
+        chapter's fetches are cancelled once should_abort returns True.
+        """
+        completed = False
+        write_lock = threading.Lock()
+        closed = False
+
+        with _open_segment_output(ts_filename, start_index, sink) as f:
+
+            def write(segment_index: int, data: bytes) -> None:
+                # A cancelled chapter may leave one write running on its
+                # thread; never let it touch the file once we have moved on
+                with write_lock:
+                    if closed:
+                        return
+                    with trace.span(
+                        "write",
+                        "io",
+                        chapter=chapter_index + 1,
+                        segment=segment_index + 1,
+                    ):
+                        f.write(data)
+                        if journal is not None:
+                            f.flush()
+                            journal.record_segment(segment_index, data)
+
+            future = self._run(
+                self._download_chapter(
+                    segments,
+                    write,
+                    download_headers,
+                    item,
+                    chapter_index,
+                    progress_callback,
+                    max_buffered_bytes,
+                    start_index,
+                    retry_policy,
+                    retry_stats,
+                    meter,
+                    timing,
+                )
+            )
+            try:
+                while True:
+                    try:
+                        completed = future.result(timeout=_POLL_INTERVAL)
+                        break
+                    except FutureTimeoutError:
+                        if self._should_abort() or (
+                            should_abort is not None and should_abort()
+                        ):
+                            future.cancel()
+            except FutureCancelledError:
+                completed = False
+            except aiohttp.ClientResponseError as e:
+                raise requests.RequestException(
+                    f"HTTP {e.status} for {e.request_info.real_url}"
+                ) from e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                raise requests.ConnectionError(
+                    f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+                ) from e
+            finally:
+                future.cancel()
+                with write_lock:
+                    closed = True
+
+        if not completed and journal is None and sink is None and ts_filename.exists():
+            # Keep journaled segments on disk for the next run
+            ts_filename.unlink()
+        return completed
+
+    async def _download_chapter(
+        self,
+        segments: list[str],
+        write: Callable[[int, bytes], None],
+        download_headers: dict,
+        item: dict,
+        chapter_index: int,
+        progress_callback: Optional[Callable[..., Any]],
+        max_buffered_bytes: int,
+        start_index: int,
+        retry_policy: Optional[RetryPolicy],
+        retry_stats: Optional[RetryStats],
+        meter: Optional[ChapterMeter],
+        timing: Optional[ChapterTiming],
+    ) -> bool:
+        total_segments = len(segments)
+        window = _ReorderWindow(start_index, max_buffered_bytes)
+        limiter = get_bandwidth_limiter()
+
+        async def fetch(segment_index: int) -> None:
+            segment_url = segments[segment_index]
+            seg_headers = download_headers.copy()
+            seg_headers["X-Track-Src"] = segment_url.replace(BASE_URL, "")
+            logging.debug(f"Downloading TS segment: {segment_url}")
+            segment_timing = (
+                timing.segment(segment_index) if timing is not None else None
+            )
+
+            async def attempt() -> bytes:
+                await self._acquire_permit()
+                if segment_timing is not None:
+                    segment_timing.attempts += 1
+                try:
+                    self.requests += 1
+                    started = self._loop.time()
+                    # Fetches overlap on the loop thread: async trace events
+                    with trace.async_span(
+                        "segment",
+                        "network",
+                        chapter=chapter_index + 1,
+                        segment=segment_index + 1,
+                    ):
+                        async with self._session.get(
+                            segment_url, headers=seg_headers
+                        ) as response:
+                            latency = self._loop.time() - started
+                            response.raise_for_status()
+                            if limiter is None and meter is None:
+                                data = await response.read()
+                            else:
+                                data = await _read_chunked(
+                                    response, limiter, chapter_index, meter
+                                )
+                    if segment_timing is not None:
+                        segment_timing.finish(
+                            latency,
+                            self._loop.time() - started - latency,
+                            len(data),
+                        )
+                    if self.adaptive is not None:
+                        self.adaptive.record_success(len(data), latency)
+                    return data
+                except Exception as error:
+                    classified = _classify_aiohttp_error(error)
+                    if self.adaptive is not None and classified is not None:
+                        self.adaptive.record_failure(classified[0])
+                    raise
+                finally:
+                    self._release_permit()
+
+            # Hold the slot until the window accepts the data, like the
+            # threaded writer, so buffered bytes stay bounded
+            async with self._slots:
+                data = await retry_call_async(
+                    attempt,
+                    retry_policy,
+                    f"segment {segment_index + 1}/{total_segments} of {item['name']}",
+                    _classify_aiohttp_error,
+                    retry_stats,
+                )
+                await window.put(segment_index, data)
+
+        async def write_in_order() -> None:
+            for segment_index in range(start_index, total_segments):
+                data = await window.take()
+                # Disk or ffmpeg pipe writes must not stall the shared loop
+                await asyncio.to_thread(write, segment_index, data)
+                done = segment_index + 1
+                progress_pct = int(done / total_segments * 100)
+                if progress_callback is None:
+                    logging.info(
+                        f"Downloaded segment {done}/{total_segments} for {item['name']} - {progress_pct}% complete"
+                    )
+                else:
+                    progress_callback(
+                        chapter_index, progress_pct, done == total_segments
+                    )
+
+        tasks = [
+            asyncio.ensure_future(fetch(i)) for i in range(start_index, total_segments)
+        ]
+        tasks.append(asyncio.ensure_future(write_in_order()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return True
+
+    async def _stop(self) -> None:
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._session.close()
+
+    def shutdown(self) -> None:
+        """Cancel outstanding fetches, close the session and stop the loop."""
+        self._run(self._stop()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        logging.debug(f"asyncio engine: {self.requests} segment requests")
+        super().shutdown()
@@ -0,0 +1,259 @@
+"""Batch mode: download a queue of books in one process with shared resources."""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Optional
+import json
+import logging
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+from .chapters import ResolvedBook, download_book, resolve_book
+from .download import DownloadOptions, create_segment_scheduler, is_shutdown_requested
+from .retry import RetryPolicy, RetryStats
+from .session import BASE_URL, SITE_HOST
+from .transcode import OUTPUT_FORMATS
+from .utils import format_elapsed_time
+
+
+# Per-book keys accepted on a JSON line, besides "url" or "slug"
+BOOK_OPTION_KEYS = frozenset({"directory", "format", "stream", "retries"})
+
+
+@dataclass
+class BatchEntry:
+    """One book of a batch file and its per-book overrides.
+
+    Attributes:
+        url: Book URL (slugs are expanded to <site>/post/<slug>)
+        line: Line number in the batch file, for messages (0 = not from a file)
+        directory: Download directory instead of the run's --directory
+        output_format: Output format instead of the run's --format
+        stream_to_ffmpeg: Streaming mode instead of the run's --stream
+        retries: Retries per request instead of the run's --retries
+    """
+
+    url: str
+    line: int = 0
+    directory: Optional[Path] = None
+    output_format: Optional[str] = None
+    stream_to_ffmpeg: Optional[bool] = None
+    retries: Optional[int] = None
+
+    def options(self, base: DownloadOptions) -> DownloadOptions:
+        """The run's options with this book's overrides and retry counters."""
+        options = replace(base, retry_stats=RetryStats())
+        if self.output_format is not None:
+            options = replace(options, output_format=self.output_format)
+        if self.stream_to_ffmpeg is not None:
+            options = replace(options, stream_to_ffmpeg=self.stream_to_ffmpeg)
+        if self.retries is not None:
+            options = replace(options, retry=RetryPolicy(max_retries=self.retries))
+        return options
+
+
+@dataclass
+class BookResult:
+    """Outcome of one batch entry."""
+
+    entry: BatchEntry
+    success: bool
+    title: Optional[str] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+def _where(line: int) -> str:
+    return f"line {line}: " if line else ""
+
+
+def _book_url(value: str, line: int = 0) -> str:
+    """Turn a URL or bare slug into a book URL."""
+    value = value.strip()
+    if SITE_HOST in value:
+        return value if value.startswith("http") else "https://" + value
+    if not value or "/" in value or ":" in value:
+        raise ValueError(f"{_where(line)}not a {SITE_HOST} URL or slug: {value!r}")
+    return f"{BASE_URL}/post/{value}"
+
+
+def entry_from_dict(data: Any, line: int = 0) -> BatchEntry:
+    """Validate a JSON book request ("url" or "slug" plus per-book keys).
+
+    Shared by batch files and the daemon's job API.
+
+    Raises:
+        ValueError: If the request is malformed
+    """
+    where = _where(line)
+    # Type errors raise ValueError too: batch and daemon callers report any
+    # malformed request the same way (a file error, or HTTP 400)
+    if not isinstance(data, dict):
+        raise ValueError(f"{where}expected a JSON object")
+
+    unknown = set(data) - BOOK_OPTION_KEYS - {"url", "slug"}
+    if unknown:
+        raise ValueError(f"{where}unknown keys {', '.join(sorted(unknown))}")
+    target = data.get("url") or data.get("slug")
+    if not isinstance(target, str):
+        raise ValueError(f"{where}needs a 'url' or 'slug' string")
+
+    output_format = data.get("format")
+    if output_format is not None and output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"{where}format must be one of {', '.join(OUTPUT_FORMATS)}")
+    stream = data.get("stream")
+    if stream is not None and not isinstance(stream, bool):
+        raise ValueError(f"{where}'stream' must be true or false")
+    retries = data.get("retries")
+    if retries is not None and (
+        isinstance(retries, bool) or not isinstance(retries, int) or retries < 0
+    ):
+        raise ValueError(f"{where}'retries' must be a non-negative integer")
+    directory = data.get("directory")
+    if directory is not None and not isinstance(directory, str):
+        raise ValueError(f"{where}'directory' must be a string")
+
+    return BatchEntry(
+        _book_url(target, line),
+        line,
+        directory=Path(directory) if directory else None,
+        output_format=output_format,
+        stream_to_ffmpeg=stream,
+        retries=retries,
+    )
+
+
+def parse_batch_file(path: Path) -> list[BatchEntry]:
+    """Read a batch file: one URL or slug per line, or one JSON object per line.
+
+    Blank lines and lines starting with # are ignored. JSON lines take a
+    "url" or "slug" plus optional "directory", "format", "stream" and
+    "retries" overrides.
+
+    Raises:
+        ValueError: On the first malformed line, naming its line number
+    """
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, raw in enumerate(f, start=1):
+            text = raw.strip()
+            if not text or text.startswith("#"):
+                continue
+            if text.startswith("{"):
+                try:
+                    data = json.loads(text)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"line {line_number}: invalid JSON: {e}") from e
+                entries.append(entry_from_dict(data, line_number))
+            else:
+                entries.append(BatchEntry(_book_url(text, line_number), line_number))
+    return entries
+
+
+def run_batch(
+    entries: list[BatchEntry],
+    directory: Optional[Path],
+    options: Optional[DownloadOptions] = None,
+    verbose: bool = False,
+    show_all_chapter_bars: bool = False,
+) -> list[BookResult]:
+    """Download every entry in order, in this process.
+
+    All books share the pooled HTTP session and one segment scheduler, so the
+    segment and bandwidth limits hold across the whole batch. While a book
+    downloads, the next one is resolved (post details, playlist, folder) on a
+    background thread. A failed book does not stop the batch; an interrupt
+    marks the remaining books as skipped.
+    """
+    options = options or DownloadOptions()
+    console = Console()
+    results: list[BookResult] = []
+    if not entries:
+        return results
+
+    def resolve(entry: BatchEntry) -> Optional[ResolvedBook]:
+        return resolve_book(entry.url, entry.directory or directory)
+
+    scheduler = create_segment_scheduler(options)
+    with scheduler, ThreadPoolExecutor(1, thread_name_prefix="resolve") as resolver:
+        upcoming: Future = resolver.submit(resolve, entries[0])
+        for position, entry in enumerate(entries):
+            if is_shutdown_requested():
+                results.append(BookResult(entry, False, error="skipped (interrupted)"))
+                continue
+
+            resolving = upcoming
+            if position + 1 < len(entries):
+                # Metadata for the next book is fetched while this one downloads
+                upcoming = resolver.submit(resolve, entries[position + 1])
+
+            console.print(
+                f"\n[bold cyan]📚 Book {position + 1}/{len(entries)}:[/bold cyan] {entry.url}"
+            )
+            started = time.monotonic()
+            try:
+                book = resolving.result()
+                if book is None:
+                    results.append(
+                        BookResult(entry, False, error="could not resolve book")
+                    )
+                    continue
+                success = download_book(
+                    book,
+                    verbose=verbose,
+                    show_all_chapter_bars=show_all_chapter_bars,
+                    interactive=False,
+                    options=entry.options(options),
+                    scheduler=scheduler,
+                )
+                results.append(
+                    BookResult(
+                        entry,
+                        success,
+                        title=book.title,
+                        error=None if success else "chapters failed",
+                        elapsed=time.monotonic() - started,
+                    )
+                )
+            except Exception as e:
+                logging.exception(f"Batch entry on line {entry.line} failed")
+                results.append(
+                    BookResult(
+                        entry,
+                        False,
+                        error=f"{type(e).__name__}: {e}",
+                        elapsed=time.monotonic() - started,
+                    )
+                )
+
+    return results
+
+
+def print_batch_summary(results: list[BookResult]) -> None:
+    """Print a per-book success/failure table for a finished batch."""
+    console = Console()
+    table = Table(title="Batch summary", show_lines=False)
+    table.add_column("#", justify="right")
+    table.add_column("Book")
+    table.add_column("Result")
+    table.add_column("Time", justify="right")
+
+    for position, result in enumerate(results, start=1):
+        status = (
+            "[green]✅ done[/green]"
+            if result.success
+            else f"[red]❌ {result.error or 'failed'}[/red]"
+        )
+        elapsed = format_elapsed_time(result.elapsed) if result.elapsed else ""
+        table.add_row(str(position), result.title or result.entry.url, status, elapsed)
+
+    failed = sum(1 for result in results if not result.success)
+    console.print()
+    console.print(table)
+    if failed:
+        console.print(f"[red]{failed}/{len(results)} books failed[/red]")
+    else:
+        console.print(f"[green]✨ All {len(results)} books downloaded[/green]")
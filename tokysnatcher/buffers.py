@@ -0,0 +1,158 @@
+"""Reusable segment buffers and a copy-once response read path."""
+
+from typing import Callable, Optional, Union
+import threading
+
+import requests
+
+from .throughput import ChapterMeter
+
+
+# Bytes requested from the socket per read
+DEFAULT_READ_SIZE = 128 * 1024
+
+SegmentData = Union[bytes, bytearray, memoryview]
+
+
+class BufferPool:
+    """Small thread-safe pool of bytearrays reused across segment downloads."""
+
+    def __init__(self, max_buffers: int = 8):
+        self._max_buffers = max_buffers
+        self._free: list[bytearray] = []
+        self._lock = threading.Lock()
+
+    def acquire(self, size: int) -> bytearray:
+        """Return a buffer of at least size bytes, reusing a free one if possible."""
+        with self._lock:
+            best = None
+            for i, buf in enumerate(self._free):
+                if len(buf) < size:
+                    continue
+                if best is None or len(buf) < len(self._free[best]):
+                    best = i
+            if best is not None:
+                return self._free.pop(best)
+        return bytearray(size)
+
+    def release(self, data: SegmentData) -> None:
+        """Return a buffer (or a memoryview over one) to the pool."""
+        if isinstance(data, memoryview):
+            buf = data.obj
+            data.release()
+        else:
+            buf = data
+        if not isinstance(buf, bytearray):
+            return
+        with self._lock:
+            if len(self._free) < self._max_buffers:
+                self._free.append(buf)
+
+
+def _expected_length(response: requests.Response) -> Optional[int]:
+    """Body size from Content-Length, if it describes the decoded payload."""
+    if response.headers.get("Content-Encoding", "identity") != "identity":
+        return None  # Length is of the compressed body
+    try:
+        length = int(response.headers.get("Content-Length", ""))
+    except ValueError:
+        return None
+    return length if length > 0 else None
+
+
+def _read_body(
+    response: requests.Response,
+    pool: BufferPool,
+    read_size: int,
+    interrupted: Callable[[bytes], bool],
+) -> Optional[SegmentData]:
+    """Read the body into a pooled or growable buffer; None if interrupted.
+
+    The pooled buffer goes back to the pool unless it is returned, also when
+    the read raises.
+    """
+    expected = _expected_length(response)
+    chunks = response.iter_content(chunk_size=read_size)
+
+    if expected is None:
+        growable = bytearray()
+        for chunk in chunks:
+            if interrupted(chunk):
+                return None
+            growable += chunk
+        return growable
+
+    buf = pool.acquire(expected)
+    view = memoryview(buf)
+    data: Optional[SegmentData] = None
+    try:
+        pos = 0
+        for chunk in chunks:
+            if interrupted(chunk):
+                return None
+            size = len(chunk)
+            if pos + size > expected:
+                # Server sent more than announced: continue in a growable buffer
+                growable = bytearray(view[:pos])
+                growable += chunk
+                for chunk in chunks:
+                    if interrupted(chunk):
+                        return None
+                    growable += chunk
+                return growable
+            view[pos : pos + size] = chunk
+            pos += size
+        data = view[:pos]
+        return data
+    finally:
+        view.release()
+        if data is None:
+            pool.release(buf)
+
+
+def read_segment(
+    response: requests.Response,
+    pool: BufferPool,
+    read_size: int = DEFAULT_READ_SIZE,
+    should_abort: Optional[Callable[[], bool]] = None,
+    throttle: Optional[Callable[[int], bool]] = None,
+    meter: Optional[ChapterMeter] = None,
+) -> Optional[SegmentData]:
+    """Read a streamed response body, copying each chunk exactly once.
+
+    When Content-Length is known the body is written into a pooled buffer of
+    that size through a memoryview; otherwise (or if the server sends more than
+    announced) it falls back to an amortised-growth bytearray. throttle, if
+    given, is called with the size of every chunk before it is stored and may
+    block to pace the read; returning False aborts like should_abort. meter,
+    if given, counts every chunk as it arrives, takes the bytes back if the
+    read fails or is aborted (the segment is fetched again), and learns the
+    segment's size once the whole body is read.
+
+    Returns:
+        The body as a memoryview over a pooled buffer or a bytearray, or None
+        if the read was aborted midway.
+    """
+    counted = 0
+
+    def interrupted(chunk: bytes) -> bool:
+        nonlocal counted
+        if should_abort is not None and should_abort():
+            return True
+        if throttle is not None and not throttle(len(chunk)):
+            return True
+        if meter is not None:
+            meter.add(len(chunk))
+            counted += len(chunk)
+        return False
+
+    data = None
+    try:
+        data = _read_body(response, pool, read_size, interrupted)
+    finally:
+        if meter is not None:
+            if data is None:
+                meter.discard(counted)
+            else:
+                meter.segment_size(len(data))
+    return data
@@ -0,0 +1,127 @@
+"""Small on-disk JSON cache with per-entry TTL and LRU size bound."""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+
+# Root for all TokySnatcher caches; honours XDG_CACHE_HOME
+DEFAULT_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "tokysnatcher"
+)
+
+# Total size of one cache directory before least recently used entries go
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+@dataclass
+class CacheEntry:
+    """A cached value and how old it is (seconds)."""
+
+    value: Any
+    age: float
+
+
+@dataclass
+class CacheStats:
+    """Lookup outcomes and evicted entries of one cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def summary(self) -> str:
+        """One-line human readable summary."""
+        return f"{self.hits} hits, {self.misses} misses, {self.evictions} evicted"
+
+
+class DiskCache:
+    """One JSON file per key in a directory, thread-safe.
+
+    Entries older than ttl are dropped on lookup. Reads refresh the file's
+    mtime, and once the directory grows beyond max_bytes the entries with the
+    oldest mtime are removed (least recently used first). Unreadable or
+    foreign files are treated as misses, so a corrupt cache never breaks a
+    download.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        ttl: float,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        return self.directory.joinpath(f"{digest}.json")
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for key if it is younger than ttl, else None."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                stored = float(data["stored"])
+                valid = data["key"] == key
+            except (OSError, ValueError, KeyError, TypeError):
+                self.stats.misses += 1
+                return None
+
+            age = self._clock() - stored
+            if not valid or age > self.ttl:
+                path.unlink(missing_ok=True)
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+
+            try:
+                os.utime(path)  # Most recently used
+            except OSError:
+                pass
+            return CacheEntry(data["value"], age)
+
+    def put(self, key: str, value: Any) -> None:
+        """Store value under key, evicting old entries beyond max_bytes."""
+        path = self._path(key)
+        payload = json.dumps({"key": key, "stored": self._clock(), "value": value})
+        with self._lock:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(path.name + ".tmp")
+                tmp_path.write_text(payload, encoding="utf-8")
+                os.replace(tmp_path, path)
+                self._evict()
+            except OSError as e:
+                logging.debug(f"Could not write cache entry {path}: {e}")
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.stats.evictions += 1
@@ -1,17 +1,29 @@
 from __future__ import annotations
 from dataclasses import dataclass
+from typing import Any, Callable
 
 import logging
 import platform
 import re
+import threading
 from pathlib import Path
 from urllib.parse import urlparse, quote
-import requests
 
-from .download import download_all_chapters
+from .cache import DEFAULT_CACHE_DIR, DiskCache
+from .download import DownloadOptions, SegmentScheduler, download_all_chapters
+from .session import BASE_URL, get_session
 
 # Unified logging is handled by logger.py module
 
+# How long cached post details and playlists are reused (seconds). Both carry
+# tokens (postDetailToken, streamToken) that are only valid for minutes, and
+# the API hands out no token without the metadata, so the whole response is
+# cached for the tokens' lifetime
+DEFAULT_CACHE_TTL = 10 * 60
+
+_api_cache: DiskCache | None = DiskCache(DEFAULT_CACHE_DIR / "api", DEFAULT_CACHE_TTL)
+_api_cache_lock = threading.Lock()
+
 
 @dataclass
 class BookInfo:
@@ -22,6 +34,18 @@ class BookInfo:
     directory: Path
 
 
+@dataclass
+class ResolvedBook:
+    """A book whose metadata and chapter list are ready for downloading."""
+
+    url: str
+    author: str
+    title: str
+    directory: Path
+    chapters: list[dict]
+    headers: dict
+
+
 def parse_book_url(book_url: str) -> str:
     """Extract slug from book URL."""
     o = urlparse(book_url)
@@ -32,11 +56,74 @@ def parse_book_url(book_url: str) -> str:
     return slug
 
 
+def configure_api_cache(
+    ttl: float | None, directory: Path | None = None
+) -> DiskCache | None:
+    """Set up the on-disk cache for post-details and playlist responses.
+
+    Args:
+        ttl: Seconds a response (and its tokens) is reused, or None to
+            disable the cache
+        directory: Cache directory (default: <user cache dir>/tokysnatcher/api)
+
+    Returns:
+        DiskCache | None: The installed cache
+    """
+    global _api_cache
+
+    with _api_cache_lock:
+        if ttl is None or ttl <= 0:
+            _api_cache = None
+        else:
+            _api_cache = DiskCache(directory or DEFAULT_CACHE_DIR / "api", ttl)
+        return _api_cache
+
+
+def log_api_cache_stats() -> None:
+    """Log hit/miss counters of the API cache (verbose mode)."""
+    with _api_cache_lock:
+        cache = _api_cache
+    if cache is not None:
+        logging.info(f"API cache: {cache.stats.summary()}")
+
+
+def _cached_api_call(
+    key: str, fetch: Callable[[], dict | None], describe: str
+) -> dict | None:
+    """Serve an API response from the cache until it is older than its TTL.
+
+    Expired entries are fetched again and never used as a fallback when that
+    fetch fails: their tokens would be rejected by the playlist and segment
+    requests that follow.
+    """
+    with _api_cache_lock:
+        cache = _api_cache
+    if cache is None:
+        return fetch()
+
+    key = f"{BASE_URL}/{key}"
+    entry = cache.get(key)
+    if entry is not None:
+        logging.debug(f"Using cached {describe} ({entry.age:.0f}s old)")
+        return entry.value
+
+    data = fetch()
+    if data:
+        cache.put(key, data)
+    return data
+
+
 def fetch_post_details(slug: str) -> dict | None:
-    """Fetch post details from API."""
+    """Fetch post details from API (or the API cache)."""
+    return _cached_api_call(
+        f"post-details/{slug}", lambda: _request_post_details(slug), f"post {slug}"
+    )
+
+
+def _request_post_details(slug: str) -> dict | None:
     try:
-        response = requests.post(
-            "https://tokybook.com/api/v1/search/post-details",
+        response = get_session().post(
+            f"{BASE_URL}/api/v1/search/post-details",
             json={"dynamicSlugId": slug},
             timeout=30,
         )
@@ -143,10 +230,18 @@ def create_download_directory(
 
 
 def fetch_playlist_data(book_id: str, token: str) -> dict | None:
-    """Fetch playlist data from API."""
+    """Fetch playlist data from API (or the API cache)."""
+    return _cached_api_call(
+        f"playlist/{book_id}",
+        lambda: _request_playlist_data(book_id, token),
+        f"playlist {book_id}",
+    )
+
+
+def _request_playlist_data(book_id: str, token: str) -> dict | None:
     try:
-        response = requests.post(
-            "https://tokybook.com/api/v1/playlist",
+        response = get_session().post(
+            f"{BASE_URL}/api/v1/playlist",
             json={"audioBookId": book_id, "postDetailToken": token},
             timeout=30,
         )
@@ -192,7 +287,7 @@ def prepare_chapters(
         encoded_src = quote(src_value)
         logging.debug(f"After encoding: '{encoded_src}'")
 
-        full_url = f"https://tokybook.com/api/v1/public/audio/{encoded_src}"
+        full_url = f"{BASE_URL}/api/v1/public/audio/{encoded_src}"
         logging.debug(f"Final constructed URL: '{full_url}'")
 
         chapters.append(
@@ -207,7 +302,7 @@ def prepare_chapters(
     headers = {
         "X-Audiobook-Id": book_id,
         "X-Stream-Token": stream_token,
-        "Referer": "https://tokybook.com/",
+        "Referer": f"{BASE_URL}/",
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
     }
 
@@ -245,33 +340,32 @@ def validate_and_extract_book_info(slug: str) -> tuple[str, str, dict] | None:
     return book_id, token, post_data
 
 
-def get_chapters(
-    book_url: str,
-    custom_folder: Path | None = None,
-    verbose: bool = False,
-    show_all_chapter_bars: bool = False,
-    interactive: bool = True,
-) -> None:
-    """Get Chapters to download.
+def resolve_book(
+    book_url: str, custom_folder: Path | None = None
+) -> ResolvedBook | None:
+    """Resolve a book URL into its metadata, folder and chapter list.
+
+    Calls the post-details and playlist APIs and creates the download folder,
+    so a book can be resolved ahead of time (e.g. while another downloads).
 
     Args:
         book_url: Link to the book.
         custom_folder: Custom folder set by user.
-        verbose: Enable verbose logging.
-        show_all_chapter_bars: Show all chapter progress bars permanently.
-    """
 
+    Returns:
+        ResolvedBook | None: The resolved book, or None if any step failed
+    """
     logging.debug(f"Fetching chapters for book: {book_url}")
 
     # Extract slug from URL
     slug = parse_book_url(book_url)
     if not slug:
-        return
+        return None
 
     # Validate book and extract tokens with post_data
     book_info = validate_and_extract_book_info(slug)
     if not book_info:
-        return
+        return None
 
     book_id, token, post_data = book_info
 
@@ -283,26 +377,86 @@ def get_chapters(
         book_url, custom_folder, author, book_title
     )
     if not download_folder:
-        return
+        return None
 
     # Call playlist API to get track list
     playlist_data = fetch_playlist_data(book_id, token)
     if not playlist_data:
-        return
+        return None
 
     # Prepare chapters and headers
     chapters, headers = prepare_chapters(playlist_data, book_id, token)
+    log_api_cache_stats()
     if not chapters:
-        return
-
-    # Start downloading chapters
-    download_all_chapters(
-        chapters,
-        headers,
-        download_folder,
-        book_title=book_title,
-        author=author,
+        return None
+
+    return ResolvedBook(
+        book_url, author, book_title, download_folder, chapters, headers
+    )
+
+
+def download_book(
+    book: ResolvedBook,
+    verbose: bool = False,
+    show_all_chapter_bars: bool = False,
+    interactive: bool = True,
+    options: DownloadOptions | None = None,
+    scheduler: SegmentScheduler | None = None,
+    progress_callback: Callable[..., Any] | None = None,
+    should_abort: Callable[[], bool] | None = None,
+) -> bool:
+    """Download every chapter of a resolved book.
+
+    See download_all_chapters for scheduler, progress_callback and
+    should_abort.
+
+    Returns:
+        bool: True if all chapters are on disk afterwards
+    """
+    return download_all_chapters(
+        book.chapters,
+        book.headers,
+        book.directory,
+        book_title=book.title,
+        author=book.author,
+        verbose=verbose,
+        show_all_chapter_bars=show_all_chapter_bars,
+        interactive=interactive,
+        options=options,
+        scheduler=scheduler,
+        progress_callback=progress_callback,
+        should_abort=should_abort,
+    )
+
+
+def get_chapters(
+    book_url: str,
+    custom_folder: Path | None = None,
+    verbose: bool = False,
+    show_all_chapter_bars: bool = False,
+    interactive: bool = True,
+    options: DownloadOptions | None = None,
+) -> bool:
+    """Get Chapters to download.
+
+    Args:
+        book_url: Link to the book.
+        custom_folder: Custom folder set by user.
+        verbose: Enable verbose logging.
+        show_all_chapter_bars: Show all chapter progress bars permanently.
+        options: Download engine options.
+
+    Returns:
+        bool: True if the book was resolved and all chapters downloaded
+    """
+    book = resolve_book(book_url, custom_folder)
+    if book is None:
+        return False
+
+    return download_book(
+        book,
         verbose=verbose,
         show_all_chapter_bars=show_all_chapter_bars,
         interactive=interactive,
+        options=options,
     )
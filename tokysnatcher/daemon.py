@@ -0,0 +1,404 @@
+"""Local download daemon: a persistent job queue behind a small HTTP/JSON API.
+
+Endpoints (all JSON):
+    GET    /jobs              List jobs, oldest first
+    POST   /jobs              Submit {"url" or "slug", optional "directory",
+                              "format", "stream", "retries"}; returns the job
+                              (Content-Type must be application/json)
+    GET    /jobs/<id>         One job with its progress
+    POST   /jobs/<id>/cancel  Cancel a queued or running job (also DELETE /jobs/<id>)
+
+A job's "directory" must lie under the daemon's download directory (-d, or
+the Music folder by default); relative paths are taken from there.
+"""
+
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Optional
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+
+from .batch import BatchEntry, entry_from_dict
+from .chapters import download_book, get_default_music_directory, resolve_book
+from .download import DownloadOptions, SegmentScheduler, create_segment_scheduler
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8420
+
+# Job queue file, kept across restarts
+DEFAULT_STATE_PATH = Path.home() / ".tokysnatcher" / "jobs.json"
+STATE_VERSION = 1
+
+# Job states; queued and running jobs are picked up again after a restart
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_JOB_PATH = re.compile(r"^/jobs/([0-9a-f]+)(/cancel)?/?$")
+
+# Largest request body accepted by the API (bytes)
+_MAX_BODY = 64 * 1024
+
+
+@dataclass
+class Job:
+    """A submitted book download and its progress.
+
+    request holds the validated submission, so the job can be rebuilt from
+    the state file after a restart.
+    """
+
+    id: str
+    url: str
+    request: dict
+    status: str = QUEUED
+    title: Optional[str] = None
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    chapters_total: int = 0
+    chapters_done: int = 0
+    percent: float = 0.0
+
+
+class JobQueue:
+    """Persistent FIFO of jobs run by a fixed number of worker threads.
+
+    All jobs share one segment scheduler, so the segment limit (and the
+    bandwidth limit) hold across every book being downloaded, whoever
+    submitted it. The queue is saved to state_path on every state change.
+    Jobs that were running when the daemon stopped are queued again; the
+    completion manifest and segment journals let them resume.
+    """
+
+    def __init__(
+        self,
+        state_path: Path,
+        directory: Optional[Path] = None,
+        options: Optional[DownloadOptions] = None,
+        max_jobs: int = 1,
+        verbose: bool = False,
+    ):
+        self.state_path = state_path
+        self.directory = directory
+        self.options = options or DownloadOptions()
+        self.max_jobs = max(1, max_jobs)
+        self.verbose = verbose
+        self._jobs: dict[str, Job] = {}
+        self._cancelled: set[str] = set()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._workers: list[threading.Thread] = []
+        self._scheduler: Optional[SegmentScheduler] = None
+        self._load()
+
+    def _load(self) -> None:
+        if not self.state_path.exists():
+            return
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+            if data.get("version") != STATE_VERSION:
+                return
+            for entry in data.get("jobs", []):
+                job = Job(**entry)
+                if job.status == RUNNING:
+                    job.status = QUEUED
+                self._jobs[job.id] = job
+        except (OSError, ValueError, TypeError) as e:
+            logging.warning(f"Ignoring unreadable job queue {self.state_path}: {e}")
+
+    def _save(self) -> None:
+        data = {
+            "version": STATE_VERSION,
+            "jobs": [asdict(job) for job in self._jobs.values()],
+        }
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.state_path)
+
+    def start(self) -> None:
+        """Create the shared scheduler and start the worker threads."""
+        self._scheduler = create_segment_scheduler(self.options)
+        for number in range(self.max_jobs):
+            worker = threading.Thread(
+                target=self._work, name=f"job-{number}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self) -> None:
+        """Interrupt running jobs (they stay queued) and wait for the workers."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join()
+        if self._scheduler is not None:
+            self._scheduler.shutdown()
+
+    def submit(self, request: Any) -> dict:
+        """Validate and queue a book request.
+
+        Raises:
+            ValueError: If the request is malformed or its directory lies
+                outside the daemon's download directory
+        """
+        entry = entry_from_dict(request)
+        self._job_directory(entry)
+        job = Job(uuid.uuid4().hex[:12], entry.url, dict(request))
+        with self._cond:
+            self._jobs[job.id] = job
+            self._save()
+            self._cond.notify()
+        logging.info(f"Queued job {job.id}: {job.url}")
+        return asdict(job)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return asdict(job) if job is not None else None
+
+    def jobs(self) -> list[dict]:
+        with self._cond:
+            return [asdict(job) for job in self._jobs.values()]
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """Cancel a job; a running one starts no further chapter or segment."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status == QUEUED:
+                job.status = CANCELLED
+                job.finished = time.time()
+                self._save()
+            elif job.status == RUNNING:
+                self._cancelled.add(job_id)
+            return asdict(job)
+
+    def _next_job(self) -> Optional[Job]:
+        with self._cond:
+            while not self._stopping:
+                for job in self._jobs.values():
+                    if job.status == QUEUED:
+                        job.status = RUNNING
+                        job.started = time.time()
+                        job.error = None
+                        self._save()
+                        return job
+                self._cond.wait()
+            return None
+
+    def _work(self) -> None:
+        while (job := self._next_job()) is not None:
+            try:
+                status, error = self._run(job)
+            except Exception as e:
+                logging.exception(f"Job {job.id} failed")
+                status, error = FAILED, f"{type(e).__name__}: {e}"
+            with self._cond:
+                cancelled = job.id in self._cancelled
+                self._cancelled.discard(job.id)
+                if cancelled and status != DONE:
+                    status, error = CANCELLED, None
+                elif self._stopping and status != DONE:
+                    status, error = QUEUED, None  # Resumed on next start
+                job.status = status
+                job.error = error
+                job.finished = time.time() if status != QUEUED else None
+                self._save()
+            logging.info(f"Job {job.id} {status}")
+
+    def _job_directory(self, entry: BatchEntry) -> Optional[Path]:
+        """The download directory of a job, confined to the daemon's root.
+
+        Jobs come from any local client, so they may only choose a folder
+        under the directory the daemon was started with.
+
+        Raises:
+            ValueError: If the directory resolves outside the root
+        """
+        if entry.directory is None:
+            return self.directory
+        root = (self.directory or get_default_music_directory()).resolve()
+        directory = (root / entry.directory).resolve()
+        if not directory.is_relative_to(root):
+            raise ValueError(f"'directory' must be inside {root}")
+        return directory
+
+    def _run(self, job: Job) -> tuple[str, Optional[str]]:
+        entry = entry_from_dict(job.request)
+        # Checked again for jobs restored from an older state file
+        book = resolve_book(entry.url, self._job_directory(entry))
+        if book is None:
+            return FAILED, "could not resolve book"
+
+        chapter_progress = [0] * len(book.chapters)
+        with self._cond:
+            job.title = book.title
+            job.chapters_total = len(book.chapters)
+            self._save()
+
+        def should_abort() -> bool:
+            # Polled from download threads; set membership needs no lock
+            return self._stopping or job.id in self._cancelled
+
+        def on_progress(chapter_index: int, percent: int, completed: bool) -> None:
+            with self._cond:
+                chapter_progress[chapter_index] = 100 if completed else percent
+                job.chapters_done = sum(1 for p in chapter_progress if p >= 100)
+                job.percent = round(sum(chapter_progress) / len(chapter_progress), 1)
+
+        success = download_book(
+            book,
+            verbose=self.verbose,
+            interactive=False,
+            options=entry.options(self.options),
+            scheduler=self._scheduler,
+            progress_callback=on_progress,
+            should_abort=should_abort,
+        )
+        return (DONE, None) if success else (FAILED, "chapters failed")
+
+
+class _UnsupportedMediaType(Exception):
+    """A request body that is not declared as JSON."""
+
+
+class _JobAPIHandler(BaseHTTPRequestHandler):
+    """Routes the JSON API onto the server's JobQueue."""
+
+    server: "DaemonServer"
+
+    def log_message(self, format, *args) -> None:
+        logging.debug(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status: int, body: Any) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status: int, message: str) -> None:
+        self._send_json(status, {"error": message})
+
+    def _read_json(self) -> Any:
+        # Browsers send cross-site "simple" POSTs (text/plain, form data)
+        # without a CORS preflight; requiring JSON keeps web pages out
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.split(";", 1)[0].strip().lower() != "application/json":
+            raise _UnsupportedMediaType("Content-Type must be application/json")
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > _MAX_BODY:
+            raise ValueError("request body too large")
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def do_GET(self) -> None:
+        queue = self.server.queue
+        if self.path.rstrip("/") == "/jobs":
+            self._send_json(200, queue.jobs())
+            return
+        match = _JOB_PATH.match(self.path)
+        if match is None or match.group(2):
+            self._error(404, "not found")
+            return
+        job = queue.get(match.group(1))
+        if job is None:
+            self._error(404, "no such job")
+        else:
+            self._send_json(200, job)
+
+    def do_POST(self) -> None:
+        queue = self.server.queue
+        if self.path.rstrip("/") == "/jobs":
+            try:
+                job = queue.submit(self._read_json())
+            except _UnsupportedMediaType as e:
+                self._error(415, str(e))
+                return
+            except ValueError as e:
+                self._error(400, str(e))
+                return
+            self._send_json(201, job)
+            return
+        match = _JOB_PATH.match(self.path)
+        if match is None or not match.group(2):
+            self._error(404, "not found")
+            return
+        self._cancel(match.group(1))
+
+    def do_DELETE(self) -> None:
+        match = _JOB_PATH.match(self.path)
+        if match is None or match.group(2):
+            self._error(404, "not found")
+            return
+        self._cancel(match.group(1))
+
+    def _cancel(self, job_id: str) -> None:
+        job = self.server.queue.cancel(job_id)
+        if job is None:
+            self._error(404, "no such job")
+        else:
+            self._send_json(200, job)
+
+
+class DaemonServer(ThreadingHTTPServer):
+    """HTTP server exposing a JobQueue."""
+
+    daemon_threads = True
+
+    def __init__(self, host: str, port: int, queue: JobQueue):
+        super().__init__((host, port), _JobAPIHandler)
+        self.queue = queue
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    state_path: Path = DEFAULT_STATE_PATH,
+    directory: Optional[Path] = None,
+    options: Optional[DownloadOptions] = None,
+    max_jobs: int = 1,
+    verbose: bool = False,
+    on_ready: Optional[Callable[[DaemonServer], None]] = None,
+) -> None:
+    """Run the daemon until interrupted.
+
+    Args:
+        host: Interface to listen on (local only by default)
+        port: TCP port for the API (0 = any free port)
+        state_path: JSON file holding the job queue
+        directory: Default download directory for jobs
+        options: Engine options shared by all jobs
+        max_jobs: Books downloading at the same time
+        verbose: Log job and chapter progress
+        on_ready: Called with the DaemonServer once it accepts requests
+    """
+    queue = JobQueue(state_path, directory, options, max_jobs, verbose)
+    server = DaemonServer(host, port, queue)
+    queue.start()
+    if on_ready is not None:
+        on_ready(server)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        queue.stop()
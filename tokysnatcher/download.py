@@ -1,16 +1,203 @@
-from typing import Callable, Optional, Any
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, BinaryIO, Callable, ContextManager, Optional
 import logging
 import re
-import requests
 import subprocess
+import threading
+import time
+import requests
 from pathlib import Path
 from rich.console import Console, Group
 from rich.live import Live
 from rich.text import Text
-from . import utils
+from . import trace, utils
+from .adaptive import ADAPTIVE_MAX_SEGMENTS, AdaptiveConcurrency
+from .buffers import DEFAULT_READ_SIZE, BufferPool, SegmentData, read_segment
+from .journal import SegmentJournal, journal_path_for, playlist_fingerprint
+from .manifest import CompletionManifest
+from .progress import ChapterProgressView
+from .plan import BookPlan, ChapterPlan, order_chapters, parse_playlist_text
+from .pipeline import (
+    ChapterOutcome,
+    ChapterPipeline,
+    ChapterResult,
+    PendingConversion,
+)
+from .ratelimit import configure_bandwidth, get_bandwidth_limiter
+from .retry import (
+    RetryPolicy,
+    RetryStats,
+    classify_requests_error,
+    log_retry_stats,
+    retry_call,
+)
+from .stats import ChapterTiming, SegmentTiming, get_run_stats, parse_ffmpeg_cpu_time
+from .throughput import ChapterMeter
+from .session import BASE_URL, configure_session, get_session, log_connection_stats
+from .transcode import (
+    FfmpegError,
+    FfmpegStreamSink,
+    convert_file,
+    log_ffmpeg_failure,
+    needs_probe,
+    output_extensions,
+    parse_ffmpeg_duration,
+    plan_output,
+    probe_audio_codec,
+)
+from .writer import DEFAULT_MAX_BUFFERED_BYTES, OrderedSegmentWriter
 
 _shutdown_requested = utils._shutdown_requested
 
+# Default number of chapters downloaded in parallel
+CHAPTER_WORKERS = 2
+# Segment fetch slots shared by all open chapters of a book
+DEFAULT_SEGMENT_WORKERS = 8
+
+
+@dataclass
+class DownloadOptions:
+    """Per-run download engine options.
+
+    Attributes:
+        stream_to_ffmpeg: Pipe segments into ffmpeg as they arrive instead of
+            writing a temporary .ts file (disables segment-level resume)
+        output_format: One of transcode.OUTPUT_FORMATS; anything but "mp3"
+            probes the source and remuxes without re-encoding when possible
+        transcode_workers: Concurrent ffmpeg conversions in file mode, run
+            independently of the chapter download workers (None = CPU cores)
+        max_pending_transcodes: Downloaded chapters allowed to wait for or be
+            in conversion before downloads pause (None = workers + downloaders)
+        segment_workers: Segment fetch slots shared across all chapters
+            (None = CHAPTER_WORKERS x the per-chapter segment concurrency)
+        open_chapters: Chapters that may be downloading at the same time
+        engine: Segment engine, "threads" or "asyncio" (needs aiohttp)
+        adaptive: Let an AIMD controller vary in-flight segment requests
+            between 1 and segment_workers (None = ADAPTIVE_MAX_SEGMENTS)
+        retry: Retry policy for playlist and segment requests
+        retry_stats: Counts this run's retries; give concurrent runs their own
+        rate_limit: Bytes/sec shared by all segment downloads (None = no limit)
+        rate_burst: Token bucket size in bytes (None = one second at rate_limit)
+        chapter_order: Policy from plan.CHAPTER_ORDERS deciding which pending
+            chapter starts next ("index" or "longest" first)
+        listen_first: Download and convert the first pending chapter alone,
+            with every segment slot, before the rest start in chapter_order
+    """
+
+    stream_to_ffmpeg: bool = False
+    output_format: str = "mp3"
+    transcode_workers: Optional[int] = None
+    max_pending_transcodes: Optional[int] = None
+    segment_workers: Optional[int] = None
+    open_chapters: int = CHAPTER_WORKERS
+    engine: str = "threads"
+    adaptive: bool = False
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    retry_stats: RetryStats = field(default_factory=RetryStats)
+    rate_limit: Optional[int] = None
+    rate_burst: Optional[int] = None
+    chapter_order: str = "index"
+    listen_first: bool = False
+
+
+class SegmentScheduler:
+    """A single pool of segment fetch slots shared by every chapter of a book.
+
+    Total in-flight segment requests are capped at segment_workers no matter
+    how many chapters are open, and a chapter near its end no longer leaves
+    its own slots idle: queued segments of the other open chapters take them.
+    Segments run in submission order, so each chapter's next-in-order segment
+    is always running or done and the ordered writers cannot deadlock. Segment
+    buffers are pooled across chapters as well. With an adaptive controller,
+    requests additionally need one of its permits, so fewer than
+    segment_workers may be on the wire.
+    """
+
+    def __init__(
+        self,
+        segment_workers: int = DEFAULT_SEGMENT_WORKERS,
+        open_chapters: int = CHAPTER_WORKERS,
+        adaptive: Optional[AdaptiveConcurrency] = None,
+    ):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.segment_workers = max(1, segment_workers)
+        self.open_chapters = max(1, open_chapters)
+        self.adaptive = adaptive
+        # Enough buffers for every slot plus a few held in reorder windows
+        self.buffer_pool = BufferPool(max_buffers=self.segment_workers * 2)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.segment_workers, thread_name_prefix="segment"
+        )
+
+    def __enter__(self) -> "SegmentScheduler":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+    def submit(self, fn: Callable[..., Any], *args: Any):
+        """Queue a segment fetch on the shared pool."""
+        return self._executor.submit(fn, *args)
+
+    def download_segments(
+        self,
+        segments: list[str],
+        ts_filename: Path,
+        download_headers: dict,
+        item: dict,
+        chapter_index: int,
+        progress_callback: Optional[Callable[..., Any]],
+        max_buffered_bytes: int,
+        journal: Optional[SegmentJournal] = None,
+        start_index: int = 0,
+        sink: Optional[BinaryIO] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        retry_stats: Optional[RetryStats] = None,
+        meter: Optional[ChapterMeter] = None,
+        timing: Optional[ChapterTiming] = None,
+        should_abort: Optional[Callable[[], bool]] = None,
+    ) -> bool:
+        """Download one chapter's segments on the shared slots, in order."""
+        return download_segments_concurrent(
+            segments,
+            ts_filename,
+            download_headers,
+            item,
+            chapter_index,
+            len(segments),
+            progress_callback,
+            self.segment_workers,
+            max_buffered_bytes,
+            journal=journal,
+            start_index=start_index,
+            sink=sink,
+            scheduler=self,
+            retry_policy=retry_policy,
+            retry_stats=retry_stats,
+            meter=meter,
+            timing=timing,
+            should_abort=should_abort,
+        )
+
+    def shutdown(self) -> None:
+        """Cancel queued segments and wait for running ones."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def is_shutdown_requested() -> bool:
+    """Whether the user interrupted the run (Ctrl+C)."""
+    return _shutdown_requested
+
+
+def _abort_check(should_abort: Optional[Callable[[], bool]]) -> Callable[[], bool]:
+    """The run's interrupt flag, combined with a caller's should_abort if any."""
+    if should_abort is None:
+        return lambda: _shutdown_requested
+    return lambda: _shutdown_requested or should_abort()
+
 
 def _create_standardized_filename(chapter_index: int, book_title: str) -> str:
     """Create standardized filename for a chapter using book title."""
@@ -22,8 +209,34 @@ def _create_standardized_filename(chapter_index: int, book_title: str) -> str:
     return f"{chapter_num} - {title_case_book_title}"
 
 
-def _parse_hls_playlist(playlist_url: str, headers: dict) -> list[str]:
-    """Parse HLS playlist and return list of segment URLs."""
+def _parse_hls_playlist(
+    chapter_index: int,
+    playlist_url: str,
+    headers: dict,
+    retry_policy: Optional[RetryPolicy] = None,
+) -> list[str]:
+    """Parse HLS playlist and return list of segment URLs.
+
+    Transient failures (429/5xx, connection resets) are retried per
+    retry_policy before giving up.
+    """
+    return _fetch_chapter_plan(
+        chapter_index, playlist_url, headers, retry_policy
+    ).segments
+
+
+def _fetch_chapter_plan(
+    chapter_index: int,
+    playlist_url: str,
+    headers: dict,
+    retry_policy: Optional[RetryPolicy] = None,
+    retry_stats: Optional[RetryStats] = None,
+    failure_level: int = logging.ERROR,
+) -> ChapterPlan:
+    """Fetch and parse a chapter's HLS playlist into its ChapterPlan.
+
+    Failures are logged at failure_level and re-raised.
+    """
     import traceback
 
     logger = logging.getLogger(__name__)
@@ -31,68 +244,175 @@ def _parse_hls_playlist(playlist_url: str, headers: dict) -> list[str]:
     logging.debug(f"Request headers: {headers}")
 
     headers_copy = headers.copy()
-    headers_copy["X-Track-Src"] = playlist_url.replace("https://tokybook.com", "")
+    headers_copy["X-Track-Src"] = playlist_url.replace(BASE_URL, "")
 
     logging.debug(f"Modified headers for X-Track-Src: {headers_copy}")
 
-    try:
-        response = requests.get(playlist_url, headers=headers_copy, timeout=30)
+    def fetch_playlist() -> requests.Response:
+        response = get_session().get(playlist_url, headers=headers_copy, timeout=30)
         logging.debug(f"HTTP {response.status_code} from {playlist_url}")
         logging.debug(f"Response headers: {dict(response.headers)}")
 
         response.raise_for_status()
+        return response
 
-        playlist_text = response.text
-        logging.debug(
-            f"Playlist content ({len(playlist_text)} chars): {playlist_text[:200]}..."
-        )
+    try:
+        with trace.span("playlist", "network", chapter=chapter_index + 1):
+            started = time.monotonic()
+            response = retry_call(
+                fetch_playlist,
+                retry_policy,
+                f"playlist {playlist_url}",
+                lambda: _shutdown_requested,
+                stats=retry_stats,
+            )
+            fetch_seconds = time.monotonic() - started
 
-        base_url = playlist_url.rsplit("/", 1)[0] + "/"
-        logging.debug(f"Base URL for relative segments: {base_url}")
+            playlist_text = response.text
+            logging.debug(
+                f"Playlist content ({len(playlist_text)} chars): {playlist_text[:200]}..."
+            )
 
-        segments = []
-        for line in playlist_text.splitlines():
-            line = line.strip()
-            if (
-                line
-                and not line.startswith("#")
-                and (line.startswith("http") or line.startswith("https"))
-            ):
-                logging.debug(f"Absolute segment URL: {line}")
-                segments.append(line)
-            elif line and not line.startswith("#") and not line.startswith("http"):
-                full_url = base_url + line
-                logging.debug(f"Relative segment URL resolved: {line} → {full_url}")
-                segments.append(full_url)
+            segments, durations = parse_playlist_text(playlist_text, playlist_url)
 
         logging.debug(f"Found {len(segments)} total segments")
         if not segments:
             raise ValueError("No segments found in HLS playlist")
 
         logging.info(f"Successfully parsed {len(segments)} segments for chapter")
-        return segments
+        return ChapterPlan(chapter_index, segments, durations, fetch_seconds)
 
     except requests.HTTPError as e:
-        logger.error(f"HTTP {e.response.status_code} for playlist URL: {playlist_url}")
-        logger.error(
-            f"Response headers: {dict(e.response.headers) if hasattr(e.response, 'headers') else 'None'}"
+        logger.log(
+            failure_level,
+            f"HTTP {e.response.status_code} for playlist URL: {playlist_url}",
         )
-        logger.error(
-            f"Response body: {e.response.text[:500] if hasattr(e.response, 'text') else 'None'}"
+        logger.log(
+            failure_level,
+            f"Response headers: {dict(e.response.headers) if hasattr(e.response, 'headers') else 'None'}",
+        )
+        logger.log(
+            failure_level,
+            f"Response body: {e.response.text[:500] if hasattr(e.response, 'text') else 'None'}",
         )
         raise
     except requests.RequestException as e:
-        logger.error(f"Network error fetching playlist: {playlist_url}")
-        logger.error(f"Error details: {str(e)}")
-        logger.error(f"Error type: {type(e).__name__}")
+        logger.log(failure_level, f"Network error fetching playlist: {playlist_url}")
+        logger.log(failure_level, f"Error details: {str(e)}")
+        logger.log(failure_level, f"Error type: {type(e).__name__}")
         raise
     except Exception as e:
-        logger.error(f"Unexpected error parsing playlist: {playlist_url}")
-        logger.error(f"Error details: {str(e)}")
-        logger.error(f"Full traceback:\n{traceback.format_exc()}")
+        logger.log(failure_level, f"Unexpected error parsing playlist: {playlist_url}")
+        logger.log(failure_level, f"Error details: {str(e)}")
+        logger.log(failure_level, f"Full traceback:\n{traceback.format_exc()}")
         raise
 
 
+def plan_book_download(
+    chapters: list[dict],
+    headers: dict,
+    indices: list[int],
+    retry_policy: Optional[RetryPolicy] = None,
+    retry_stats: Optional[RetryStats] = None,
+    workers: int = DEFAULT_SEGMENT_WORKERS,
+    should_abort: Optional[Callable[[], bool]] = None,
+) -> BookPlan:
+    """Fetch the playlists of the given chapters concurrently.
+
+    Runs before any segment is requested, so every chapter worker starts on
+    its segments straight away and the run knows the whole book's segment
+    count and playing time. A chapter whose playlist fails here is left out
+    of the plan; its worker fetches (and reports) the playlist itself. Once
+    should_abort returns True, the remaining playlists are not fetched.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    plan = BookPlan()
+    if not indices:
+        return plan
+    stopping = _abort_check(should_abort)
+
+    def fetch(index: int) -> Optional[ChapterPlan]:
+        if stopping():
+            return None
+        try:
+            # The chapter fetches its playlist again and reports the failure
+            return _fetch_chapter_plan(
+                index,
+                chapters[index]["url"],
+                headers,
+                retry_policy,
+                retry_stats,
+                failure_level=logging.DEBUG,
+            )
+        except Exception as e:
+            logging.debug(f"Planning chapter {index + 1} failed: {e}")
+            return None
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(workers, len(indices))), thread_name_prefix="plan"
+    ) as executor:
+        for chapter_plan in executor.map(fetch, indices):
+            if chapter_plan is not None:
+                plan.chapters[chapter_plan.index] = chapter_plan
+
+    logging.info(
+        f"Planned {len(plan.chapters)}/{len(indices)} chapters: "
+        f"{plan.total_segments} segments, "
+        f"{utils.format_elapsed_time(plan.total_duration)} of audio"
+    )
+    return plan
+
+
+def create_segment_scheduler(
+    options: Optional[DownloadOptions], max_concurrent_segments: int = 4
+) -> SegmentScheduler:
+    """Build the segment scheduler for a book from the run's options.
+
+    Without options.segment_workers the total stays at the historical
+    CHAPTER_WORKERS x max_concurrent_segments. In adaptive mode that is where
+    the controller starts, and segment_workers is its ceiling.
+    """
+    options = options or DownloadOptions()
+    default_workers = CHAPTER_WORKERS * max(1, max_concurrent_segments)
+    adaptive = None
+    if options.adaptive:
+        segment_workers = options.segment_workers or ADAPTIVE_MAX_SEGMENTS
+        adaptive = AdaptiveConcurrency(default_workers, maximum=segment_workers)
+    else:
+        segment_workers = options.segment_workers or default_workers
+    if options.engine == "asyncio":
+        from .aio import AsyncSegmentScheduler
+
+        return AsyncSegmentScheduler(
+            segment_workers,
+            options.open_chapters,
+            should_abort=lambda: _shutdown_requested,
+            adaptive=adaptive,
+        )
+    return SegmentScheduler(segment_workers, options.open_chapters, adaptive)
+
+
+def _bandwidth_throttle(
+    chapter_index: int, should_abort: Callable[[], bool]
+) -> Optional[Callable[[int], bool]]:
+    """Pace a chapter's socket reads through the process-wide limiter, if any."""
+    limiter = get_bandwidth_limiter()
+    if limiter is None:
+        return None
+    return lambda nbytes: limiter.acquire(nbytes, chapter_index, should_abort)
+
+
+def _open_segment_output(
+    filename: Path, start_index: int, sink: Optional[BinaryIO]
+) -> ContextManager[BinaryIO]:
+    """Open the segment destination: a caller-owned sink or the TS file."""
+    if sink is not None:
+        return nullcontext(sink)
+    # Append when resuming after segments already on disk
+    return filename.open("ab" if start_index else "wb")
+
+
 def download_segments_sequential(
     segments: list[str],
     mp3_filename: Path,
@@ -101,33 +421,110 @@ def download_segments_sequential(
     chapter_index: int,
     total_segments: int,
     progress_callback: Optional[Callable[..., Any]] = None,
+    journal: Optional[SegmentJournal] = None,
+    start_index: int = 0,
+    sink: Optional[BinaryIO] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    retry_stats: Optional[RetryStats] = None,
+    meter: Optional[ChapterMeter] = None,
+    timing: Optional[ChapterTiming] = None,
+    should_abort: Optional[Callable[[], bool]] = None,
 ) -> bool:
-    """Download HLS segments sequentially and write to file."""
-    downloaded_segments = [0]  # Use list to allow modification in nested function
+    """Download HLS segments sequentially and write to file.
+
+    With a journal, every completed segment is recorded so an interrupted
+    download can continue from start_index instead of segment zero. If sink
+    is given, segments are written to it instead of mp3_filename. Each
+    segment is read completely before it is written, so a failed segment can
+    be retried per retry_policy without leaving partial data behind. The
+    download stops early once should_abort returns True.
+    """
+    # Use list to allow modification in nested function
+    downloaded_segments = [start_index]
+    buffer_pool = BufferPool(max_buffers=1)
+    stopping = _abort_check(should_abort)
+    throttle = _bandwidth_throttle(chapter_index, stopping)
+
+    def fetch_segment(
+        segment_index: int,
+        segment_url: str,
+        seg_headers: dict,
+        segment_timing: Optional[SegmentTiming],
+    ) -> Optional[SegmentData]:
+        if segment_timing is not None:
+            segment_timing.attempts += 1
+        # Closing the response hands the connection back to the pool
+        with trace.span(
+            "segment",
+            "network",
+            chapter=chapter_index + 1,
+            segment=segment_index + 1,
+        ):
+            with get_session().get(
+                segment_url, headers=seg_headers, stream=True, timeout=30
+            ) as seg_response:
+                seg_response.raise_for_status()
+                started = time.monotonic()
+                data = read_segment(
+                    seg_response,
+                    buffer_pool,
+                    should_abort=stopping,
+                    throttle=throttle,
+                    meter=meter,
+                )
+        if segment_timing is not None and data is not None:
+            segment_timing.finish(
+                seg_response.elapsed.total_seconds(),
+                time.monotonic() - started,
+                len(data),
+            )
+        return data
 
-    with mp3_filename.open("wb") as f:
-        for segment_url in segments:
-            if _shutdown_requested:
-                if mp3_filename.exists():
+    with _open_segment_output(mp3_filename, start_index, sink) as f:
+        for segment_index in range(start_index, total_segments):
+            segment_url = segments[segment_index]
+            if stopping():
+                f.close()
+                # Keep journaled segments on disk for the next run
+                if journal is None and sink is None and mp3_filename.exists():
                     mp3_filename.unlink()
                 return False
 
             # Add X-Track-Src for each segment
             seg_headers = download_headers.copy()
-            seg_headers["X-Track-Src"] = segment_url.replace("https://tokybook.com", "")
+            seg_headers["X-Track-Src"] = segment_url.replace(BASE_URL, "")
 
             # Log each TS segment URL being downloaded
             logging.debug(f"Downloading TS segment: {segment_url}")
+            segment_timing = (
+                timing.segment(segment_index) if timing is not None else None
+            )
 
-            seg_response = requests.get(
-                segment_url, headers=seg_headers, stream=True, timeout=30
+            data = retry_call(
+                partial(
+                    fetch_segment,
+                    segment_index,
+                    segment_url,
+                    seg_headers,
+                    segment_timing,
+                ),
+                retry_policy,
+                f"segment {segment_index + 1}/{total_segments} of {item['name']}",
+                stopping,
+                stats=retry_stats,
             )
-            seg_response.raise_for_status()
+            if data is None:
+                continue  # Interrupted mid-read; handled at the top of the loop
 
             # Write segment data
-            for chunk in seg_response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
+            with trace.span(
+                "write", "io", chapter=chapter_index + 1, segment=segment_index + 1
+            ):
+                f.write(data)
+                if journal is not None:
+                    f.flush()
+                    journal.record_segment(segment_index, data)
+            buffer_pool.release(data)
 
             # Update progress
             downloaded_segments[0] += 1
@@ -155,43 +552,130 @@ def download_segments_concurrent(
     total_segments: int,
     progress_callback: Optional[Callable[..., Any]] = None,
     max_concurrent_segments: int = 4,
+    max_buffered_bytes: int = DEFAULT_MAX_BUFFERED_BYTES,
+    read_size: int = DEFAULT_READ_SIZE,
+    journal: Optional[SegmentJournal] = None,
+    start_index: int = 0,
+    sink: Optional[BinaryIO] = None,
+    scheduler: Optional[SegmentScheduler] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    retry_stats: Optional[RetryStats] = None,
+    meter: Optional[ChapterMeter] = None,
+    timing: Optional[ChapterTiming] = None,
+    should_abort: Optional[Callable[[], bool]] = None,
 ) -> bool:
-    """Download HLS segments concurrently and write to file."""
+    """Download HLS segments concurrently and stream them to file in order.
+
+    Segments are flushed through an OrderedSegmentWriter as soon as the next
+    one in playlist order is available, so memory use is bounded by
+    max_buffered_bytes rather than by the size of the chapter. Segment bodies
+    are read into pooled buffers that are recycled once written. With a
+    journal, each written segment is recorded and downloading starts at
+    start_index. If sink is given, segments are written to it instead of
+    mp3_filename. With a scheduler, segments are fetched on its shared slots
+    (max_concurrent_segments is then ignored) instead of a per-chapter pool.
+    A failed segment is retried on its own per retry_policy while the other
+    segments keep downloading. Once should_abort returns True or a segment
+    fails for good, segments not yet started are dropped and running ones
+    stop reading, so they give the scheduler's shared slots back at once.
+    """
     from concurrent.futures import ThreadPoolExecutor, as_completed
     import threading
 
-    downloaded_segments = [0]  # Use list to allow modification in nested function
-    segment_data: list[Optional[bytes]] = [
-        None
-    ] * total_segments  # List to store segment data in correct order
+    # Use list to allow modification in nested function
+    downloaded_segments = [start_index]
     progress_lock = threading.Lock()
+    adaptive = scheduler.adaptive if scheduler is not None else None
+    stopping = _abort_check(should_abort)
+    # Set once the chapter is finished either way; its segment fetches check it
+    chapter_done = threading.Event()
+
+    def segment_stopping() -> bool:
+        return chapter_done.is_set() or stopping()
+
+    throttle = _bandwidth_throttle(chapter_index, segment_stopping)
+    if scheduler is not None:
+        buffer_pool = scheduler.buffer_pool
+        executor_context: ContextManager[Any] = nullcontext(scheduler)
+    else:
+        # Enough buffers for every worker plus a few held in the reorder window
+        buffer_pool = BufferPool(max_buffers=max_concurrent_segments * 2)
+        executor_context = ThreadPoolExecutor(max_workers=max_concurrent_segments)
 
-    def download_segment(segment_index, segment_url):
-        if _shutdown_requested:
+    def download_segment(segment_index, segment_url, writer):
+        if segment_stopping():
             return None
 
         # Add X-Track-Src for each segment
         seg_headers = download_headers.copy()
-        seg_headers["X-Track-Src"] = segment_url.replace("https://tokybook.com", "")
+        seg_headers["X-Track-Src"] = segment_url.replace(BASE_URL, "")
 
         # Log each TS segment URL being downloaded
         logging.debug(f"Downloading TS segment: {segment_url}")
-
-        seg_response = requests.get(
-            segment_url, headers=seg_headers, stream=True, timeout=30
+        segment_timing = timing.segment(segment_index) if timing is not None else None
+
+        def fetch_segment():
+            if adaptive is not None and not adaptive.acquire(segment_stopping):
+                return None
+            if segment_timing is not None:
+                segment_timing.attempts += 1
+            try:
+                # Closing the response hands the connection back to the pool
+                with trace.span(
+                    "segment",
+                    "network",
+                    chapter=chapter_index + 1,
+                    segment=segment_index + 1,
+                ):
+                    with get_session().get(
+                        segment_url, headers=seg_headers, stream=True, timeout=30
+                    ) as seg_response:
+                        seg_response.raise_for_status()
+
+                        # Read all segment data with shutdown checks
+                        started = time.monotonic()
+                        segment_data = read_segment(
+                            seg_response,
+                            buffer_pool,
+                            read_size,
+                            segment_stopping,
+                            throttle,
+                            meter,
+                        )
+                if segment_timing is not None and segment_data is not None:
+                    segment_timing.finish(
+                        seg_response.elapsed.total_seconds(),
+                        time.monotonic() - started,
+                        len(segment_data),
+                    )
+                if adaptive is not None and segment_data is not None:
+                    adaptive.record_success(
+                        len(segment_data), seg_response.elapsed.total_seconds()
+                    )
+                return segment_data
+            except Exception as error:
+                classified = classify_requests_error(error)
+                if adaptive is not None and classified is not None:
+                    adaptive.record_failure(classified[0])
+                raise
+            finally:
+                if adaptive is not None:
+                    adaptive.release()
+
+        data = retry_call(
+            fetch_segment,
+            retry_policy,
+            f"segment {segment_index + 1}/{total_segments} of {item['name']}",
+            segment_stopping,
+            stats=retry_stats,
         )
-        seg_response.raise_for_status()
-
-        # Read all segment data with shutdown checks
-        data = b""
-        for chunk in seg_response.iter_content(chunk_size=8192):
-            if _shutdown_requested:
-                return None  # Abort this segment
-            if chunk:
-                data += chunk
+        if data is None:
+            return None  # Abort this segment
+        size = len(data)
 
-        # Store data in correct position and update progress
-        segment_data[segment_index] = data
+        # Hand over to the ordered writer (blocks while the buffer is full)
+        if not writer.submit(segment_index, data, segment_stopping):
+            return None
 
         with progress_lock:
             downloaded_segments[0] += 1
@@ -207,47 +691,235 @@ def download_segments_concurrent(
                     downloaded_segments[0] == total_segments,
                 )
 
-        return data
+        return size
+
+    aborted = False
+    with _open_segment_output(mp3_filename, start_index, sink) as f:
+        writer = OrderedSegmentWriter(
+            f,
+            max_buffered_bytes,
+            first_index=start_index,
+            release=buffer_pool.release,
+            on_write=journal.record_segment if journal is not None else None,
+            trace_args={"chapter": chapter_index + 1},
+        )
 
-    # Download segments concurrently
-    with ThreadPoolExecutor(max_workers=max_concurrent_segments) as executor:
-        futures = [
-            executor.submit(download_segment, i, segment_url)
-            for i, segment_url in enumerate(segments)
-        ]
+        # Download segments concurrently
+        with executor_context as executor:
+            futures = [
+                executor.submit(download_segment, i, segments[i], writer)
+                for i in range(start_index, total_segments)
+            ]
 
-        # Wait for all downloads to complete
-        try:
-            for future in as_completed(futures):
-                if _shutdown_requested:
-                    # Cancel all pending futures
-                    for f in futures:
-                        f.cancel()
-                    if mp3_filename.exists():
-                        mp3_filename.unlink()
-                    return False
-                future.result()  # Raise any exceptions
-        except KeyboardInterrupt:
-            # Cancel all pending futures on keyboard interrupt
-            for f in futures:
-                f.cancel()
-            if mp3_filename.exists():
-                mp3_filename.unlink()
-            return False
-
-    # Write segments to file in correct order
-    with mp3_filename.open("wb") as f:
-        for data in segment_data:
-            if data is None:
-                # This shouldn't happen if all downloads succeeded
-                if mp3_filename.exists():
-                    mp3_filename.unlink()
-                return False
-            f.write(data)
+            # Wait for all downloads to complete
+            try:
+                for future in as_completed(futures):
+                    if stopping():
+                        aborted = True
+                        break
+                    future.result()  # Raise any exceptions
+            except KeyboardInterrupt:
+                aborted = True
+            finally:
+                # Cancel queued segments, stop running ones (retries included)
+                # and release workers blocked on the writer, so a failed
+                # chapter does not hold shared slots until its segments drain
+                chapter_done.set()
+                for pending in futures:
+                    pending.cancel()
+                writer.close()
+
+    if aborted or not writer.is_complete(total_segments):
+        # Keep journaled segments on disk for the next run
+        if journal is None and sink is None and mp3_filename.exists():
+            mp3_filename.unlink()
+        return False
 
     return True
 
 
+def _download_segments(
+    segments: list[str],
+    ts_filename: Path,
+    download_headers: dict,
+    item: dict,
+    chapter_index: int,
+    progress_callback: Optional[Callable[..., Any]],
+    max_concurrent_segments: int,
+    max_buffered_bytes: int,
+    journal: Optional[SegmentJournal] = None,
+    start_index: int = 0,
+    sink: Optional[BinaryIO] = None,
+    scheduler: Optional[SegmentScheduler] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    retry_stats: Optional[RetryStats] = None,
+    meter: Optional[ChapterMeter] = None,
+    timing: Optional[ChapterTiming] = None,
+    should_abort: Optional[Callable[[], bool]] = None,
+) -> bool:
+    """Download segments with the sequential, concurrent or scheduled strategy."""
+    if meter is not None:
+        meter.start(len(segments) - start_index)
+    if scheduler is not None:
+        return scheduler.download_segments(
+            segments,
+            ts_filename,
+            download_headers,
+            item,
+            chapter_index,
+            progress_callback,
+            max_buffered_bytes,
+            journal=journal,
+            start_index=start_index,
+            sink=sink,
+            retry_policy=retry_policy,
+            retry_stats=retry_stats,
+            meter=meter,
+            timing=timing,
+            should_abort=should_abort,
+        )
+    if max_concurrent_segments == 0:
+        # Sequential download (original behavior)
+        return download_segments_sequential(
+            segments,
+            ts_filename,
+            download_headers,
+            item,
+            chapter_index,
+            len(segments),
+            progress_callback,
+            journal=journal,
+            start_index=start_index,
+            sink=sink,
+            retry_policy=retry_policy,
+            retry_stats=retry_stats,
+            meter=meter,
+            timing=timing,
+            should_abort=should_abort,
+        )
+    return download_segments_concurrent(
+        segments,
+        ts_filename,
+        download_headers,
+        item,
+        chapter_index,
+        len(segments),
+        progress_callback,
+        max_concurrent_segments,
+        max_buffered_bytes,
+        journal=journal,
+        start_index=start_index,
+        sink=sink,
+        retry_policy=retry_policy,
+        retry_stats=retry_stats,
+        meter=meter,
+        timing=timing,
+        should_abort=should_abort,
+    )
+
+
+def _record_chapter(
+    item: dict,
+    output_filename: Path,
+    completed: subprocess.CompletedProcess,
+    chapter_index: int,
+    output_format: str,
+    manifest: Optional[CompletionManifest],
+    progress_callback: Optional[Callable[..., Any]],
+    timing: Optional[ChapterTiming] = None,
+) -> ChapterResult:
+    """Record a converted chapter in the manifest and log its success."""
+    file_size = output_filename.stat().st_size
+    if timing is not None:
+        timing.bytes_written = file_size
+    if manifest is not None:
+        manifest.record(
+            chapter_index,
+            item,
+            output_filename,
+            output_format,
+            parse_ffmpeg_duration(completed.stderr),
+        )
+    if not _shutdown_requested and progress_callback is None:
+        logging.log(
+            utils.SUCCESS_LEVEL_NUM,
+            f"Successfully downloaded: {item['name']} ({file_size:,} bytes)",
+        )
+    return item["name"], True
+
+
+def _convert_chapter_source(
+    item: dict,
+    ts_filename: Path,
+    journal: SegmentJournal,
+    download_folder: Path,
+    clean_name: str,
+    chapter_index: int,
+    options: DownloadOptions,
+    manifest: Optional[CompletionManifest],
+    progress_callback: Optional[Callable[..., Any]],
+    timing: Optional[ChapterTiming] = None,
+) -> ChapterResult:
+    """Convert a downloaded chapter TS into its final file (the CPU stage).
+
+    Remuxes when the output format allows it, then removes the TS and its
+    journal. May run on a transcode worker long after the download finished.
+    """
+    output_filename = download_folder.joinpath(
+        clean_name + output_extensions(options.output_format)[0]
+    )
+    try:
+        source_codec = None
+        if needs_probe(options.output_format):
+            with trace.span("ffprobe", "transcode", chapter=chapter_index + 1):
+                source_codec = probe_audio_codec(ts_filename)
+        plan = plan_output(options.output_format, source_codec)
+        output_filename = download_folder.joinpath(clean_name + plan.extension)
+        logging.debug(
+            f"{item['name']}: source codec {source_codec}, "
+            f"{'remuxing' if plan.remux else 'transcoding'} to {plan.extension}"
+        )
+        started = time.monotonic()
+        with trace.span("ffmpeg", "transcode", chapter=chapter_index + 1):
+            completed = convert_file(ts_filename, output_filename, plan.codec_args)
+        if timing is not None:
+            timing.ffmpeg_wall = time.monotonic() - started
+            timing.ffmpeg_cpu = parse_ffmpeg_cpu_time(completed.stderr)
+        if completed.returncode != 0:
+            log_ffmpeg_failure(item["name"], completed.stderr)
+            if output_filename.exists():
+                output_filename.unlink()
+            # The source may be corrupt, so do not resume from it
+            journal.discard()
+            if ts_filename.exists():
+                ts_filename.unlink()
+            return item["name"], False
+
+        # Output was created successfully, remove the temporary TS
+        journal.discard()
+        if ts_filename.exists():
+            ts_filename.unlink()
+
+        return _record_chapter(
+            item,
+            output_filename,
+            completed,
+            chapter_index,
+            options.output_format,
+            manifest,
+            progress_callback,
+            timing,
+        )
+    except Exception as e:
+        logger = logging.getLogger(__name__)
+        logger.error(f"Unexpected error converting chapter '{item['name']}'")
+        logger.error(f"Error type: {type(e).__name__}")
+        logger.error(f"Error message: {str(e)}")
+        if output_filename.exists() and output_filename.stat().st_size == 0:
+            output_filename.unlink()
+        return item["name"], False
+
+
 def download_hls_chapter_core(
     item: dict,
     download_headers: dict,
@@ -257,7 +929,15 @@ def download_hls_chapter_core(
     progress_callback: Optional[Callable[..., Any]] = None,
     total_chapters: Optional[int] = None,
     max_concurrent_segments: int = 4,
-) -> tuple[str, bool]:
+    max_buffered_bytes: int = DEFAULT_MAX_BUFFERED_BYTES,
+    manifest: Optional[CompletionManifest] = None,
+    options: Optional[DownloadOptions] = None,
+    defer_conversion: bool = False,
+    scheduler: Optional[SegmentScheduler] = None,
+    chapter_plan: Optional[ChapterPlan] = None,
+    meter: Optional[ChapterMeter] = None,
+    should_abort: Optional[Callable[[], bool]] = None,
+) -> ChapterOutcome:
     """Core download logic shared between all download functions.
 
     Args:
@@ -269,24 +949,56 @@ def download_hls_chapter_core(
         progress_callback: Callable for progress updates (optional)
         total_chapters: Total number of chapters (optional for verbose logging)
         max_concurrent_segments: Maximum concurrent segment downloads per chapter
+        max_buffered_bytes: Cap on out-of-order segment bytes held in memory
+        manifest: Book completion manifest to record the finished chapter in
+        options: Per-run engine options (defaults to DownloadOptions())
+        defer_conversion: In file mode, return a PendingConversion once the TS
+            is downloaded instead of running ffmpeg on this thread
+        scheduler: Shared segment scheduler for the book (optional); without
+            one the chapter uses its own pool of max_concurrent_segments
+        chapter_plan: Playlist fetched ahead of time by plan_book_download;
+            without one the playlist is fetched here
+        meter: Byte counter for the progress display's rate and ETA columns
+        should_abort: Checked before the playlist and segments are fetched
+            and while segments download; True stops the chapter, which fails
+            (keeping a partial TS and its journal for resume)
+
+    In file mode a sidecar journal next to the .ts file records completed
+    segments, so a re-run continues an interrupted chapter instead of starting
+    over. In streaming mode segments are piped into ffmpeg as they arrive.
 
     Returns:
-        tuple[str, bool]: (chapter_name, success)
+        tuple[str, bool]: (chapter_name, success), or a PendingConversion
+        when defer_conversion is set and the download succeeded
     """
-    if _shutdown_requested:
+    stopping = _abort_check(should_abort)
+    if stopping():
         return item["name"], False
 
+    options = options or DownloadOptions()
+    stats = get_run_stats()
+    timing = (
+        stats.chapter(book_title, chapter_index, item["name"])
+        if stats is not None
+        else None
+    )
     clean_name = _create_standardized_filename(chapter_index, book_title)
     # Download raw HLS segments into a TS container first (NOT mp3)
     ts_filename = download_folder.joinpath(f"{clean_name}.ts")
-    mp3_filename = download_folder.joinpath(f"{clean_name}.mp3")
+    # Final extension depends on the probed source codec; see plan_output
+    output_filename = download_folder.joinpath(
+        clean_name + output_extensions(options.output_format)[0]
+    )
 
-    # Clean up any existing files
-    if ts_filename.exists():
-        ts_filename.unlink()
-    if mp3_filename.exists():
-        mp3_filename.unlink()
+    # Clean up any existing output; a partial TS is validated against its
+    # journal once the playlist is known
+    for extension in output_extensions(options.output_format):
+        stale_output = download_folder.joinpath(clean_name + extension)
+        if stale_output.exists():
+            stale_output.unlink()
 
+    journal: Optional[SegmentJournal] = None
+    sink: Optional[FfmpegStreamSink] = None
     try:
         if progress_callback is None:
             # Verbose logging mode
@@ -295,7 +1007,19 @@ def download_hls_chapter_core(
             )
             logging.debug(f"Fetching HLS playlist: {item['url']}")
 
-        segments = _parse_hls_playlist(item["url"], download_headers)
+        if chapter_plan is None:
+            chapter_plan = _fetch_chapter_plan(
+                chapter_index,
+                item["url"],
+                download_headers,
+                options.retry,
+                options.retry_stats,
+            )
+        segments = chapter_plan.segments
+        if timing is not None:
+            timing.playlist_latency = chapter_plan.fetch_seconds
+        if stopping():
+            return item["name"], False
 
         if progress_callback is None:
             logging.info(
@@ -303,91 +1027,144 @@ def download_hls_chapter_core(
             )
 
         total_segments = len(segments)
-
-        if max_concurrent_segments == 0:
-            # Sequential download (original behavior)
-            success = download_segments_sequential(
+        download_started = time.monotonic()
+
+        if options.stream_to_ffmpeg:
+            # Feed ordered segments straight into ffmpeg; there is no TS to
+            # resume from, so stale partial files from file mode are dropped
+            for stale in (ts_filename, journal_path_for(ts_filename)):
+                if stale.exists():
+                    stale.unlink()
+            sink = FfmpegStreamSink(
+                download_folder.joinpath(clean_name), options.output_format
+            )
+            success = _download_segments(
                 segments,
                 ts_filename,
                 download_headers,
                 item,
                 chapter_index,
-                total_segments,
                 progress_callback,
+                max_concurrent_segments,
+                max_buffered_bytes,
+                sink=sink,
+                scheduler=scheduler,
+                retry_policy=options.retry,
+                retry_stats=options.retry_stats,
+                meter=meter,
+                timing=timing,
+                should_abort=should_abort,
             )
             if not success:
+                sink.abort()
+                return item["name"], False
+            if timing is not None:
+                timing.download_seconds = time.monotonic() - download_started
+            completed = sink.finish()
+            tracer = trace.get_tracer()
+            if tracer is not None and sink.started is not None:
+                # ffmpeg ran from the first segment until now
+                tracer.complete(
+                    "ffmpeg (stream)",
+                    "transcode",
+                    tracer.since(sink.started),
+                    tracer.now(),
+                    chapter=chapter_index + 1,
+                )
+            if timing is not None and sink.started is not None:
+                # ffmpeg ran alongside the download, so this overlaps it
+                timing.ffmpeg_wall = time.monotonic() - sink.started
+                timing.ffmpeg_cpu = parse_ffmpeg_cpu_time(completed.stderr)
+            output_filename = sink.output_path or output_filename
+            sink = None
+            if completed.returncode != 0:
+                log_ffmpeg_failure(item["name"], completed.stderr)
+                if output_filename.exists():
+                    output_filename.unlink()
                 return item["name"], False
         else:
-            # Concurrent download
-            success = download_segments_concurrent(
+            # Resume from segments already on disk for this exact playlist
+            journal = SegmentJournal(
+                journal_path_for(ts_filename),
+                playlist_fingerprint(segments),
+                total_segments,
+            )
+            start_index = journal.prepare_resume(ts_filename)
+            if start_index:
+                logging.info(
+                    f"Resuming {item['name']} at segment {start_index + 1}/{total_segments}"
+                )
+                if progress_callback is not None:
+                    progress_callback(
+                        chapter_index,
+                        int(start_index / total_segments * 100),
+                        start_index == total_segments,
+                    )
+
+            success = _download_segments(
                 segments,
                 ts_filename,
                 download_headers,
                 item,
                 chapter_index,
-                total_segments,
                 progress_callback,
                 max_concurrent_segments,
+                max_buffered_bytes,
+                journal=journal,
+                start_index=start_index,
+                scheduler=scheduler,
+                retry_policy=options.retry,
+                retry_stats=options.retry_stats,
+                meter=meter,
+                timing=timing,
+                should_abort=should_abort,
             )
             if not success:
                 return item["name"], False
+            if timing is not None:
+                timing.download_seconds = time.monotonic() - download_started
 
             # Sanity check: TS must exist before conversion
-        if not ts_filename.exists() or ts_filename.stat().st_size == 0:
-            logging.error("No TS produced for chapter: %s", item["name"])
-            return item["name"], False
-        # Convert TS -> real MP3 using ffmpeg
-        try:
-            ffmpeg_cmd = [
-                "ffmpeg",
-                "-y",
-                "-i",
-                str(ts_filename),
-                "-vn",
-                "-c:a",
-                "libmp3lame",
-                "-ar",
-                "44100",
-                "-ac",
-                "2",
-                "-b:a",
-                "320k",
-                str(mp3_filename),
-            ]
-
-            completed = subprocess.run(
-                ffmpeg_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=False,
-            )
-
-            if completed.returncode != 0:
-                logging.error(
-                    "ffmpeg conversion failed for chapter: %s", item["name"]
-                )
-                logging.error(
-                    "ffmpeg stderr (first 400 chars): %s",
-                    completed.stderr[:400],
-                )
-                if mp3_filename.exists():
-                    mp3_filename.unlink()
+            if not ts_filename.exists() or ts_filename.stat().st_size == 0:
+                logging.error("No TS produced for chapter: %s", item["name"])
                 return item["name"], False
 
-        finally:
-            # If mp3 was created successfully, remove the temporary TS
-            if mp3_filename.exists() and ts_filename.exists():
-                ts_filename.unlink()
-        # Check result
-        file_size = mp3_filename.stat().st_size
-        if not _shutdown_requested and progress_callback is None:
-            logging.log(
-                utils.SUCCESS_LEVEL_NUM,
-                f"Successfully downloaded: {item['name']} ({file_size:,} bytes)",
+            pending = PendingConversion(
+                item["name"],
+                partial(
+                    _convert_chapter_source,
+                    item,
+                    ts_filename,
+                    journal,
+                    download_folder,
+                    clean_name,
+                    chapter_index,
+                    options,
+                    manifest,
+                    progress_callback,
+                    timing,
+                ),
             )
-        return item["name"], True
+            if defer_conversion:
+                # The transcode stage owns the source from here on
+                return pending
+            return pending.convert()
+
+        return _record_chapter(
+            item,
+            output_filename,
+            completed,
+            chapter_index,
+            options.output_format,
+            manifest,
+            progress_callback,
+            timing,
+        )
 
+    except FfmpegError as e:
+        # ffmpeg died mid-stream; the sink is aborted in the finally below
+        log_ffmpeg_failure(item["name"], e.stderr)
+        return item["name"], False
     except requests.HTTPError as e:
         logger = logging.getLogger(__name__)
         logger.error(
@@ -400,12 +1177,12 @@ def download_hls_chapter_core(
         logger.error(
             f"Response body: {e.response.text[:500] if e.response and e.response.text else 'None'}"
         )
-        # TS Cleanup
+        # Keep the partial TS and its journal so a re-run can resume
         if ts_filename.exists():
-            ts_filename.unlink()
-        # Only remove mp3 if it looks incomplete
-        if mp3_filename.exists() and mp3_filename.stat().st_size == 0:
-            mp3_filename.unlink()
+            logger.info(f"Partial download kept for resume: {ts_filename.name}")
+        # Only remove output if it looks incomplete
+        if output_filename.exists() and output_filename.stat().st_size == 0:
+            output_filename.unlink()
         return item["name"], False
     except requests.RequestException as e:
         logger = logging.getLogger(__name__)
@@ -414,12 +1191,12 @@ def download_hls_chapter_core(
         logger.error(f"Error type: {type(e).__name__}")
         logger.error(f"Error details: {str(e)}")
 
-        # TS Cleanup
+        # Keep the partial TS and its journal so a re-run can resume
         if ts_filename.exists():
-            ts_filename.unlink()
-        # Only remove mp3 if it looks incomplete
-        if mp3_filename.exists() and mp3_filename.stat().st_size == 0:
-            mp3_filename.unlink()
+            logger.info(f"Partial download kept for resume: {ts_filename.name}")
+        # Only remove output if it looks incomplete
+        if output_filename.exists() and output_filename.stat().st_size == 0:
+            output_filename.unlink()
         return item["name"], False
     except Exception as e:
         import traceback
@@ -432,12 +1209,21 @@ def download_hls_chapter_core(
         logger.error(f"Full traceback:\n{traceback.format_exc()}")
 
         # TS Cleanup
+        if journal is not None:
+            journal.discard()
         if ts_filename.exists():
             ts_filename.unlink()
-        # Only remove mp3 if it looks incomplete
-        if mp3_filename.exists() and mp3_filename.stat().st_size == 0:
-            mp3_filename.unlink()
+        # Only remove output if it looks incomplete
+        if output_filename.exists() and output_filename.stat().st_size == 0:
+            output_filename.unlink()
         return item["name"], False
+    finally:
+        if sink is not None:
+            # Download failed or was interrupted mid-stream: kill ffmpeg and
+            # remove its partial output
+            sink.abort()
+        if journal is not None:
+            journal.close()
 
 
 def download_hls_chapter_simple(
@@ -447,7 +1233,13 @@ def download_hls_chapter_simple(
     chapter_index: int,
     book_title: str,
     total_chapters: int,
-) -> tuple[str, bool]:
+    manifest: Optional[CompletionManifest] = None,
+    options: Optional[DownloadOptions] = None,
+    defer_conversion: bool = False,
+    scheduler: Optional[SegmentScheduler] = None,
+    chapter_plan: Optional[ChapterPlan] = None,
+    should_abort: Optional[Callable[[], bool]] = None,
+) -> ChapterOutcome:
     """Download and concatenate a single HLS chapter with simple logging."""
     return download_hls_chapter_core(
         item,
@@ -456,6 +1248,12 @@ def download_hls_chapter_simple(
         chapter_index,
         book_title,
         total_chapters=total_chapters,
+        manifest=manifest,
+        options=options,
+        defer_conversion=defer_conversion,
+        scheduler=scheduler,
+        chapter_plan=chapter_plan,
+        should_abort=should_abort,
     )
 
 
@@ -467,7 +1265,14 @@ def download_hls_chapter_with_progress(
     book_title: str,
     progress_updater: Callable[..., Any],
     max_concurrent_segments: int = 4,
-) -> tuple[str, bool]:
+    manifest: Optional[CompletionManifest] = None,
+    options: Optional[DownloadOptions] = None,
+    defer_conversion: bool = False,
+    scheduler: Optional[SegmentScheduler] = None,
+    chapter_plan: Optional[ChapterPlan] = None,
+    meter: Optional[ChapterMeter] = None,
+    should_abort: Optional[Callable[[], bool]] = None,
+) -> ChapterOutcome:
     """Download and concatenate a single HLS chapter with progress updates."""
     return download_hls_chapter_core(
         item=item,
@@ -477,6 +1282,27 @@ def download_hls_chapter_with_progress(
         book_title=book_title,
         progress_callback=progress_updater,
         max_concurrent_segments=max_concurrent_segments,
+        manifest=manifest,
+        options=options,
+        defer_conversion=defer_conversion,
+        scheduler=scheduler,
+        chapter_plan=chapter_plan,
+        meter=meter,
+        should_abort=should_abort,
+    )
+
+
+def _create_chapter_pipeline(
+    options: Optional[DownloadOptions],
+    should_abort: Optional[Callable[[], bool]] = None,
+) -> ChapterPipeline:
+    """Build the download -> transcode pipeline for a run."""
+    options = options or DownloadOptions()
+    return ChapterPipeline(
+        max(1, options.open_chapters),
+        transcode_workers=options.transcode_workers,
+        max_pending=options.max_pending_transcodes,
+        should_abort=_abort_check(should_abort),
     )
 
 
@@ -502,13 +1328,91 @@ def _format_chapter_name(name: str) -> str:
         return name.title() if name else name
 
 
+class _RunClock:
+    """Measures a run's time to its first playable (converted) chapter."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.first_chapter: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def chapter_finished(self, future) -> None:
+        """Done callback for a chapter future of the pipeline."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        if not future.result()[1]:
+            return
+        with self._lock:
+            if self.first_chapter is None:
+                self.first_chapter = time.monotonic() - self.started
+
+
+def _chapter_start_order(
+    total_chapters: int,
+    completed_indices: frozenset[int],
+    book_plan: BookPlan,
+    options: DownloadOptions,
+) -> list[int]:
+    """Pending chapter indices in the order they should start."""
+    pending = [i for i in range(total_chapters) if i not in completed_indices]
+    order = order_chapters(pending, book_plan, options.chapter_order)
+    if options.listen_first and pending:
+        # The next chapter to listen to goes first, whatever the policy
+        first = min(pending)
+        order = [first] + [index for index in order if index != first]
+    return order
+
+
+def _start_chapters(
+    order: list[int],
+    start: Callable[[int], Any],
+    listen_first: bool,
+    clock: _RunClock,
+    should_abort: Optional[Callable[[], bool]] = None,
+) -> list:
+    """Submit chapters in order and return their futures.
+
+    In listen-first mode the first chapter runs alone until it is converted,
+    so it has every segment slot and the transcode pool to itself. Once
+    should_abort returns True no further chapter is submitted, so fewer
+    futures than chapters may come back.
+    """
+    from concurrent.futures import wait
+
+    stopping = _abort_check(should_abort)
+    futures = []
+    for position, index in enumerate(order):
+        if stopping():
+            break
+        future = start(index)
+        future.add_done_callback(clock.chapter_finished)
+        futures.append(future)
+        if listen_first and position == 0 and len(order) > 1:
+            wait([future])
+    return futures
+
+
 def _download_chapters_verbose(
     chapters: list[dict],
     headers: dict,
     download_folder: Path,
     book_title: str,
-) -> None:
-    """Download chapters with verbose logging."""
+    manifest: Optional[CompletionManifest] = None,
+    completed_indices: frozenset[int] = frozenset(),
+    options: Optional[DownloadOptions] = None,
+    scheduler: Optional[SegmentScheduler] = None,
+    progress_callback: Optional[Callable[..., Any]] = None,
+    book_plan: Optional[BookPlan] = None,
+    clock: Optional[_RunClock] = None,
+    should_abort: Optional[Callable[[], bool]] = None,
+) -> bool:
+    """Download chapters with verbose logging, skipping completed_indices.
+
+    With a progress_callback, chapters report to it instead of logging each
+    segment. Returns True if every chapter succeeded and the run was not
+    interrupted; chapters not started because should_abort returned True
+    count as failed.
+    """
     global _shutdown_requested
 
     # Suppress library loggers for clean output
@@ -516,38 +1420,78 @@ def _download_chapters_verbose(
     logging.getLogger("urllib3.connectionpool").setLevel(logging.WARNING)
 
     total_chapters = len(chapters)
+    book_plan = book_plan or BookPlan()
+    run_options = options or DownloadOptions()
+    clock = clock or _RunClock()
 
     def _download_wrapper(chapter_data):
         index, chapter = chapter_data
+        if progress_callback is not None:
+            return download_hls_chapter_core(
+                chapter,
+                headers,
+                download_folder,
+                index,
+                book_title,
+                progress_callback=progress_callback,
+                total_chapters=total_chapters,
+                manifest=manifest,
+                options=options,
+                defer_conversion=True,
+                scheduler=scheduler,
+                chapter_plan=book_plan.get(index),
+                should_abort=should_abort,
+            )
         return download_hls_chapter_simple(
-            chapter, headers, download_folder, index, book_title, total_chapters
+            chapter,
+            headers,
+            download_folder,
+            index,
+            book_title,
+            total_chapters,
+            manifest,
+            options,
+            defer_conversion=True,
+            scheduler=scheduler,
+            chapter_plan=book_plan.get(index),
+            should_abort=should_abort,
         )
 
-    from concurrent.futures import ThreadPoolExecutor
-
-    with ThreadPoolExecutor(max_workers=2) as pool:
+    with _create_chapter_pipeline(options, should_abort) as pool:
         try:
-            futures = [
-                pool.submit(_download_wrapper, (index, chapter))
-                for index, chapter in enumerate(chapters)
-            ]
+            futures = _start_chapters(
+                _chapter_start_order(
+                    total_chapters, completed_indices, book_plan, run_options
+                ),
+                lambda index: pool.submit(_download_wrapper, (index, chapters[index])),
+                run_options.listen_first,
+                clock,
+                should_abort,
+            )
             for future in futures:
                 future.result()
 
+            if clock.first_chapter is not None:
+                logging.info(
+                    f"Time to first playable chapter: {clock.first_chapter:.1f}s"
+                )
+
             # Check if download was interrupted (double check before completion)
             if _shutdown_requested:
                 logging.warning(
                     "Download cancelled by user - partial download completed"
                 )
-                return
+                return False
 
-            successful_downloads = sum(1 for future in futures if future.result()[1])
+            successful_downloads = len(completed_indices) + sum(
+                1 for future in futures if future.result()[1]
+            )
             failed_downloads = total_chapters - successful_downloads
 
             # Final check for interruption right before logging success
             if _shutdown_requested:
                 logging.warning("Download was interrupted during final steps")
-                return
+                return False
 
             if failed_downloads > 0:
                 logging.info(
@@ -558,11 +1502,12 @@ def _download_chapters_verbose(
                     utils.SUCCESS_LEVEL_NUM,
                     f"Download completed successfully: All {total_chapters} chapters downloaded",
                 )
+            return failed_downloads == 0
 
         except KeyboardInterrupt:
             _shutdown_requested = True
             logging.warning("Download cancelled by user - partial download completed")
-            return  # Exit early, don't show completion message
+            return False  # Exit early, don't show completion message
 
 
 def download_all_chapters(
@@ -577,7 +1522,11 @@ def download_all_chapters(
     hide_completed_bars: bool = False,
     max_concurrent_segments: int = 4,
     interactive: bool = True,
-) -> None:
+    options: Optional[DownloadOptions] = None,
+    scheduler: Optional[SegmentScheduler] = None,
+    progress_callback: Optional[Callable[..., Any]] = None,
+    should_abort: Optional[Callable[[], bool]] = None,
+) -> bool:
     """Download all chapters with modern progress tracking.
 
     Args:
@@ -590,26 +1539,122 @@ def download_all_chapters(
         show_chapter_bars: Show individual chapter progress bars alongside overall progress (default True)
         show_all_chapter_bars: Show all chapter bars at once from the start, including pending chapters (default False)
         hide_completed_bars: Hide completed chapter bars when using dynamic display (default False)
-        max_concurrent_segments: Maximum concurrent segment downloads per chapter (0 = sequential)
+        max_concurrent_segments: Segment downloads per chapter; sizes the shared segment pool unless options.segment_workers is set (0 = sequential)
+        options: Per-run engine options such as streaming into ffmpeg
+        scheduler: Segment scheduler owned by the caller, e.g. shared by the
+            books of a batch; by default one is created for this book and shut
+            down afterwards
+        progress_callback: Receives (chapter_index, percent, completed) in
+            place of the Rich display, e.g. for a headless daemon; chapters
+            already complete are reported up front
+        should_abort: Polled while the book downloads, e.g. by the daemon to
+            cancel a job; once it returns True no further playlist, chapter
+            or segment is started and the book fails (partial chapters are
+            kept for resume)
+
+    Chapters recorded as finished in the book's completion manifest, whose
+    output files are still intact, are skipped.
+
+    Returns:
+        bool: True if every chapter is downloaded and the run was not interrupted
     """
-    utils.setup_colored_logging(verbose)
+    options = options or DownloadOptions()
+    clock = _RunClock()
+
+    manifest = CompletionManifest.load(download_folder)
+    completed_indices = frozenset(
+        index
+        for index, chapter in enumerate(chapters)
+        if manifest.is_complete(index, chapter["url"], options.output_format)
+    )
+    if completed_indices:
+        logging.info(
+            f"Skipping {len(completed_indices)}/{len(chapters)} chapters already downloaded"
+        )
 
-    if verbose:
-        _download_chapters_verbose(chapters, headers, download_folder, book_title)
-    else:
-        _download_chapters_with_progress(
+    # One scheduler owns every segment slot of the book; sequential mode
+    # (max_concurrent_segments=0) keeps fetching inside each chapter thread
+    owns_scheduler = scheduler is None and max_concurrent_segments > 0
+    if owns_scheduler:
+        scheduler = create_segment_scheduler(options, max_concurrent_segments)
+    open_chapters = max(1, options.open_chapters)
+    segment_slots = scheduler.segment_workers if scheduler else open_chapters
+    # One pooled connection per in-flight request: segment slots + playlists
+    configure_session(segment_slots + open_chapters)
+    # One bucket paces every segment read of the run, in either engine
+    configure_bandwidth(options.rate_limit, options.rate_burst)
+    if scheduler is not None:
+        logging.debug(
+            f"Segment scheduler: {segment_slots} slots shared by up to {open_chapters} open chapters"
+        )
+
+    if progress_callback is not None:
+        for index in sorted(completed_indices):
+            progress_callback(index, 100, True)
+
+    # All remaining playlists are fetched before the first segment request,
+    # and before the progress display starts, so show that it is happening
+    pending = [
+        index for index in range(len(chapters)) if index not in completed_indices
+    ]
+    logging.info(f"Planning {len(pending)} chapters")
+    planning_status = (
+        Console().status(f"📃 Fetching {len(pending)} chapter playlists...")
+        if pending and not verbose and progress_callback is None
+        else nullcontext()
+    )
+    with planning_status:
+        book_plan = plan_book_download(
             chapters,
             headers,
-            download_folder,
-            book_title,
-            author,
-            download_hls_chapter_with_progress,  # Pass the download function
-            max_concurrent_segments,
-            interactive,
-            show_all_chapter_bars,
-            hide_completed_bars,
+            pending,
+            options.retry,
+            options.retry_stats,
+            workers=segment_slots,
+            should_abort=should_abort,
         )
 
+    with scheduler if owns_scheduler else nullcontext():
+        if verbose or progress_callback is not None:
+            success = _download_chapters_verbose(
+                chapters,
+                headers,
+                download_folder,
+                book_title,
+                manifest,
+                completed_indices,
+                options,
+                scheduler,
+                progress_callback,
+                book_plan,
+                clock,
+                should_abort,
+            )
+        else:
+            success = _download_chapters_with_progress(
+                chapters,
+                headers,
+                download_folder,
+                book_title,
+                author,
+                download_hls_chapter_with_progress,  # Pass the download function
+                max_concurrent_segments,
+                interactive,
+                show_all_chapter_bars,
+                hide_completed_bars,
+                manifest,
+                completed_indices,
+                options,
+                scheduler,
+                book_plan,
+                clock,
+                should_abort,
+            )
+
+    log_connection_stats()
+    log_retry_stats(options.retry_stats)
+    return success
+
 
 def _download_chapters_with_progress(
     chapters: list[dict],
@@ -622,7 +1667,14 @@ def _download_chapters_with_progress(
     interactive: bool = True,
     show_all_chapter_bars: bool = False,
     hide_completed_bars: bool = False,
-) -> None:
+    manifest: Optional[CompletionManifest] = None,
+    completed_indices: frozenset[int] = frozenset(),
+    options: Optional[DownloadOptions] = None,
+    scheduler: Optional[SegmentScheduler] = None,
+    book_plan: Optional[BookPlan] = None,
+    clock: Optional[_RunClock] = None,
+    should_abort: Optional[Callable[[], bool]] = None,
+) -> bool:
     """Download chapters with progress bars using custom columns.
 
     Args:
@@ -636,116 +1688,33 @@ def _download_chapters_with_progress(
         interactive: Whether to prompt for input on completion
         show_all_chapter_bars: Show all chapter bars at once from the start
         hide_completed_bars: Hide completed chapter bars after completion
+        manifest: Book completion manifest passed through to the download function
+        completed_indices: Chapters already finished on a previous run
+        options: Per-run engine options passed through to the download function
+        scheduler: Shared segment scheduler passed through to the download function
+        book_plan: Playlists fetched up front; shown in the header and passed
+            to the download function per chapter
+        clock: Run timer for the time-to-first-chapter report
+        should_abort: Stops starting chapters and segments once it returns True
     """
     global _shutdown_requested
 
     console = Console()
     total_chapters = len(chapters)
-    chapter_progresses = [
-        0
-    ] * total_chapters  # Track progress (0-100%) for each chapter
-    downloaded_count = 0  # Count of fully completed chapters
-    active_tasks = {}  # chapter_index -> task_id for dynamic bars
-    start_times: list[Optional[float]] = [
-        None
-    ] * total_chapters  # Track when each chapter starts
-
-    # Create single progress display for all items
-    progress = utils.create_progress_display()
-
-    # Add overall progress bar
-    overall_task_id = progress.add_task(
-        "", total=100, emoji="⬇️", name="Overall", start_time=console.get_time()
-    )
-
-    # Add all chapters initially only if show_all_chapter_bars is True
-    if show_all_chapter_bars:
-        for i, chapter in enumerate(chapters):
-            chapter_num = str(i + 1).zfill(2)
-            task_id = progress.add_task(
-                "",
-                total=None,  # Indeterminate progress bar for unstarted tasks
-                emoji="🔄️",
-                name=f"Chapter {chapter_num}",
-                start_time=None,  # No time initially
-            )
-            active_tasks[i] = task_id
-    else:
-        # When show_all_chapter_bars is False, chapters will be added dynamically
-        # only when they start downloading
-        pass
-
-    def update_progress(chapter_index, progress_pct, completed=False):
-        nonlocal downloaded_count
-
-        # Store old progress to detect completion transition
-        old_progress = chapter_progresses[chapter_index]
-
-        # Create chapter bar dynamically when show_all_chapter_bars is False
-        if (
-            not show_all_chapter_bars
-            and chapter_index not in active_tasks
-            and progress_pct > 0
-        ):
-            chapter_num = str(chapter_index + 1).zfill(2)
-            task_id = progress.add_task(
-                "",
-                total=100,
-                emoji="🔄️",
-                name=f"Chapter {chapter_num}",
-                start_time=None,  # Will be set below
-            )
-            active_tasks[chapter_index] = task_id
-
-        # Update individual chapter progress
-        chapter_progresses[chapter_index] = progress_pct
-
-        # Only update task if it exists (it might not exist if show_all_chapter_bars=False and chapter hasn't started)
-        if chapter_index in active_tasks:
-            # Mark chapter as started when progress > 0
-            if progress_pct > 0 and start_times[chapter_index] is None:
-                start_times[chapter_index] = console.get_time()
-                # Switch from indeterminate to determinate bar when download starts
-                progress.update(
-                    active_tasks[chapter_index],
-                    total=100,  # Switch to determinate progress bar
-                    start_time=start_times[chapter_index],
-                )
 
-            # Mark chapter as completed when finished
-            if progress_pct >= 100 and start_times[chapter_index] is not None:
-                # Set completion time to freeze the timer
-                completion_time = console.get_time()
-                progress.update(
-                    active_tasks[chapter_index], completion_time=completion_time
-                )
-                # Only increment once per chapter when it first reaches 100%
-                if old_progress < 100:
-                    downloaded_count += 1
-
-            # Update individual chapter bar
-            progress.update(active_tasks[chapter_index], completed=progress_pct)
-
-            # Calculate overall progress
-            overall_pct = sum(chapter_progresses) / total_chapters
-            progress.update(overall_task_id, completed=overall_pct)
-
-            # Determine emoji based on state
-            if completed or progress_pct >= 100:
-                emoji = "✅"  # Completed
-                # Hide completed chapter bar if hide_completed_bars is True
-                if hide_completed_bars:
-                    progress.remove_task(active_tasks[chapter_index])
-                    del active_tasks[chapter_index]
-                    return  # Exit early since we removed the task
-            elif progress_pct > 0:
-                emoji = "⬇️"  # Downloading
-            else:
-                emoji = "🔄️"  # Pending
-
-            # Update chapter emoji (only if task still exists)
-            if chapter_index in active_tasks:
-                progress.update(active_tasks[chapter_index], emoji=emoji)
+    limiter = get_bandwidth_limiter()
+    book_plan = book_plan or BookPlan()
+    run_options = options or DownloadOptions()
+    clock = clock or _RunClock()
+
+    # Workers only queue events; the view's UI thread applies and draws them
+    view = ChapterProgressView(
+        total_chapters,
+        completed_indices,
+        show_all_chapter_bars,
+        hide_completed_bars,
+        book_plan,
+    )
 
     def create_display():
         header_lines = [
@@ -753,44 +1722,69 @@ def _download_chapters_with_progress(
             f"👨 Author: {author}",
             f"📂 Location: {download_folder}",
             f"📃 Chapters: {total_chapters}",
-            f"✅ Downloaded: {downloaded_count}",
-            "",
+            f"✅ Downloaded: {view.downloaded_count}",
         ]
+        if book_plan.chapters:
+            header_lines.insert(
+                4,
+                f"🎧 To download: {utils.format_elapsed_time(book_plan.total_duration)}"
+                f" of audio in {book_plan.total_segments} segments",
+            )
 
-        display_elements = [Text("\n".join(header_lines), style="bold"), progress]
+        display_elements = [Text("\n".join(header_lines), style="bold")]
+        if limiter is not None:
+            display_elements.append(utils.BandwidthStatus(limiter))
+        display_elements += [Text(""), view.renderable()]
 
         return Group(*display_elements)
 
-    with Live(create_display(), console=console) as live:
+    with Live(create_display(), console=console, auto_refresh=False) as live:
 
         def download_with_progress(chapter_data):
             index, chapter = chapter_data
-            result = download_hls_chapter_func(
+            return download_hls_chapter_func(
                 chapter,
                 headers,
                 download_folder,
                 index,
                 book_title,
-                lambda ch_idx, pct, comp: update_progress(ch_idx, pct, comp),
+                view.report,
                 max_concurrent_segments,
+                manifest=manifest,
+                options=options,
+                defer_conversion=True,
+                scheduler=scheduler,
+                chapter_plan=book_plan.get(index),
+                meter=view.meter(index),
+                should_abort=should_abort,
             )
-            chapter_name, success = result
 
-            if not success and index in active_tasks:
-                progress.update(active_tasks[index], emoji="❌")
+        def chapter_finished(index, future):
+            # Runs once the chapter is converted (or failed in either stage)
+            if future.cancelled() or future.exception() is not None:
+                view.finished(index, False)
+            else:
+                view.finished(index, future.result()[1])
 
-            live.update(create_display())
-            return result
+        # Open chapters share the scheduler's segment slots while finished
+        # ones are converted on a separate transcode pool
+        view.start(live, create_display)
+        try:
+            with _create_chapter_pipeline(options, should_abort) as pool:
 
-        # Concurrency - up to 2 chapters at a time
-        from concurrent.futures import ThreadPoolExecutor
+                def start(index):
+                    future = pool.submit(
+                        download_with_progress, (index, chapters[index])
+                    )
+                    future.add_done_callback(partial(chapter_finished, index))
+                    return future
 
-        try:
-            with ThreadPoolExecutor(max_workers=2) as pool:
-                futures = [
-                    pool.submit(download_with_progress, (index, chapter))
-                    for index, chapter in enumerate(chapters)
-                ]
+                order = _chapter_start_order(
+                    total_chapters, completed_indices, book_plan, run_options
+                )
+                futures = _start_chapters(
+                    order, start, run_options.listen_first, clock, should_abort
+                )
                 for future in futures:
                     future.result()
         except KeyboardInterrupt:
@@ -798,18 +1792,28 @@ def _download_chapters_with_progress(
             logging.warning("Download cancelled by user")
 
             # Smart emoji assignment based on progress state
-            for chapter_index, task_id in active_tasks.items():
-                progress_pct = chapter_progresses[chapter_index]
-                if progress_pct >= 100:
-                    progress.update(task_id, emoji="✅")  # Already complete
-                elif progress_pct > 0:
-                    progress.update(task_id, emoji="⚠️")  # Was downloading
-                else:
-                    progress.update(task_id, emoji="❗")  # Never started
-
-            return  # Exit early
-
-    if downloaded_count >= total_chapters:
+            view.stop()
+            view.mark_interrupted()
+            return False  # Exit early
+        finally:
+            view.stop()
+            live.update(create_display(), refresh=True)
+
+    retry_stats = run_options.retry_stats
+    if retry_stats.retries or retry_stats.give_ups:
+        console.print(f"\n[yellow]↻ HTTP retries: {retry_stats.summary()}[/yellow]")
+    if clock.first_chapter is not None:
+        console.print(
+            f"\n[cyan]🎧 First chapter playable after {clock.first_chapter:.1f}s[/cyan]"
+        )
+
+    if view.downloaded_count >= total_chapters:
         console.print("\n[green]✨ Download Complete![/green]")
         if interactive:
             input()
+
+    return (
+        not _shutdown_requested
+        and len(futures) == len(order)
+        and all(future.result()[1] for future in futures)
+    )
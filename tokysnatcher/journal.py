@@ -0,0 +1,166 @@
+"""Per-chapter segment journal used to resume interrupted downloads."""
+
+from pathlib import Path
+from typing import Optional, TextIO
+from urllib.parse import urlsplit
+import hashlib
+import json
+import logging
+import os
+
+
+JOURNAL_VERSION = 1
+JOURNAL_SUFFIX = ".journal"
+
+# Read size used when re-hashing segments already on disk
+_VERIFY_READ_SIZE = 1024 * 1024
+
+
+def journal_path_for(ts_filename: Path) -> Path:
+    """Return the sidecar journal path for a chapter's .ts file."""
+    return ts_filename.with_name(ts_filename.name + JOURNAL_SUFFIX)
+
+
+def playlist_fingerprint(segments: list[str]) -> str:
+    """Fingerprint a playlist by its segment paths (query strings ignored)."""
+    digest = hashlib.sha256()
+    for url in segments:
+        digest.update(urlsplit(url).path.encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class SegmentJournal:
+    """Append-only JSON-lines record of the segments written to a .ts file.
+
+    The first line identifies the playlist; every following line records one
+    segment's index, byte offset, length and SHA-256. Entries are appended only
+    after the segment bytes have been flushed to the .ts file, so the journal
+    never claims data that is not on disk.
+    """
+
+    def __init__(self, path: Path, fingerprint: str, total_segments: int):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.total_segments = total_segments
+        self.offset = 0
+        self._file: Optional[TextIO] = None
+
+    def _header(self) -> dict:
+        return {
+            "version": JOURNAL_VERSION,
+            "playlist": self.fingerprint,
+            "segments": self.total_segments,
+        }
+
+    def _load_entries(self) -> list[dict]:
+        """Read contiguous entries from disk, or [] if the journal does not match."""
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except (OSError, UnicodeDecodeError):
+            return []
+
+        entries: list[dict] = []
+        for number, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break  # Torn final line from a crash mid-append
+            if number == 0:
+                if record != self._header():
+                    logging.info(f"Journal {self.path.name} is for another playlist")
+                    return []
+                continue
+            expected_offset = (
+                entries[-1]["offset"] + entries[-1]["length"] if entries else 0
+            )
+            if (
+                record.get("index") != len(entries)
+                or record.get("offset") != expected_offset
+            ):
+                break
+            entries.append(record)
+        return entries
+
+    def _verify_on_disk(self, ts_filename: Path, entries: list[dict]) -> list[dict]:
+        """Return the prefix of entries whose bytes in ts_filename still match."""
+        verified: list[dict] = []
+        try:
+            with ts_filename.open("rb") as f:
+                for entry in entries:
+                    digest = hashlib.sha256()
+                    remaining = entry["length"]
+                    f.seek(entry["offset"])
+                    while remaining > 0:
+                        block = f.read(min(remaining, _VERIFY_READ_SIZE))
+                        if not block:
+                            break
+                        digest.update(block)
+                        remaining -= len(block)
+                    if remaining or digest.hexdigest() != entry["sha256"]:
+                        break
+                    verified.append(entry)
+        except OSError:
+            return []
+        return verified
+
+    def prepare_resume(self, ts_filename: Path) -> int:
+        """Validate the journal against ts_filename and open it for appending.
+
+        The .ts file is truncated to the last verified segment (or removed if
+        nothing can be reused) and the journal is rewritten to match.
+
+        Returns:
+            int: Number of leading segments already on disk
+        """
+        entries = []
+        if self.path.exists() and ts_filename.exists():
+            entries = self._verify_on_disk(ts_filename, self._load_entries())
+
+        if entries:
+            self.offset = entries[-1]["offset"] + entries[-1]["length"]
+            with ts_filename.open("r+b") as f:
+                f.truncate(self.offset)
+        else:
+            self.offset = 0
+            if ts_filename.exists():
+                ts_filename.unlink()
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            for record in [self._header(), *entries]:
+                f.write(json.dumps(record) + "\n")
+        os.replace(tmp_path, self.path)
+
+        self._file = self.path.open("a", encoding="utf-8")
+        return len(entries)
+
+    def record(self, index: int, length: int, sha256: str) -> None:
+        """Append a segment entry; its bytes must already be flushed to disk."""
+        if self._file is None:
+            raise RuntimeError("Journal is not open; call prepare_resume() first")
+        entry = {
+            "index": index,
+            "offset": self.offset,
+            "length": length,
+            "sha256": sha256,
+        }
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        self.offset += length
+
+    def record_segment(self, index: int, data) -> None:
+        """Append an entry for a segment payload that was just written."""
+        self.record(index, len(data), hashlib.sha256(data).hexdigest())
+
+    def close(self) -> None:
+        """Close the journal file, keeping it on disk for a later resume."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self) -> None:
+        """Close and delete the journal once the chapter no longer needs it."""
+        self.close()
+        if self.path.exists():
+            self.path.unlink()
@@ -0,0 +1,145 @@
+"""Completion manifest recording which chapters of a book are finished."""
+
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from .transcode import output_extensions
+
+
+MANIFEST_FILENAME = ".tokysnatcher-manifest.json"
+MANIFEST_VERSION = 2
+
+_HASH_READ_SIZE = 1024 * 1024
+
+
+@dataclass
+class ChapterRecord:
+    """A finished chapter and the facts needed to verify it later."""
+
+    index: int
+    name: str
+    source_url: str
+    filename: str
+    output_format: str
+    extension: str
+    size: int
+    mtime_ns: int
+    duration: Optional[float]
+    sha256: str
+
+
+def file_sha256(path: Path) -> str:
+    """Hash a file in blocks."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(_HASH_READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CompletionManifest:
+    """Thread-safe manifest stored in the book's download directory.
+
+    A chapter counts as complete when it was written in the requested output
+    format and its output file still has the recorded size and modification
+    time; if only the mtime changed, the checksum is recomputed before
+    trusting it. Entries for a different source URL or output format, or a
+    missing/corrupt file, are dropped so the chapter is downloaded again.
+    """
+
+    def __init__(self, download_folder: Path):
+        self.path = download_folder.joinpath(MANIFEST_FILENAME)
+        self._folder = download_folder
+        self._chapters: dict[int, ChapterRecord] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, download_folder: Path) -> "CompletionManifest":
+        """Load the manifest for a book, starting empty if none is readable."""
+        manifest = cls(download_folder)
+        if not manifest.path.exists():
+            return manifest
+        try:
+            data = json.loads(manifest.path.read_text(encoding="utf-8"))
+            if data.get("version") != MANIFEST_VERSION:
+                return manifest
+            for entry in data.get("chapters", []):
+                record = ChapterRecord(**entry)
+                manifest._chapters[record.index] = record
+        except (OSError, ValueError, TypeError) as e:
+            logging.warning(f"Ignoring unreadable manifest {manifest.path}: {e}")
+        return manifest
+
+    def _save(self) -> None:
+        data = {
+            "version": MANIFEST_VERSION,
+            "chapters": [asdict(r) for _, r in sorted(self._chapters.items())],
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def is_complete(self, index: int, source_url: str, output_format: str) -> bool:
+        """Check whether a chapter is finished in output_format and intact."""
+        with self._lock:
+            record = self._chapters.get(index)
+            if record is None:
+                return False
+
+            output = self._folder.joinpath(record.filename)
+            valid = (
+                record.source_url == source_url
+                and record.output_format == output_format
+                and record.extension in output_extensions(output_format)
+                and output.suffix == record.extension
+                and output.exists()
+            )
+            if valid:
+                stat = output.stat()
+                valid = stat.st_size == record.size
+                if valid and stat.st_mtime_ns != record.mtime_ns:
+                    # Touched but same size: fall back to the checksum
+                    valid = file_sha256(output) == record.sha256
+                    if valid:
+                        record.mtime_ns = stat.st_mtime_ns
+                        self._save()
+
+            if not valid:
+                logging.info(
+                    f"Chapter {index + 1} changed, is missing or has another format, re-queuing"
+                )
+                del self._chapters[index]
+                self._save()
+            return valid
+
+    def record(
+        self,
+        index: int,
+        item: dict,
+        output_path: Path,
+        output_format: str,
+        duration: Optional[float] = None,
+    ) -> None:
+        """Record a successfully finished chapter."""
+        stat = output_path.stat()
+        record = ChapterRecord(
+            index=index,
+            name=item["name"],
+            source_url=item["url"],
+            filename=output_path.name,
+            output_format=output_format,
+            extension=output_path.suffix,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            duration=duration,
+            sha256=file_sha256(output_path),
+        )
+        with self._lock:
+            self._chapters[index] = record
+            self._save()
@@ -0,0 +1,118 @@
+"""Two-stage chapter pipeline: network downloads feed a separate transcode pool."""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Optional, Union
+import logging
+import os
+import threading
+
+
+ChapterResult = tuple[str, bool]
+
+# How often a network worker waiting for a transcode slot checks for shutdown
+_SLOT_POLL_INTERVAL = 0.2
+
+
+@dataclass
+class PendingConversion:
+    """A downloaded chapter source waiting for the transcode stage."""
+
+    chapter_name: str
+    convert: Callable[[], ChapterResult]
+
+
+ChapterOutcome = Union[ChapterResult, PendingConversion]
+
+
+def default_transcode_workers() -> int:
+    """Number of concurrent ffmpeg conversions when none is configured."""
+    return os.cpu_count() or 1
+
+
+class ChapterPipeline:
+    """Runs chapter downloads and their conversions on independent pools.
+
+    A network worker runs the download function; when it returns a
+    PendingConversion instead of a final result, the conversion is queued on
+    the transcode pool and the network worker moves on to the next chapter.
+    At most max_pending conversions may be queued or running at once; network
+    workers wait for a free slot beyond that, which bounds how many finished
+    sources sit on disk waiting for ffmpeg.
+
+    Futures returned by submit() resolve to the final (chapter_name, success)
+    once the chapter is fully converted.
+    """
+
+    def __init__(
+        self,
+        network_workers: int,
+        transcode_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        should_abort: Optional[Callable[[], bool]] = None,
+    ):
+        transcode_workers = transcode_workers or default_transcode_workers()
+        self.max_pending = max_pending or transcode_workers + network_workers
+        self._network = ThreadPoolExecutor(
+            max_workers=network_workers, thread_name_prefix="chapter-download"
+        )
+        self._transcode = ThreadPoolExecutor(
+            max_workers=transcode_workers, thread_name_prefix="chapter-transcode"
+        )
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._should_abort = should_abort or (lambda: False)
+
+    def __enter__(self) -> "ChapterPipeline":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+    def submit(self, fn: Callable[..., ChapterOutcome], *args: Any, **kwargs: Any):
+        """Schedule fn on the network stage; returns a Future of its ChapterResult."""
+        result: Future = Future()
+        self._network.submit(self._run_network_stage, result, fn, args, kwargs)
+        return result
+
+    def shutdown(self) -> None:
+        """Wait for both stages to drain, network first."""
+        self._network.shutdown(wait=True)
+        self._transcode.shutdown(wait=True)
+
+    def _acquire_slot(self) -> bool:
+        while not self._slots.acquire(timeout=_SLOT_POLL_INTERVAL):
+            if self._should_abort():
+                return False
+        return True
+
+    def _run_network_stage(self, result: Future, fn, args, kwargs) -> None:
+        if not result.set_running_or_notify_cancel():
+            return
+        try:
+            outcome = fn(*args, **kwargs)
+            if not isinstance(outcome, PendingConversion):
+                result.set_result(outcome)
+                return
+            if not self._acquire_slot():
+                # Shutting down: the source stays on disk for a later resume
+                result.set_result((outcome.chapter_name, False))
+                return
+            logging.debug(f"Queued {outcome.chapter_name} for conversion")
+            conversion = self._transcode.submit(self._run_transcode_stage, outcome)
+            conversion.add_done_callback(partial(self._finish, result))
+        except BaseException as e:
+            result.set_exception(e)
+
+    def _run_transcode_stage(self, pending: PendingConversion) -> ChapterResult:
+        if self._should_abort():
+            return pending.chapter_name, False
+        return pending.convert()
+
+    def _finish(self, result: Future, conversion: Future) -> None:
+        self._slots.release()
+        error = conversion.exception()
+        if error is not None:
+            result.set_exception(error)
+        else:
+            result.set_result(conversion.result())
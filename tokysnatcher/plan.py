@@ -0,0 +1,122 @@
+"""Book download plan: every chapter's segments and durations, known up front."""
+
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+
+@dataclass
+class ChapterPlan:
+    """One chapter's parsed HLS playlist.
+
+    Attributes:
+        index: Zero-based chapter index in the book
+        segments: Absolute segment URLs in playlist order
+        durations: EXTINF duration of each segment in seconds (0.0 if absent)
+        fetch_seconds: Time the playlist request took, including retries
+    """
+
+    index: int
+    segments: list[str]
+    durations: list[float] = field(default_factory=list)
+    fetch_seconds: float = 0.0
+
+    @property
+    def duration(self) -> float:
+        """Playing time of the chapter in seconds."""
+        return sum(self.durations)
+
+
+@dataclass
+class BookPlan:
+    """Chapter plans of a book, keyed by chapter index.
+
+    Chapters whose playlist could not be fetched while planning are missing;
+    their download worker fetches the playlist itself as before.
+    """
+
+    chapters: dict[int, ChapterPlan] = field(default_factory=dict)
+
+    def get(self, index: int) -> Optional[ChapterPlan]:
+        return self.chapters.get(index)
+
+    @property
+    def total_segments(self) -> int:
+        return sum(len(plan.segments) for plan in self.chapters.values())
+
+    @property
+    def total_duration(self) -> float:
+        return sum(plan.duration for plan in self.chapters.values())
+
+
+def parse_playlist_text(
+    playlist_text: str, playlist_url: str
+) -> tuple[list[str], list[float]]:
+    """Return (segment URLs, EXTINF durations) of an HLS media playlist.
+
+    Relative segment URIs are resolved against the playlist's directory.
+    """
+    base_url = playlist_url.rsplit("/", 1)[0] + "/"
+    segments: list[str] = []
+    durations: list[float] = []
+    duration = 0.0
+    for line in playlist_text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("#EXTINF:"):
+            try:
+                duration = float(line[len("#EXTINF:") :].split(",", 1)[0])
+            except ValueError:
+                duration = 0.0
+        elif not line.startswith("#"):
+            segments.append(line if line.startswith("http") else base_url + line)
+            durations.append(duration)
+            duration = 0.0
+    return segments, durations
+
+
+def _chapter_weight(plan: Optional[ChapterPlan]) -> tuple[float, int]:
+    """Sort key for the size of a chapter; unplanned chapters count as smallest."""
+    if plan is None:
+        return -1.0, -1
+    return plan.duration, len(plan.segments)
+
+
+def _index_order(indices: list[int], plan: BookPlan) -> list[int]:
+    return sorted(indices)
+
+
+def _longest_first_order(indices: list[int], plan: BookPlan) -> list[int]:
+    # LPT: the long chapters start first, so the tail of the run is made of
+    # short chapters instead of one long chapter running alone
+    def key(index: int) -> tuple[float, int, int]:
+        duration, segments = _chapter_weight(plan.get(index))
+        return -duration, -segments, index
+
+    return sorted(indices, key=key)
+
+
+# Chapter scheduling policies: name -> function ordering the pending indices
+CHAPTER_ORDERS: dict[str, Callable[[list[int], BookPlan], list[int]]] = {
+    "index": _index_order,
+    "longest": _longest_first_order,
+}
+
+
+def order_chapters(
+    indices: list[int], plan: BookPlan, policy: str = "index"
+) -> list[int]:
+    """Return the order in which the pending chapters should be started.
+
+    Only the start order changes; chapters keep their index for numbering.
+
+    Raises:
+        ValueError: If policy is not one of CHAPTER_ORDERS
+    """
+    try:
+        order = CHAPTER_ORDERS[policy]
+    except KeyError:
+        raise ValueError(
+            f"Unknown chapter order {policy!r}; expected one of {', '.join(CHAPTER_ORDERS)}"
+        ) from None
+    return order(list(indices), plan)
@@ -0,0 +1,306 @@
+"""Chapter progress display fed by an event queue and drawn by one UI thread."""
+
+from queue import Empty, SimpleQueue
+from typing import Callable, Iterable, Optional
+import threading
+
+from rich.console import Console, Group, RenderableType
+from rich.live import Live
+from rich.progress import TaskID
+from rich.text import Text
+
+from . import utils
+from .plan import BookPlan
+from .throughput import BookMeter, ChapterMeter
+
+
+# Frames drawn per second while a book downloads
+REFRESH_PER_SECOND = 8
+
+# Longer books only get bars for chapters in flight, plus a range summary
+MAX_CHAPTER_BARS = 30
+
+# Ranges listed per state in the summary before the rest is counted
+MAX_SUMMARY_RANGES = 6
+
+
+def format_chapter_ranges(
+    numbers: Iterable[int], limit: int = MAX_SUMMARY_RANGES
+) -> str:
+    """Format chapter numbers as ranges, e.g. [1, 2, 3, 7] -> "1–3, 7"."""
+    ranges: list[list[int]] = []
+    for number in sorted(numbers):
+        if ranges and number == ranges[-1][1] + 1:
+            ranges[-1][1] = number
+        else:
+            ranges.append([number, number])
+    parts = [f"{a}–{b}" if a != b else str(a) for a, b in ranges[:limit]]
+    if len(ranges) > limit:
+        parts.append(f"+{len(ranges) - limit} more")
+    return ", ".join(parts)
+
+
+class ChapterProgressView:
+    """Overall and per-chapter bars of one book.
+
+    Download and transcode threads only call report() and finished(), which
+    put a tuple on a SimpleQueue and return; they never touch Rich. A single
+    UI thread (start()) drains the queue REFRESH_PER_SECOND times a second,
+    keeps only the latest update per chapter, applies it to the bars and
+    redraws once. The overall percentage is kept as a running sum, so a frame
+    costs the same whether the book has 5 chapters or 500 and whether a tick
+    saw one segment update or thousands.
+
+    Books with more than MAX_CHAPTER_BARS chapters are windowed: only
+    chapters being downloaded have a bar, and finished, failed and pending
+    chapters are folded into one summary line of ranges that is rebuilt only
+    when a chapter changes state.
+
+    Transfer rates and ETAs come from byte meters (see throughput) that the
+    segment readers count into; the UI thread samples the book's meter and
+    those of chapters in flight once per frame.
+    """
+
+    def __init__(
+        self,
+        total_chapters: int,
+        completed_indices: frozenset[int] = frozenset(),
+        show_all_chapter_bars: bool = False,
+        hide_completed_bars: bool = False,
+        book_plan: Optional[BookPlan] = None,
+    ):
+        self.progress = utils.create_progress_display()
+        self.total_chapters = total_chapters
+        self.downloaded_count = len(completed_indices)
+        self.windowed = total_chapters > MAX_CHAPTER_BARS
+        # One bar per chapter from the start, or bars added as chapters start
+        self.show_all_chapter_bars = show_all_chapter_bars and not self.windowed
+        self.hide_completed_bars = hide_completed_bars or self.windowed
+
+        self._console = Console()
+        self._percent = [
+            100 if i in completed_indices else 0 for i in range(total_chapters)
+        ]
+        self._percent_total = sum(self._percent)
+        self._tasks: dict[int, TaskID] = {}  # chapter_index -> task_id
+        self._start_times: list[Optional[float]] = [None] * total_chapters
+        self._failed: set[int] = set()
+        self._summary: Optional[Text] = None  # Rebuilt on the next frame if None
+        self._events: SimpleQueue = SimpleQueue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Meters exist before workers start, so meter() is a plain lookup
+        book_plan = book_plan or BookPlan()
+        planned: dict[int, int] = {}  # chapter_index -> planned segment count
+        for i in range(total_chapters):
+            if i not in completed_indices:
+                chapter_plan = book_plan.get(i)
+                planned[i] = len(chapter_plan.segments) if chapter_plan else 0
+        self.book_meter = BookMeter(sum(planned.values()))
+        self._meters = {i: self.book_meter.chapter(n) for i, n in planned.items()}
+
+        self._overall = self.progress.add_task(
+            "",
+            total=100,
+            completed=self._percent_total / max(1, total_chapters),
+            emoji="⬇️",
+            name="Overall",
+            start_time=self._console.get_time(),
+            meter=self.book_meter,
+        )
+
+        # Add all chapters initially only if show_all_chapter_bars is True;
+        # otherwise bars are added when their chapter starts downloading
+        if self.show_all_chapter_bars:
+            for i in range(total_chapters):
+                chapter_num = str(i + 1).zfill(2)
+                if i in completed_indices:
+                    self._tasks[i] = self.progress.add_task(
+                        "",
+                        total=100,
+                        completed=100,
+                        emoji="✅",
+                        name=f"Chapter {chapter_num}",
+                        start_time=None,  # Finished on a previous run
+                    )
+                else:
+                    self._tasks[i] = self.progress.add_task(
+                        "",
+                        total=None,  # Indeterminate progress bar for unstarted tasks
+                        emoji="🔄️",
+                        name=f"Chapter {chapter_num}",
+                        start_time=None,  # No time initially
+                        meter=self._meters[i],
+                    )
+
+    def renderable(self) -> RenderableType:
+        """The bars, preceded by the range summary in windowed mode."""
+        if not self.windowed:
+            return self.progress
+        if self._summary is None:
+            self._summary = self._build_summary()
+        return Group(self._summary, self.progress)
+
+    def _build_summary(self) -> Text:
+        done, pending = [], []
+        for index, percent in enumerate(self._percent):
+            if index in self._failed or index in self._tasks:
+                continue
+            (done if percent >= 100 else pending).append(index + 1)
+        parts = []
+        for emoji, numbers in (
+            ("✅", done),
+            ("❌", [index + 1 for index in self._failed]),
+            ("🔄️", pending),
+        ):
+            if numbers:
+                parts.append(f"{emoji} {format_chapter_ranges(numbers)}")
+        return Text("  ".join(parts))
+
+    def meter(self, chapter_index: int) -> Optional[ChapterMeter]:
+        """The byte meter a chapter's segment reads count into."""
+        return self._meters.get(chapter_index)
+
+    def report(self, chapter_index: int, percent: int, completed: bool = False) -> None:
+        """Queue a progress update; safe from any thread, never blocks."""
+        self._events.put((chapter_index, percent, completed, None))
+
+    def finished(self, chapter_index: int, success: bool) -> None:
+        """Queue a chapter's final outcome (after conversion)."""
+        self._events.put((chapter_index, None, False, success))
+
+    def start(self, live: Live, render: Callable[[], RenderableType]) -> None:
+        """Start the UI thread drawing render() into live at a fixed rate."""
+
+        def run() -> None:
+            while not self._stop.wait(1 / REFRESH_PER_SECOND):
+                self.flush()
+                self._sample()
+                live.update(render(), refresh=True)
+
+        self._thread = threading.Thread(target=run, name="progress-ui", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the UI thread and apply the events still queued."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> None:
+        """Apply queued events, coalesced to the latest one per chapter."""
+        latest: dict[int, tuple[int, bool]] = {}
+        outcomes: dict[int, bool] = {}
+        while True:
+            try:
+                index, percent, completed, success = self._events.get_nowait()
+            except Empty:
+                break
+            if success is not None:
+                outcomes[index] = success
+            else:
+                completed = completed or latest.get(index, (0, False))[1]
+                latest[index] = (percent, completed)
+        if not latest and not outcomes:
+            return
+
+        for index, (percent, completed) in latest.items():
+            self._apply(index, percent, completed)
+        for index, success in outcomes.items():
+            if success:
+                # Counted once converted, not when the download reaches 100%
+                self.downloaded_count += 1
+                continue
+            if self.windowed:
+                self._failed.add(index)
+                self._summary = None
+                if index in self._tasks:
+                    self.progress.remove_task(self._tasks.pop(index))
+            elif index in self._tasks:
+                self.progress.update(self._tasks[index], emoji="❌")
+        self.progress.update(
+            self._overall,
+            completed=self._percent_total / max(1, self.total_chapters),
+        )
+
+    def _sample(self) -> None:
+        # Finished chapters are not sampled, so their rates stay as they ended
+        self.book_meter.sample()
+        for index in self._tasks:
+            meter = self._meters.get(index)
+            if meter is not None and self._percent[index] < 100:
+                meter.sample()
+
+    def mark_interrupted(self) -> None:
+        """Flag unfinished chapters after Ctrl+C (call once stopped)."""
+        for chapter_index, task_id in self._tasks.items():
+            percent = self._percent[chapter_index]
+            if percent >= 100:
+                self.progress.update(task_id, emoji="✅")  # Already complete
+            elif percent > 0:
+                self.progress.update(task_id, emoji="⚠️")  # Was downloading
+            else:
+                self.progress.update(task_id, emoji="❗")  # Never started
+
+    def _apply(self, chapter_index: int, percent: int, completed: bool) -> None:
+        old_percent = self._percent[chapter_index]
+
+        # Create chapter bar dynamically when show_all_chapter_bars is False
+        if (
+            not self.show_all_chapter_bars
+            and chapter_index not in self._tasks
+            and percent > 0
+        ):
+            chapter_num = str(chapter_index + 1).zfill(2)
+            self._tasks[chapter_index] = self.progress.add_task(
+                "",
+                total=100,
+                emoji="🔄️",
+                name=f"Chapter {chapter_num}",
+                start_time=None,  # Will be set below
+                meter=self._meters.get(chapter_index),
+            )
+            self._summary = None
+
+        self._percent[chapter_index] = percent
+        self._percent_total += percent - old_percent
+        if percent >= 100 and old_percent < 100:
+            meter = self._meters.get(chapter_index)
+            if meter is not None:
+                meter.sample()  # Final rates, kept once the chapter is done
+
+        task_id = self._tasks.get(chapter_index)
+        if task_id is None:
+            return
+
+        # Mark chapter as started when progress > 0
+        if percent > 0 and self._start_times[chapter_index] is None:
+            self._start_times[chapter_index] = self._console.get_time()
+            # Switch from indeterminate to determinate bar when download starts
+            self.progress.update(
+                task_id, total=100, start_time=self._start_times[chapter_index]
+            )
+
+        if (
+            percent >= 100
+            and old_percent < 100
+            and self._start_times[chapter_index] is not None
+        ):
+            # Set completion time to freeze the timer
+            self.progress.update(task_id, completion_time=self._console.get_time())
+
+        if completed or percent >= 100:
+            emoji = "✅"  # Completed
+            if self.hide_completed_bars:
+                self.progress.remove_task(task_id)
+                del self._tasks[chapter_index]
+                self._summary = None
+                return
+        elif percent > 0:
+            emoji = "⬇️"  # Downloading
+        else:
+            emoji = "🔄️"  # Pending
+        self.progress.update(task_id, completed=percent, emoji=emoji)
@@ -0,0 +1,221 @@
+"""Process-wide token bucket that caps download bandwidth."""
+
+from collections import OrderedDict, deque
+from typing import Callable, Hashable, Optional
+import asyncio
+import logging
+import re
+import threading
+import time
+
+from .buffers import DEFAULT_READ_SIZE
+
+
+# Burst allowance when none is given: this many seconds at the full rate
+DEFAULT_BURST_SECONDS = 1.0
+
+# Smallest burst; a bucket smaller than one socket read only adds wake-ups
+MIN_BURST = DEFAULT_READ_SIZE
+
+# Window over which the effective rate is measured (seconds)
+_RATE_WINDOW = 1.0
+
+# How often a waiter re-checks for shutdown (seconds)
+_WAIT_INTERVAL = 0.1
+
+_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3}
+
+
+def parse_rate(value: str) -> int:
+    """Parse a byte count such as 500000, 500k, 1.5M or 2MiB (binary units)."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmg]?)(?:i?b)?\s*", value.lower())
+    if match is None:
+        raise ValueError(f"Invalid byte count: {value!r}")
+    amount = int(float(match.group(1)) * _UNITS[match.group(2)])
+    if amount <= 0:
+        raise ValueError(f"Byte count must be positive: {value!r}")
+    return amount
+
+
+class _Waiter:
+    """One pending acquire: how many bytes, for whom, and how to wake it."""
+
+    __slots__ = ("key", "nbytes", "wake")
+
+    def __init__(self, key: Hashable, nbytes: int, wake: Optional[Callable[[], None]]):
+        self.key = key
+        self.nbytes = nbytes
+        self.wake = wake
+
+
+class TokenBucket:
+    """Token bucket shared by every download thread (and the asyncio engine).
+
+    Tokens are bytes. The bucket refills at rate bytes/sec up to burst, and
+    every chunk read from a socket takes its size in tokens. Waiters are
+    grouped by key (the chapter index) and served round-robin between keys, so
+    concurrently downloading chapters get an equal share of the bandwidth no
+    matter how many segment slots each one holds. A chunk larger than the
+    burst is let through once the bucket is full and leaves it in debt.
+    """
+
+    def __init__(
+        self,
+        rate: int,
+        burst: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = float(max(1, rate))
+        if burst is None:
+            burst = int(self.rate * DEFAULT_BURST_SECONDS)
+        self.burst = max(MIN_BURST, burst)
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._queues: "OrderedDict[Hashable, deque[_Waiter]]" = OrderedDict()
+        self._cond = threading.Condition()
+
+        self._granted = 0
+        self._sample_start = self._updated
+        self._sample_granted = 0
+        self._effective_rate = 0.0
+
+    def acquire(
+        self,
+        nbytes: int,
+        key: Hashable = None,
+        should_abort: Optional[Callable[[], bool]] = None,
+    ) -> bool:
+        """Block until nbytes may be transferred; False if should_abort fired."""
+        with self._cond:
+            waiter = self._enqueue(key, nbytes, None)
+            while (wait := self._try_take(waiter)) is not None:
+                if should_abort is not None and should_abort():
+                    self._remove(waiter)
+                    return False
+                self._cond.wait(min(wait, _WAIT_INTERVAL))
+            return True
+
+    async def acquire_async(self, nbytes: int, key: Hashable = None) -> None:
+        """Coroutine version of acquire; cancellation leaves the queue."""
+        loop = asyncio.get_running_loop()
+        woken = asyncio.Event()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(woken.set)
+
+        with self._cond:
+            waiter = self._enqueue(key, nbytes, wake)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_take(waiter)
+                if wait is None:
+                    return
+                woken.clear()
+                try:
+                    await asyncio.wait_for(woken.wait(), min(wait, _WAIT_INTERVAL))
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._cond:
+                if waiter in self._queues.get(key, ()):
+                    self._remove(waiter)
+            raise
+
+    def effective_rate(self) -> float:
+        """Bytes/sec granted over the last measurement window."""
+        with self._cond:
+            now = self._clock()
+            elapsed = now - self._sample_start
+            if elapsed >= _RATE_WINDOW:
+                self._effective_rate = (self._granted - self._sample_granted) / elapsed
+                self._sample_start = now
+                self._sample_granted = self._granted
+            return self._effective_rate
+
+    def _enqueue(
+        self, key: Hashable, nbytes: int, wake: Optional[Callable[[], None]]
+    ) -> _Waiter:
+        waiter = _Waiter(key, nbytes, wake)
+        self._queues.setdefault(key, deque()).append(waiter)
+        return waiter
+
+    def _remove(self, waiter: _Waiter) -> None:
+        queue = self._queues[waiter.key]
+        queue.remove(waiter)
+        if not queue:
+            del self._queues[waiter.key]
+        self._notify()
+
+    def _notify(self) -> None:
+        self._cond.notify_all()
+        # Only the head of the rotation can be served next
+        if self._queues:
+            head = next(iter(self._queues.values()))[0]
+            if head.wake is not None:
+                head.wake()
+
+    def _try_take(self, waiter: _Waiter) -> Optional[float]:
+        """Grant waiter if it is next in line; otherwise seconds to wait."""
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+        key, queue = next(iter(self._queues.items()))
+        if queue[0] is not waiter:
+            return _WAIT_INTERVAL  # Woken by _notify when its turn comes
+        needed = min(waiter.nbytes, self.burst)
+        if self._tokens < needed:
+            return (needed - self._tokens) / self.rate
+
+        self._tokens -= waiter.nbytes
+        self._granted += waiter.nbytes
+        queue.popleft()
+        # Move this chapter to the back of the rotation
+        del self._queues[key]
+        if queue:
+            self._queues[key] = queue
+        self._notify()
+        return None
+
+
+_limiter: Optional[TokenBucket] = None
+_limiter_settings: tuple[Optional[int], Optional[int]] = (None, None)
+_limiter_lock = threading.Lock()
+
+
+def get_bandwidth_limiter() -> Optional[TokenBucket]:
+    """Return the process-wide limiter, or None when bandwidth is unlimited."""
+    with _limiter_lock:
+        return _limiter
+
+
+def configure_bandwidth(
+    rate: Optional[int], burst: Optional[int] = None
+) -> Optional[TokenBucket]:
+    """Install the process-wide limiter for a run (rate None removes it).
+
+    An installed limiter with the same rate and burst is kept, so runs that
+    overlap (e.g. daemon jobs) keep sharing one bucket.
+
+    Args:
+        rate: Bytes/sec shared by all downloads, or None for no limit
+        burst: Bucket size in bytes (None = DEFAULT_BURST_SECONDS at rate)
+
+    Returns:
+        Optional[TokenBucket]: The installed limiter
+    """
+    global _limiter, _limiter_settings
+
+    with _limiter_lock:
+        if _limiter is not None and _limiter_settings == (rate, burst):
+            return _limiter
+        _limiter = TokenBucket(rate, burst) if rate else None
+        _limiter_settings = (rate, burst)
+        if _limiter is not None:
+            logging.info(
+                f"Bandwidth limited to {_limiter.rate:,.0f} bytes/s "
+                f"(burst {_limiter.burst:,} bytes)"
+            )
+        return _limiter
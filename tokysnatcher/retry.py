@@ -0,0 +1,224 @@
+"""Retry policy with exponential backoff and jitter for transient HTTP failures."""
+
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+import asyncio
+import datetime
+import logging
+import random
+import threading
+import time
+
+import requests
+
+
+T = TypeVar("T")
+
+# Statuses worth retrying: rate limiting and server-side errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Longest single wait accepted from a Retry-After header (seconds)
+MAX_RETRY_AFTER = 120.0
+
+# How often a backoff sleep checks for shutdown (seconds)
+_SLEEP_SLICE = 0.2
+
+# classify(error) -> None if the error is final, else (HTTP status or None
+# for connection-level failures, Retry-After header value or None)
+Classifier = Callable[[BaseException], Optional[tuple[Optional[int], Optional[str]]]]
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how patiently a failed request is retried.
+
+    Attributes:
+        max_retries: Retries after the first attempt (0 disables retrying)
+        base_delay: Backoff ceiling for the first retry, doubled on each retry
+        max_delay: Upper bound for the backoff ceiling
+        retry_statuses: HTTP statuses treated as transient
+    """
+
+    max_retries: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    retry_statuses: frozenset[int] = RETRY_STATUSES
+
+    def delay(self, retry: int, retry_after: Optional[str] = None) -> float:
+        """Seconds to wait before the given retry (0-based).
+
+        Uses "full jitter": a uniform pick between zero and the exponential
+        ceiling, so clients that failed together do not retry together. A
+        server-provided Retry-After is honoured as a lower bound.
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2**retry))
+        wait = random.uniform(0, ceiling)
+        requested = parse_retry_after(retry_after)
+        if requested is not None:
+            wait = max(wait, min(requested, MAX_RETRY_AFTER))
+        return wait
+
+
+@dataclass
+class RetryStats:
+    """Counts retries, requests given up on, and time spent backing off.
+
+    One instance is shared by the requests of a run (DownloadOptions
+    .retry_stats), so concurrent runs keep separate counts. Updates are
+    thread-safe.
+    """
+
+    retries: int = 0
+    give_ups: int = 0
+    wait_seconds: float = 0.0
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def record_retry(self, wait: float) -> None:
+        with self._lock:
+            self.retries += 1
+            self.wait_seconds += wait
+
+    def record_give_up(self) -> None:
+        with self._lock:
+            self.give_ups += 1
+
+    def summary(self) -> str:
+        """One-line human readable summary."""
+        return (
+            f"{self.retries} retries ({self.wait_seconds:.1f}s waiting), "
+            f"{self.give_ups} gave up"
+        )
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+def classify_requests_error(
+    error: BaseException,
+) -> Optional[tuple[Optional[int], Optional[str]]]:
+    """Classify a requests failure for the retry policy (see Classifier)."""
+    if isinstance(error, requests.HTTPError):
+        response = error.response
+        if response is None:
+            return None
+        return response.status_code, response.headers.get("Retry-After")
+    if isinstance(
+        error,
+        (
+            requests.ConnectionError,  # Includes resets and connect timeouts
+            requests.Timeout,
+            requests.exceptions.ChunkedEncodingError,  # Reset mid-body
+        ),
+    ):
+        return None, None
+    return None
+
+
+def _plan_retry(
+    policy: RetryPolicy,
+    retry: int,
+    error: BaseException,
+    classify: Classifier,
+    description: str,
+    stats: Optional[RetryStats],
+) -> Optional[float]:
+    """Return the wait before the next attempt, or None if error is final."""
+    classified = classify(error)
+    if classified is None:
+        return None
+    status, retry_after = classified
+    if status is not None and status not in policy.retry_statuses:
+        return None
+    if retry >= policy.max_retries:
+        if stats is not None:
+            stats.record_give_up()
+        logging.warning(
+            f"Giving up on {description} after {policy.max_retries + 1} attempts: {error}"
+        )
+        return None
+    wait = policy.delay(retry, retry_after)
+    if stats is not None:
+        stats.record_retry(wait)
+    logging.debug(
+        f"Retrying {description} in {wait:.2f}s "
+        f"(retry {retry + 1}/{policy.max_retries}): {error}"
+    )
+    return wait
+
+
+def retry_call(
+    fn: Callable[[], T],
+    policy: Optional[RetryPolicy],
+    description: str,
+    should_abort: Optional[Callable[[], bool]] = None,
+    classify: Classifier = classify_requests_error,
+    stats: Optional[RetryStats] = None,
+) -> T:
+    """Call fn, retrying transient failures according to policy.
+
+    Only fn is repeated, so a failed segment is retried on its own while the
+    rest of the chapter keeps downloading. If should_abort returns True while
+    backing off, the last error is raised immediately. Retries and give-ups
+    are counted in stats, if given.
+    """
+    policy = policy or RetryPolicy()
+    retry = 0
+    while True:
+        try:
+            return fn()
+        except Exception as error:
+            wait = _plan_retry(policy, retry, error, classify, description, stats)
+            if wait is None:
+                raise
+            deadline = time.monotonic() + wait
+            while (remaining := deadline - time.monotonic()) > 0:
+                if should_abort is not None and should_abort():
+                    raise
+                time.sleep(min(remaining, _SLEEP_SLICE))
+            retry += 1
+
+
+async def retry_call_async(
+    fn: Callable[[], Awaitable[T]],
+    policy: Optional[RetryPolicy],
+    description: str,
+    classify: Classifier = classify_requests_error,
+    stats: Optional[RetryStats] = None,
+) -> T:
+    """Coroutine version of retry_call; cancellation interrupts the backoff."""
+    policy = policy or RetryPolicy()
+    retry = 0
+    while True:
+        try:
+            return await fn()
+        except Exception as error:
+            wait = _plan_retry(policy, retry, error, classify, description, stats)
+            if wait is None:
+                raise
+            await asyncio.sleep(wait)
+            retry += 1
+
+
+def log_retry_stats(stats: RetryStats) -> None:
+    """Log a run's retry counters, as a warning if any request was given up on."""
+    level = logging.WARNING if stats.give_ups else logging.INFO
+    logging.log(level, f"HTTP retries: {stats.summary()}")
@@ -1,10 +1,32 @@
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+import json
+import logging
+import threading
 import questionary
 import requests
 
 from rich.console import Console
 
+from .cache import DEFAULT_CACHE_DIR, DiskCache
+from .session import BASE_URL, get_session
+
+
+# Results per search page
+PAGE_SIZE = 12
+
+# Seconds to wait on the search API before giving up
+SEARCH_TIMEOUT = 10
+
+# How long search pages are kept on disk (seconds)
+SEARCH_CACHE_TTL = 15 * 60
+
+_search_cache: Optional[DiskCache] = DiskCache(
+    DEFAULT_CACHE_DIR / "search", SEARCH_CACHE_TTL
+)
+_search_cache_lock = threading.Lock()
+
 
 @dataclass
 class SearchResult:
@@ -25,7 +47,7 @@ class SearchResultFormatter:
         book_id = (
             book.get("bookId") or book.get("dynamicSlugId") or book.get("id") or ""
         )
-        full_url = f"https://tokybook.com/post/{book_id}" if book_id else ""
+        full_url = f"{BASE_URL}/post/{book_id}" if book_id else ""
         return SearchResult(title, book_id, full_url)
 
     @staticmethod
@@ -56,28 +78,107 @@ class SearchResultFormatter:
         return titles, urls
 
 
-def fetch_results(query: str, page: int = 1) -> Dict[str, Any]:
-    """Fetch search results from the JSON API."""
-    API_URL = "https://tokybook.com/api/v1/search"
+def configure_search_cache(ttl: Optional[float]) -> Optional[DiskCache]:
+    """Set how long search pages are cached on disk (None disables the cache)."""
+    global _search_cache
 
-    offset = (page - 1) * 12
-    limit = 12
+    with _search_cache_lock:
+        if ttl is None or ttl <= 0:
+            _search_cache = None
+        else:
+            _search_cache = DiskCache(DEFAULT_CACHE_DIR / "search", ttl)
+        return _search_cache
+
+
+def _request_results(query: str, page: int) -> Dict[str, Any]:
+    """Return one search page from the cache or the API.
+
+    Raises:
+        requests.RequestException: If the API call fails (failures are not cached)
+    """
+    API_URL = f"{BASE_URL}/api/v1/search"
+
+    offset = (page - 1) * PAGE_SIZE
+    limit = PAGE_SIZE
+
+    with _search_cache_lock:
+        cache = _search_cache
+    key = f"{API_URL}/{json.dumps([query, offset, limit])}"
+    if cache is not None:
+        entry = cache.get(key)
+        if entry is not None:
+            logging.debug(f"Search page {page} for {query!r} served from cache")
+            return entry.value
 
     payload = {"query": query, "offset": offset, "limit": limit}
 
+    response = get_session().post(API_URL, json=payload, timeout=SEARCH_TIMEOUT)
+    response.raise_for_status()
+    data = response.json()
+    if cache is not None:
+        cache.put(key, data)
+    return data
+
+
+def fetch_results(query: str, page: int = 1) -> Dict[str, Any]:
+    """Fetch search results from the JSON API (or the search cache)."""
     try:
-        response = requests.post(API_URL, json=payload)
-        response.raise_for_status()
-        return response.json()
+        return _request_results(query, page)
     except requests.RequestException as e:
         print(f"Error fetching search results: {e}")
         return {"content": [], "totalHits": 0}
 
 
+class PagePrefetcher:
+    """Fetches the next search page in the background while one is on screen.
+
+    A prefetch that fails is dropped silently; asking for that page later
+    fetches it again in the foreground and reports the error then.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="search-prefetch")
+        self._pending: Dict[Tuple[str, int], Future] = {}
+
+    def prefetch(self, query: str, page: int) -> None:
+        """Start fetching a page unless it is already on its way."""
+        if (query, page) not in self._pending:
+            self._pending[(query, page)] = self._executor.submit(
+                _request_results, query, page
+            )
+
+    def fetch(self, query: str, page: int) -> Dict[str, Any]:
+        """Return a page, waiting on its prefetch if one was started."""
+        future = self._pending.pop((query, page), None)
+        if future is not None:
+            try:
+                return future.result()
+            except requests.RequestException as e:
+                logging.debug(f"Prefetch of search page {page} failed: {e}")
+        return fetch_results(query, page)
+
+    def close(self) -> None:
+        """Drop prefetches that have not started; running ones finish on their own."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
 def search_book(query: Optional[str] = None, interactive: bool = True) -> Optional[str]:
-    """Search for books using the API with iterative pagination instead of recursion."""
+    """Search for books using the API with iterative pagination instead of recursion.
+
+    While a page is shown, the next one is fetched in the background.
+    """
+    prefetcher = PagePrefetcher()
+    try:
+        return _search_loop(query, interactive, prefetcher)
+    finally:
+        prefetcher.close()
+
+
+def _search_loop(
+    query: Optional[str], interactive: bool, prefetcher: PagePrefetcher
+) -> Optional[str]:
     current_page = 1
-    api_cache: Dict[int, Dict[str, Any]] = {}
+    api_cache: Dict[Tuple[str, int], Dict[str, Any]] = {}
 
     while True:
         if query is None:
@@ -88,11 +189,11 @@ def search_book(query: Optional[str] = None, interactive: bool = True) -> Option
         # Show spinner while searching
         with console.status("[bold green]Searching...[/]", spinner="dots"):
             # Get cached or fetch results
-            if current_page in api_cache:
-                api_response = api_cache[current_page]
+            if (query, current_page) in api_cache:
+                api_response = api_cache[(query, current_page)]
             else:
-                api_response = fetch_results(query, current_page)
-                api_cache[current_page] = api_response
+                api_response = prefetcher.fetch(query, current_page)
+                api_cache[(query, current_page)] = api_response
 
         results = api_response.get("content", [])
 
@@ -109,7 +210,7 @@ def search_book(query: Optional[str] = None, interactive: bool = True) -> Option
         display_results = search_results
 
         # Check pagination
-        current_offset = (current_page - 1) * 12
+        current_offset = (current_page - 1) * PAGE_SIZE
         total_results = api_response.get("totalHits", 0)
         has_more = current_offset + len(display_results) < total_results
         has_previous = current_page > 1
@@ -121,6 +222,10 @@ def search_book(query: Optional[str] = None, interactive: bool = True) -> Option
                 console.print(f"{i}. 📖 {result.title}")
             return display_results[0].full_url if display_results else None
 
+        if has_more and (query, current_page + 1) not in api_cache:
+            # Fetched while the user reads this page
+            prefetcher.prefetch(query, current_page + 1)
+
         # Get user choice
         formatter = SearchResultFormatter()
         choices, actions = formatter.get_display_choices(
@@ -145,7 +250,6 @@ def search_book(query: Optional[str] = None, interactive: bool = True) -> Option
         elif action == "search_again":
             query = None
             current_page = 1
-            api_cache.clear()
             continue
         elif action == "exit":
             print("Exiting...")
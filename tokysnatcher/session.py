@@ -0,0 +1,162 @@
+"""Shared HTTP transport for TokySnatcher - pooled keep-alive connections."""
+
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
+import logging
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+# Site root for API, playlist and segment requests; TOKYSNATCHER_BASE_URL
+# points the client at a local stand-in such as benchmarks/fake_tokybook.py
+BASE_URL = os.environ.get("TOKYSNATCHER_BASE_URL", "https://tokybook.com").rstrip("/")
+
+# Host part of BASE_URL, which book URLs must contain
+SITE_HOST = urlparse(BASE_URL).netloc
+
+# Default number of pooled connections kept per host
+DEFAULT_POOL_SIZE = 10
+
+# Number of distinct host pools to keep alive (tokybook.com plus a few CDNs)
+DEFAULT_HOST_POOLS = 4
+
+
+@dataclass
+class ConnectionStats:
+    """Counts TCP connections opened versus requests served."""
+
+    opened: int = 0
+    requests: int = 0
+
+    @property
+    def reused(self) -> int:
+        """Requests that were served over an already open connection."""
+        return max(0, self.requests - self.opened)
+
+
+_stats = ConnectionStats()
+_stats_lock = threading.Lock()
+
+_session: Optional[requests.Session] = None
+_session_pool_size = 0
+_session_lock = threading.Lock()
+
+
+def _record_connection_opened() -> None:
+    with _stats_lock:
+        _stats.opened += 1
+
+
+def _record_request() -> None:
+    with _stats_lock:
+        _stats.requests += 1
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    """HTTP connection that counts every real TCP connect."""
+
+    def connect(self):
+        _record_connection_opened()
+        super().connect()
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    """HTTPS connection that counts every real TCP+TLS connect."""
+
+    def connect(self):
+        _record_connection_opened()
+        super().connect()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter with a blocking per-host pool and connection accounting."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, *args, **kwargs):
+        _record_request()
+        return super().send(request, *args, **kwargs)
+
+
+def _build_session(pool_size: int) -> requests.Session:
+    """Create a session whose adapters keep up to pool_size connections per host."""
+    session = requests.Session()
+    adapter = PooledHTTPAdapter(
+        pool_connections=DEFAULT_HOST_POOLS,
+        pool_maxsize=pool_size,
+        pool_block=True,  # Enforce the per-host limit instead of opening extras
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session, _session_pool_size
+
+    with _session_lock:
+        if _session is None:
+            _session = _build_session(DEFAULT_POOL_SIZE)
+            _session_pool_size = DEFAULT_POOL_SIZE
+        return _session
+
+
+def configure_session(max_connections: int) -> requests.Session:
+    """Size the shared pool for the expected number of concurrent requests.
+
+    The pool only ever grows; call this before starting workers so that
+    in-flight requests are not holding connections of a replaced adapter.
+
+    Args:
+        max_connections: Maximum concurrent requests per host
+
+    Returns:
+        requests.Session: The shared session
+    """
+    global _session, _session_pool_size
+
+    max_connections = max(1, max_connections)
+    with _session_lock:
+        if _session is None or max_connections > _session_pool_size:
+            old_session = _session
+            _session = _build_session(max_connections)
+            _session_pool_size = max_connections
+            if old_session is not None:
+                old_session.close()
+            logging.debug(f"HTTP pool sized to {max_connections} connections per host")
+        return _session
+
+
+def get_connection_stats() -> ConnectionStats:
+    """Return a snapshot of connection reuse counters."""
+    with _stats_lock:
+        return ConnectionStats(opened=_stats.opened, requests=_stats.requests)
+
+
+def log_connection_stats() -> None:
+    """Log how many connections were opened versus reused."""
+    stats = get_connection_stats()
+    logging.info(
+        f"HTTP connections: {stats.opened} opened, {stats.reused} reused "
+        f"({stats.requests} requests)"
+    )
@@ -0,0 +1,213 @@
+"""Machine-readable run report (--stats-json): per-chapter and per-segment timings."""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Optional
+import datetime
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+
+# Percentiles reported for every timing distribution
+PERCENTILES = (50, 90, 95, 99)
+
+# Report layout version, bumped when fields change meaning
+REPORT_VERSION = 1
+
+
+@dataclass
+class SegmentTiming:
+    """One segment fetch; times are of the attempt that succeeded.
+
+    Only the thread fetching the segment writes to it, so it needs no lock.
+    """
+
+    index: int
+    ttfb: Optional[float] = None  # Request sent -> response headers (seconds)
+    transfer: Optional[float] = None  # Headers -> last body byte (seconds)
+    bytes: int = 0
+    attempts: int = 0
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - 1)
+
+    def finish(self, ttfb: float, transfer: float, nbytes: int) -> None:
+        """Record the successful attempt."""
+        self.ttfb = ttfb
+        self.transfer = transfer
+        self.bytes = nbytes
+
+
+@dataclass
+class ChapterTiming:
+    """Timings of one chapter downloaded in this run."""
+
+    book: str
+    index: int
+    name: str
+    playlist_latency: Optional[float] = None
+    download_seconds: Optional[float] = None
+    ffmpeg_wall: Optional[float] = None
+    ffmpeg_cpu: Optional[float] = None
+    bytes_written: Optional[int] = None  # Size of the final file, if converted
+    segments: list[SegmentTiming] = field(default_factory=list)
+
+    def segment(self, index: int) -> SegmentTiming:
+        """Start the record of a segment fetch."""
+        timing = SegmentTiming(index)
+        self.segments.append(timing)  # list.append is atomic
+        return timing
+
+    def to_dict(self) -> dict[str, Any]:
+        fetched = [s for s in self.segments if s.ttfb is not None]
+        return {
+            "book": self.book,
+            "index": self.index,
+            "name": self.name,
+            "success": self.bytes_written is not None,
+            "playlist_latency": self.playlist_latency,
+            "download_seconds": self.download_seconds,
+            "ffmpeg_wall": self.ffmpeg_wall,
+            "ffmpeg_cpu": self.ffmpeg_cpu,
+            "bytes_downloaded": sum(s.bytes for s in fetched),
+            "bytes_written": self.bytes_written,
+            "retries": sum(s.retries for s in self.segments),
+            "segments": [
+                {
+                    "index": s.index,
+                    "ttfb": s.ttfb,
+                    "transfer": s.transfer,
+                    "bytes": s.bytes,
+                    "retries": s.retries,
+                }
+                for s in sorted(fetched, key=lambda s: s.index)
+            ],
+        }
+
+
+def summarize(values: Iterable[Optional[float]]) -> dict[str, Any]:
+    """Count, total, mean, min, max and nearest-rank PERCENTILES of values.
+
+    None values (not measured) are skipped.
+    """
+    data = sorted(v for v in values if v is not None)
+    if not data:
+        return {"count": 0}
+    summary: dict[str, Any] = {
+        "count": len(data),
+        "total": sum(data),
+        "mean": sum(data) / len(data),
+        "min": data[0],
+        "max": data[-1],
+    }
+    for p in PERCENTILES:
+        rank = max(1, -(-p * len(data) // 100))  # ceil(p/100 * n)
+        summary[f"p{p}"] = data[rank - 1]
+    return summary
+
+
+class RunStats:
+    """Collects the timings of a run and renders them as a JSON report."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self._chapters: dict[tuple[str, int], ChapterTiming] = {}
+        self._lock = threading.Lock()
+
+    def chapter(self, book: str, index: int, name: str) -> ChapterTiming:
+        """The record of a chapter, created on first use."""
+        with self._lock:
+            key = (book, index)
+            if key not in self._chapters:
+                self._chapters[key] = ChapterTiming(book, index, name)
+            return self._chapters[key]
+
+    def report(self) -> dict[str, Any]:
+        """The report as a JSON-serialisable dict."""
+        with self._lock:
+            chapters = sorted(self._chapters.values(), key=lambda c: (c.book, c.index))
+        records = [chapter.to_dict() for chapter in chapters]
+        segments = [s for record in records for s in record["segments"]]
+        return {
+            "version": REPORT_VERSION,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "wall_seconds": time.monotonic() - self.started,
+            "totals": {
+                "chapters": len(records),
+                "chapters_succeeded": sum(1 for r in records if r["success"]),
+                "segments": len(segments),
+                "bytes_downloaded": sum(r["bytes_downloaded"] for r in records),
+                "bytes_written": sum(r["bytes_written"] or 0 for r in records),
+                "retries": sum(r["retries"] for r in records),
+                "ffmpeg_wall": sum(r["ffmpeg_wall"] or 0.0 for r in records),
+                "ffmpeg_cpu": sum(r["ffmpeg_cpu"] or 0.0 for r in records),
+            },
+            "segment_timings": {
+                "ttfb": summarize(s["ttfb"] for s in segments),
+                "transfer": summarize(s["transfer"] for s in segments),
+                "bytes": summarize(s["bytes"] for s in segments),
+            },
+            "chapter_timings": {
+                key: summarize(r[key] for r in records)
+                for key in (
+                    "playlist_latency",
+                    "download_seconds",
+                    "ffmpeg_wall",
+                    "ffmpeg_cpu",
+                    "bytes_written",
+                )
+            },
+            "chapters": records,
+        }
+
+    def write(self, path: Path) -> None:
+        """Write the report to path (atomically, via a temporary file)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self.report(), indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def parse_ffmpeg_cpu_time(stderr: str) -> Optional[float]:
+    """User + system CPU seconds from ffmpeg's -benchmark line, if present."""
+    match = re.search(r"bench: utime=([\d.]+)s stime=([\d.]+)s", stderr)
+    if match is None:
+        return None
+    return float(match.group(1)) + float(match.group(2))
+
+
+# Process-wide collector; None unless --stats-json is given
+_run_stats: Optional[RunStats] = None
+_run_stats_lock = threading.Lock()
+
+
+def configure_run_stats(enabled: bool) -> Optional[RunStats]:
+    """Start collecting timings for this process, or stop (enabled=False)."""
+    global _run_stats
+    with _run_stats_lock:
+        _run_stats = RunStats() if enabled else None
+        return _run_stats
+
+
+def get_run_stats() -> Optional[RunStats]:
+    """The process-wide collector, or None when no report was requested."""
+    return _run_stats
+
+
+def write_run_stats(path: Path) -> None:
+    """Write the collected report to path; failures are logged, not raised."""
+    stats = get_run_stats()
+    if stats is None:
+        return
+    try:
+        stats.write(path)
+    except OSError as e:
+        logging.error(f"Cannot write stats report {path}: {e}")
+        return
+    logging.info(f"Run statistics written to {path}")
@@ -0,0 +1,124 @@
+"""Byte-level transfer accounting for the progress display: rates and ETA."""
+
+from collections import deque
+from typing import Callable, Optional
+import threading
+import time
+
+
+# Window of the "current" transfer rate (seconds)
+CURRENT_RATE_WINDOW = 1.0
+
+# Window of the moving-average rate, which also drives the ETA (seconds)
+AVERAGE_RATE_WINDOW = 10.0
+
+
+class _Meter:
+    """Bytes received, segment sizes seen, and rates sampled from them.
+
+    add() runs once per socket read, so it only bumps counters under a lock
+    shared with the book; rates are computed by sample(), which the UI thread
+    calls once per frame.
+    """
+
+    def __init__(self, lock: threading.Lock, clock: Callable[[], float]):
+        self.bytes = 0
+        self.total_segments = 0
+        self.rate = 0.0
+        self.average_rate = 0.0
+        self._lock = lock
+        self._clock = clock
+        self._sized_bytes = 0
+        self._sized_segments = 0
+        self._samples: deque[tuple[float, int]] = deque()
+        self._started: Optional[float] = None  # Rates count from here
+
+    def estimated_total(self) -> Optional[int]:
+        """Expected bytes of all segments, from the sizes seen so far."""
+        if not self._sized_segments or not self.total_segments:
+            return None
+        return int(self._sized_bytes / self._sized_segments * self.total_segments)
+
+    def eta(self) -> Optional[float]:
+        """Seconds left at the moving-average rate, if it can be estimated."""
+        total = self.estimated_total()
+        if total is None or self.average_rate <= 0:
+            return None
+        return max(0, total - self.bytes) / self.average_rate
+
+    def sample(self) -> None:
+        """Update rate and average_rate from the bytes received so far."""
+        now = self._clock()
+        samples = self._samples
+        if not samples and self._started is not None:
+            samples.append((self._started, 0))
+        samples.append((now, self.bytes))
+        while len(samples) > 1 and now - samples[0][0] > AVERAGE_RATE_WINDOW:
+            samples.popleft()
+        self.average_rate = self._rate_since(samples[0])
+        recent = samples[0]
+        for sample in reversed(samples):
+            recent = sample
+            if now - sample[0] >= CURRENT_RATE_WINDOW:
+                break
+        self.rate = self._rate_since(recent)
+
+    def _rate_since(self, sample: tuple[float, int]) -> float:
+        then, nbytes = sample
+        elapsed = self._clock() - then
+        if elapsed <= 0:
+            return 0.0
+        # Discarded reads can make the count drop; show that as no progress
+        return max(0.0, (self.bytes - nbytes) / elapsed)
+
+
+class BookMeter(_Meter):
+    """Transfer totals of a whole book; chapter meters feed into it."""
+
+    def __init__(
+        self, total_segments: int = 0, clock: Callable[[], float] = time.monotonic
+    ):
+        super().__init__(threading.Lock(), clock)
+        self.total_segments = total_segments
+        self._started = clock()
+
+    def chapter(self, planned_segments: int = 0) -> "ChapterMeter":
+        """A meter for one chapter; planned_segments is already in the total."""
+        return ChapterMeter(self, planned_segments)
+
+
+class ChapterMeter(_Meter):
+    """Transfer totals of one chapter, mirrored into its BookMeter."""
+
+    def __init__(self, book: BookMeter, planned_segments: int = 0):
+        super().__init__(book._lock, book._clock)
+        self.book = book
+        self._planned_segments = planned_segments
+
+    def start(self, total_segments: int) -> None:
+        """Set the number of segments left to fetch (after any resume)."""
+        with self._lock:
+            self.book.total_segments += total_segments - self._planned_segments
+            self._planned_segments = total_segments
+            self.total_segments = total_segments
+            self._started = self._clock()
+
+    def add(self, nbytes: int) -> None:
+        """Count bytes read from a segment body."""
+        with self._lock:
+            self.bytes += nbytes
+            self.book.bytes += nbytes
+
+    def discard(self, nbytes: int) -> None:
+        """Take back bytes of a failed or aborted read; the segment is retried."""
+        with self._lock:
+            self.bytes -= nbytes
+            self.book.bytes -= nbytes
+
+    def segment_size(self, nbytes: int) -> None:
+        """Record the size of a segment whose body was read completely."""
+        with self._lock:
+            self._sized_bytes += nbytes
+            self._sized_segments += 1
+            self.book._sized_bytes += nbytes
+            self.book._sized_segments += 1
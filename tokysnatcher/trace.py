@@ -0,0 +1,158 @@
+"""Opt-in span tracer (--trace) exporting Chrome trace-event JSON.
+
+The file opens in https://ui.perfetto.dev or chrome://tracing. Spans are
+complete ("X") events on the thread that ran them, tagged with the chapter;
+spans that overlap on one thread (segment fetches of the asyncio engine) are
+async ("b"/"e") events instead, so they stack rather than mis-nest.
+
+With tracing off, span() returns a shared no-op context manager after one
+global lookup, so call sites can stay in the hot path.
+"""
+
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Iterator, Optional
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+
+_NO_SPAN: ContextManager[None] = nullcontext()
+
+
+class Tracer:
+    """Collects trace events in memory until write() is called."""
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._events: list[dict[str, Any]] = []  # list.append is atomic
+        self._thread_names: dict[int, str] = {}
+        self._ids = itertools.count(1)
+
+    def now(self) -> float:
+        """Microseconds since the tracer started, the time base of events."""
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def _tid(self) -> int:
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        return tid
+
+    @contextmanager
+    def span(self, name: str, category: str, **args: Any) -> Iterator[None]:
+        """Record the with-block as a complete event on the current thread."""
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.complete(name, category, start, self.now(), **args)
+
+    @contextmanager
+    def async_span(self, name: str, category: str, **args: Any) -> Iterator[None]:
+        """Record the with-block as an async event, for spans that overlap."""
+        event = {
+            "name": name,
+            "cat": category,
+            "id": next(self._ids),
+            "pid": self._pid,
+            "tid": self._tid(),
+        }
+        self._events.append({**event, "ph": "b", "ts": self.now(), "args": args})
+        try:
+            yield
+        finally:
+            self._events.append({**event, "ph": "e", "ts": self.now()})
+
+    def complete(
+        self, name: str, category: str, start: float, end: float, **args: Any
+    ) -> None:
+        """Add a complete event from start to end (tracer microseconds)."""
+        self._events.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start,
+                "dur": end - start,
+                "pid": self._pid,
+                "tid": self._tid(),
+                "args": args,
+            }
+        )
+
+    def since(self, monotonic_start: float) -> float:
+        """Convert a time.monotonic() reading taken earlier to tracer time."""
+        return self.now() - (time.monotonic() - monotonic_start) * 1e6
+
+    def write(self, path: Path) -> None:
+        """Write the trace (atomically, via a temporary file)."""
+        metadata = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self._pid,
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for tid, name in list(self._thread_names.items())
+        ]
+        trace = {
+            "traceEvents": metadata + list(self._events),
+            "displayTimeUnit": "ms",
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(trace), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+# Process-wide tracer; None unless --trace is given
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def configure_tracing(enabled: bool) -> Optional[Tracer]:
+    """Start tracing this process, or stop (enabled=False)."""
+    global _tracer
+    with _tracer_lock:
+        _tracer = Tracer() if enabled else None
+        return _tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    """The process-wide tracer, or None when tracing is off."""
+    return _tracer
+
+
+def span(name: str, category: str, **args: Any) -> ContextManager[None]:
+    """A span on the current thread if tracing is on, else a no-op."""
+    tracer = _tracer
+    if tracer is None:
+        return _NO_SPAN
+    return tracer.span(name, category, **args)
+
+
+def async_span(name: str, category: str, **args: Any) -> ContextManager[None]:
+    """An async span (may overlap others on its thread) if tracing is on."""
+    tracer = _tracer
+    if tracer is None:
+        return _NO_SPAN
+    return tracer.async_span(name, category, **args)
+
+
+def write_trace(path: Path) -> None:
+    """Write the collected trace to path; failures are logged, not raised."""
+    tracer = get_tracer()
+    if tracer is None:
+        return
+    try:
+        tracer.write(path)
+    except OSError as e:
+        logging.error(f"Cannot write trace {path}: {e}")
+        return
+    logging.info(f"Trace written to {path} (open it in https://ui.perfetto.dev)")
@@ -0,0 +1,278 @@
+"""ffmpeg invocation helpers - file conversion and streaming via stdin."""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+import io
+import logging
+import re
+import shutil
+import subprocess
+import threading
+import time
+
+
+class FfmpegError(RuntimeError):
+    """ffmpeg exited before it had consumed all of its input."""
+
+    def __init__(self, returncode: Optional[int], stderr: str):
+        super().__init__(f"ffmpeg exited early (exit code {returncode})")
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+# Output formats selectable with --format
+OUTPUT_FORMATS = ("mp3", "auto", "m4a", "m4b")
+
+# Codec arguments for each kind of conversion
+_MP3_ARGS = ["-c:a", "libmp3lame", "-ar", "44100", "-ac", "2", "-b:a", "320k"]
+_AAC_ARGS = ["-c:a", "aac", "-b:a", "192k"]
+_COPY_ARGS = ["-c:a", "copy"]
+# ADTS AAC from MPEG-TS needs its headers rewritten for MP4 containers
+_MP4_COPY_ARGS = ["-c:a", "copy", "-bsf:a", "aac_adtstoasc"]
+
+
+@dataclass
+class OutputPlan:
+    """How a chapter source is turned into its final file."""
+
+    extension: str
+    codec_args: list[str]
+
+    @property
+    def remux(self) -> bool:
+        """True when the audio stream is copied rather than re-encoded."""
+        return "copy" in self.codec_args
+
+
+def needs_probe(output_format: str) -> bool:
+    """Whether the source codec must be known to plan this output format."""
+    return output_format != "mp3"
+
+
+def output_extensions(output_format: str) -> tuple[str, ...]:
+    """All file extensions a chapter may end up with for output_format."""
+    return {
+        "mp3": (".mp3",),
+        "auto": (".m4a", ".mp3"),
+        "m4a": (".m4a",),
+        "m4b": (".m4b",),
+    }[output_format]
+
+
+def plan_output(output_format: str, source_codec: Optional[str]) -> OutputPlan:
+    """Choose container and codec arguments, copying the stream when possible.
+
+    Args:
+        output_format: One of OUTPUT_FORMATS. "mp3" always re-encodes to a
+            320k MP3; "auto" keeps AAC as .m4a and MP3 as .mp3; "m4a"/"m4b"
+            copy AAC into that container and transcode anything else to AAC.
+        source_codec: Codec reported by probe_audio_codec, or None if unknown
+    """
+    if output_format == "mp3":
+        return OutputPlan(".mp3", _MP3_ARGS)
+    if output_format == "auto":
+        if source_codec == "aac":
+            return OutputPlan(".m4a", _MP4_COPY_ARGS)
+        if source_codec == "mp3":
+            return OutputPlan(".mp3", _COPY_ARGS)
+        return OutputPlan(".mp3", _MP3_ARGS)
+    if source_codec == "aac":
+        return OutputPlan(f".{output_format}", _MP4_COPY_ARGS)
+    return OutputPlan(f".{output_format}", _AAC_ARGS)
+
+
+def probe_audio_codec(
+    input_path: Optional[Path] = None, data: Optional[bytes] = None
+) -> Optional[str]:
+    """Return the codec name of the first audio stream using ffprobe.
+
+    Probes input_path, or data fed over stdin when no path is given. Returns
+    None when ffprobe is unavailable or cannot identify the stream, in which
+    case callers fall back to transcoding.
+    """
+    if not shutil.which("ffprobe"):
+        logging.debug("ffprobe not found; cannot probe source codec")
+        return None
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "a:0",
+        "-show_entries",
+        "stream=codec_name",
+        "-of",
+        "default=noprint_wrappers=1:nokey=1",
+        str(input_path) if input_path is not None else "pipe:0",
+    ]
+    # Never let ffprobe read the terminal when probing a file
+    stdin_data = bytes(data) if input_path is None and data is not None else b""
+    try:
+        completed = subprocess.run(
+            cmd,
+            input=stdin_data,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=30,
+            check=False,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logging.debug(f"ffprobe failed: {e}")
+        return None
+    lines = completed.stdout.decode(errors="replace").split()
+    if completed.returncode != 0 or not lines:
+        return None
+    return lines[0]
+
+
+def build_ffmpeg_command(
+    input_spec: str, output_path: Path, codec_args: Optional[list[str]] = None
+) -> list[str]:
+    """Build the ffmpeg command converting input_spec (a 320k MP3 by default).
+
+    -benchmark makes ffmpeg end its stderr with its CPU time (for --stats-json).
+    """
+    return [
+        "ffmpeg",
+        "-y",
+        "-benchmark",
+        "-i",
+        input_spec,
+        "-vn",
+        *(codec_args if codec_args is not None else _MP3_ARGS),
+        str(output_path),
+    ]
+
+
+def convert_file(
+    input_path: Path, output_path: Path, codec_args: Optional[list[str]] = None
+) -> subprocess.CompletedProcess:
+    """Convert a downloaded source file with ffmpeg and wait for it."""
+    return subprocess.run(
+        build_ffmpeg_command(str(input_path), output_path, codec_args),
+        stdin=subprocess.DEVNULL,  # ffmpeg otherwise reads keystrokes from the tty
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=False,
+    )
+
+
+def parse_ffmpeg_duration(stderr: str) -> Optional[float]:
+    """Return the output duration in seconds from ffmpeg's final progress line."""
+    matches = re.findall(r"time=(\d+):(\d{2}):(\d{2}(?:\.\d+)?)", stderr)
+    if not matches:
+        return None
+    hours, minutes, seconds = matches[-1]
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def log_ffmpeg_failure(chapter_name: str, stderr: str) -> None:
+    """Log a failed conversion with the start of ffmpeg's stderr."""
+    logging.error("ffmpeg conversion failed for chapter: %s", chapter_name)
+    logging.error("ffmpeg stderr (first 400 chars): %s", stderr[:400])
+
+
+class FfmpegStreamSink:
+    """Binary file-like object that pipes written bytes into a running ffmpeg.
+
+    ffmpeg reads the source from stdin, so encoding overlaps with downloading
+    and no intermediate file is written. It is started on the first write,
+    once the first segment can be probed to pick the output format; the final
+    path is then available as output_path. stderr is drained on a background
+    thread to keep the pipe from filling.
+    """
+
+    def __init__(self, output_stem: Path, output_format: str = "mp3"):
+        self.output_stem = output_stem
+        self.output_format = output_format
+        self.output_path: Optional[Path] = None
+        self.plan: Optional[OutputPlan] = None
+        self._stderr = io.StringIO()
+        self._process: Optional[subprocess.Popen] = None
+        self._stderr_thread: Optional[threading.Thread] = None
+        self.started: Optional[float] = None  # time.monotonic() of ffmpeg start
+
+    def _start(self, first_data) -> None:
+        source_codec = None
+        if needs_probe(self.output_format):
+            source_codec = probe_audio_codec(data=first_data)
+        self.plan = plan_output(self.output_format, source_codec)
+        self.output_path = self.output_stem.with_name(
+            self.output_stem.name + self.plan.extension
+        )
+        logging.debug(
+            f"Streaming {self.output_path.name}: source codec {source_codec}, "
+            f"{'remux' if self.plan.remux else 'transcode'}"
+        )
+        self.started = time.monotonic()
+        self._process = subprocess.Popen(
+            build_ffmpeg_command("pipe:0", self.output_path, self.plan.codec_args),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        self._stderr_thread = threading.Thread(
+            target=self._drain_stderr, name="ffmpeg-stderr", daemon=True
+        )
+        self._stderr_thread.start()
+
+    def _drain_stderr(self) -> None:
+        assert self._process is not None and self._process.stderr is not None
+        for line in io.TextIOWrapper(self._process.stderr, errors="replace"):
+            self._stderr.write(line)
+
+    def _join_stderr(self, timeout: Optional[float] = None) -> None:
+        if self._stderr_thread is not None:
+            self._stderr_thread.join(timeout)
+
+    def write(self, data) -> int:
+        """Feed source bytes to ffmpeg."""
+        if self._process is None:
+            self._start(data)
+        assert self._process is not None and self._process.stdin is not None
+        try:
+            self._process.stdin.write(data)
+        except (BrokenPipeError, OSError) as e:
+            returncode = self._process.wait()
+            self._join_stderr(timeout=1)
+            raise FfmpegError(returncode, self._stderr.getvalue()) from e
+        return len(data)
+
+    def flush(self) -> None:
+        """Flush buffered source bytes to ffmpeg."""
+        if self._process is not None and self._process.stdin is not None:
+            self._process.stdin.flush()
+
+    def finish(self) -> subprocess.CompletedProcess:
+        """Signal end of input and wait for ffmpeg to finish encoding."""
+        if self._process is None:
+            return subprocess.CompletedProcess([], 1, None, "No input was received")
+        assert self._process.stdin is not None
+        try:
+            self._process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass  # ffmpeg already exited; its return code tells the story
+        returncode = self._process.wait()
+        self._join_stderr()
+        return subprocess.CompletedProcess(
+            self._process.args, returncode, None, self._stderr.getvalue()
+        )
+
+    def abort(self) -> Optional[int]:
+        """Kill ffmpeg and remove its partial output."""
+        if self._process is None:
+            return None
+        if self._process.poll() is None:
+            self._process.kill()
+        try:
+            if self._process.stdin is not None:
+                self._process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        returncode = self._process.wait()
+        self._join_stderr(timeout=1)
+        if self.output_path is not None and self.output_path.exists():
+            self.output_path.unlink()
+        return returncode
@@ -115,6 +115,35 @@ def format_elapsed_time(seconds: float) -> str:
         return f"{minutes:02d}:{seconds:02d}"
 
 
+def format_bytes(nbytes: float) -> str:
+    """Format a byte count with binary units, e.g. 1.5 MiB."""
+    if abs(nbytes) < 1024:
+        return f"{nbytes:.0f} B"
+    for unit in ("KiB", "MiB"):
+        nbytes /= 1024
+        if abs(nbytes) < 1024:
+            return f"{nbytes:.1f} {unit}"
+    return f"{nbytes / 1024:.1f} GiB"
+
+
+class BandwidthStatus:
+    """Live header line with a bandwidth limiter's effective rate and burst.
+
+    Rendered anew on every refresh of the surrounding Live display.
+    """
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+
+    def __rich__(self) -> Text:
+        rate = format_bytes(self.limiter.effective_rate())
+        limit = format_bytes(self.limiter.rate)
+        burst = format_bytes(self.limiter.burst)
+        return Text(
+            f"🚦 Bandwidth: {rate}/s of {limit}/s (burst {burst})", style="bold"
+        )
+
+
 class CustomTimeColumn(TextColumn):
     """Custom time column that shows elapsed time only for started chapters."""
 
@@ -173,6 +202,41 @@ class CustomNameColumn(TextColumn):
         return Text(name, justify="left")
 
 
+class TransferRateColumn(TextColumn):
+    """Transfer rate of a task's meter: current, or the moving average."""
+
+    def __init__(self, average: bool = False):
+        super().__init__("", table_column=Column())
+        self.average = average
+
+    def render(self, task):
+        """Render the rate column; empty for tasks without a meter."""
+        meter = task.fields.get("meter")
+        if meter is None or not meter.bytes:
+            return Text("", justify="right")
+        if self.average:
+            rate = format_bytes(meter.average_rate)
+            return Text(f"avg {rate}/s", style="dim", justify="right")
+        if task.finished:
+            return Text("", justify="right")
+        return Text(f"{format_bytes(meter.rate)}/s", style="green", justify="right")
+
+
+class TransferEtaColumn(TextColumn):
+    """Time left for a task's meter at its moving-average rate."""
+
+    def __init__(self):
+        super().__init__("", table_column=Column())
+
+    def render(self, task):
+        """Render the ETA column; empty until enough has been transferred."""
+        meter = task.fields.get("meter")
+        eta = None if meter is None or task.finished else meter.eta()
+        if eta is None:
+            return Text("", justify="left")
+        return Text(f"ETA {format_elapsed_time(eta)}", style="yellow", justify="left")
+
+
 def create_progress_display() -> Progress:
     """Create the progress display with custom columns."""
     return Progress(
@@ -181,6 +245,9 @@ def create_progress_display() -> Progress:
         BarColumn(),
         TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
         CustomTimeColumn(),
+        TransferRateColumn(),
+        TransferRateColumn(average=True),
+        TransferEtaColumn(),
         console=Console(),
     )
 
@@ -0,0 +1,134 @@
+"""In-order streaming writer for segments that complete out of order."""
+
+from typing import Any, BinaryIO, Callable, Optional
+import threading
+
+from . import trace
+
+
+# Default cap on bytes held in the reorder buffer per chapter
+DEFAULT_MAX_BUFFERED_BYTES = 16 * 1024 * 1024
+
+# How often blocked workers re-check for shutdown (seconds)
+_WAIT_INTERVAL = 0.1
+
+
+class OrderedSegmentWriter:
+    """Reorder buffer that flushes segments to a file as soon as they are in order.
+
+    Segments arriving ahead of the next expected index are held in memory until
+    the gap is filled. Once the held bytes reach max_buffered_bytes, workers
+    submitting further out-of-order segments block, which applies backpressure
+    to the pool. The next expected segment is never blocked, so the window
+    always drains. If on_write is given, the file is flushed after each segment
+    and on_write(index, data) is called, e.g. to journal progress. If release
+    is given it is called with every segment once it has been written or
+    dropped, so pooled buffers can be recycled. trace_args tag the trace spans
+    of the writes (see trace).
+    """
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        max_buffered_bytes: int = DEFAULT_MAX_BUFFERED_BYTES,
+        first_index: int = 0,
+        release: Optional[Callable[[Any], None]] = None,
+        on_write: Optional[Callable[[int, Any], None]] = None,
+        trace_args: Optional[dict[str, Any]] = None,
+    ):
+        self._file = fileobj
+        self._trace_args = trace_args or {}
+        self._on_write = on_write
+        self._release = release
+        self._max_buffered_bytes = max_buffered_bytes
+        self._next_index = first_index
+        self._pending: dict[int, Any] = {}
+        self._buffered_bytes = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.bytes_written = 0
+
+    @property
+    def next_index(self) -> int:
+        """Index of the next segment to be written."""
+        return self._next_index
+
+    def _window_full(self, index: int, size: int) -> bool:
+        if index == self._next_index or self._buffered_bytes == 0:
+            # Never block the segment that unblocks the window, and always
+            # accept one segment even if it alone exceeds the cap
+            return False
+        return self._buffered_bytes + size > self._max_buffered_bytes
+
+    def _write(self, data) -> None:
+        with trace.span(
+            "write", "io", segment=self._next_index + 1, **self._trace_args
+        ):
+            self._file.write(data)
+            self.bytes_written += len(data)
+            if self._on_write is not None:
+                self._file.flush()
+                self._on_write(self._next_index, data)
+        self._next_index += 1
+        if self._release is not None:
+            self._release(data)
+
+    def submit(
+        self,
+        index: int,
+        data,
+        should_abort: Optional[Callable[[], bool]] = None,
+    ) -> bool:
+        """Hand over a downloaded segment, blocking while the buffer is full.
+
+        Args:
+            index: Segment position in the playlist
+            data: Segment payload (any bytes-like object)
+            should_abort: Polled while blocked; returning True gives up
+
+        Returns:
+            bool: False if the writer was closed or the wait was aborted
+        """
+        with self._cond:
+            while not self._closed and self._window_full(index, len(data)):
+                if should_abort is not None and should_abort():
+                    self._drop(data)
+                    return False
+                self._cond.wait(_WAIT_INTERVAL)
+
+            if self._closed:
+                self._drop(data)
+                return False
+
+            if index != self._next_index:
+                self._pending[index] = data
+                self._buffered_bytes += len(data)
+                return True
+
+            self._write(data)
+            while self._next_index in self._pending:
+                buffered = self._pending.pop(self._next_index)
+                self._buffered_bytes -= len(buffered)
+                self._write(buffered)
+
+            self._cond.notify_all()
+            return True
+
+    def is_complete(self, total_segments: int) -> bool:
+        """Check whether every segment up to total_segments has been written."""
+        with self._cond:
+            return self._next_index >= total_segments
+
+    def _drop(self, data) -> None:
+        if self._release is not None:
+            self._release(data)
+
+    def close(self) -> None:
+        """Drop buffered segments and release any blocked workers."""
+        with self._cond:
+            self._closed = True
+            for data in self._pending.values():
+                self._drop(data)
+            self._pending.clear()
+            self._buffered_bytes = 0
+            self._cond.notify_all()